@@ -15,6 +15,41 @@ NEO4J_URI = os.getenv("NEO4J_URI", "bolt://localhost:7687")
 NEO4J_USERNAME = os.getenv("NEO4J_USERNAME", "neo4j")
 NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD", "neo4j")
 
+# Neo4j connection pool settings (one pooled driver is shared by the whole process)
+NEO4J_MAX_CONNECTION_POOL_SIZE = int(os.getenv("NEO4J_MAX_CONNECTION_POOL_SIZE", "50"))
+NEO4J_CONNECTION_ACQUISITION_TIMEOUT = float(os.getenv("NEO4J_CONNECTION_ACQUISITION_TIMEOUT", "30"))
+NEO4J_LIVENESS_CHECK_TIMEOUT = float(os.getenv("NEO4J_LIVENESS_CHECK_TIMEOUT", "30"))
+NEO4J_MAX_CONNECTION_LIFETIME = float(os.getenv("NEO4J_MAX_CONNECTION_LIFETIME", "3600"))
+
+# Seconds a workspace database stays trusted as online before it is checked again
+NEO4J_DATABASE_CACHE_TTL = float(os.getenv("NEO4J_DATABASE_CACHE_TTL", "300"))
+
+# Seconds a managed transaction keeps retrying transient or connection errors
+NEO4J_TRANSACTION_RETRY_DEADLINE = float(os.getenv("NEO4J_TRANSACTION_RETRY_DEADLINE", "30"))
+
+# Graph tenancy: "database" gives every workspace its own Neo4j database (Enterprise),
+# "shared" keeps all workspaces in NEO4J_SHARED_DATABASE scoped by a workspace_id property
+GRAPH_TENANCY_MODE = os.getenv("GRAPH_TENANCY_MODE", "database").lower()
+NEO4J_SHARED_DATABASE = os.getenv("NEO4J_SHARED_DATABASE", "neo4j")
+if GRAPH_TENANCY_MODE not in ("database", "shared"):
+    raise EnvironmentError(
+        f"GRAPH_TENANCY_MODE must be 'database' or 'shared', got '{GRAPH_TENANCY_MODE}'"
+    )
+
+# Graph backend: "neo4j", or "memory" for an in-process store without persistence
+# (hermetic tests, benchmarks, small single-node deployments)
+GRAPH_BACKEND = os.getenv("GRAPH_BACKEND", "neo4j").lower()
+if GRAPH_BACKEND not in ("neo4j", "memory"):
+    raise EnvironmentError(
+        f"GRAPH_BACKEND must be 'neo4j' or 'memory', got '{GRAPH_BACKEND}'"
+    )
+
+# Seconds a derived workspace view (per-person task index) may go unread before it
+# is dropped; views that are read stay current through the change feed
+GRAPH_VIEW_MAX_AGE = float(os.getenv("GRAPH_VIEW_MAX_AGE", "300"))
+# Maximum number of workspaces whose view is held in memory; least recently read go first
+GRAPH_VIEW_MAX_ENTRIES = int(os.getenv("GRAPH_VIEW_MAX_ENTRIES", "256"))
+
 # API tokens
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
@@ -41,6 +76,45 @@ DEFAULT_TEMPERATURE = 0.3
 DEFAULT_REQUEST_DELAY = 1.0
 MAX_RETRIES = 3
 
+# Maximum rows per UNWIND statement when writing an analysis result to the graph
+GRAPH_WRITE_BATCH_SIZE = int(os.getenv("GRAPH_WRITE_BATCH_SIZE", "500"))
+
+# Maximum number of cached workspace read results (graph, tasks, members, statistics)
+READ_CACHE_MAX_ENTRIES = int(os.getenv("READ_CACHE_MAX_ENTRIES", "1024"))
+
+# Background /analyze jobs: concurrent workers, jobs allowed to wait, and seconds a
+# finished job stays pollable at /jobs/{job_id}
+ANALYSIS_JOB_WORKERS = int(os.getenv("ANALYSIS_JOB_WORKERS", "2"))
+ANALYSIS_JOB_MAX_QUEUED = int(os.getenv("ANALYSIS_JOB_MAX_QUEUED", "100"))
+ANALYSIS_JOB_RETENTION = float(os.getenv("ANALYSIS_JOB_RETENTION", "3600"))
+# Progress events kept per job for /jobs/{job_id}/events; the oldest are dropped first
+ANALYSIS_JOB_MAX_EVENTS = int(os.getenv("ANALYSIS_JOB_MAX_EVENTS", "1000"))
+
+# Document pages sent to the LLM at the same time during /analyze; 1 processes
+# pages one after another in a worker thread
+DOCUMENT_EXTRACTION_CONCURRENCY = int(os.getenv("DOCUMENT_EXTRACTION_CONCURRENCY", "4"))
+
+# Team members analysed at the same time during /analyze; 1 analyses them one after
+# another in a worker thread
+TEAM_ANALYSIS_CONCURRENCY = int(os.getenv("TEAM_ANALYSIS_CONCURRENCY", "8"))
+
+# Shared rate limit for every LLM call of the process, matching the provider quota
+# (defaults: Groq free tier for llama-3.1-70b-versatile); 0 lifts a limit and both 0
+# disables the limiter. Burst is the seconds of quota that may be spent at once,
+# completion tokens are reserved per call until the response size is known
+LLM_REQUESTS_PER_MINUTE = float(os.getenv("LLM_REQUESTS_PER_MINUTE", "30"))
+LLM_TOKENS_PER_MINUTE = float(os.getenv("LLM_TOKENS_PER_MINUTE", "6000"))
+LLM_RATE_LIMIT_BURST_SECONDS = float(os.getenv("LLM_RATE_LIMIT_BURST_SECONDS", "10"))
+LLM_COMPLETION_TOKENS = int(os.getenv("LLM_COMPLETION_TOKENS", "512"))
+# tiktoken encoding used to count prompt tokens
+LLM_TOKEN_ENCODING = os.getenv("LLM_TOKEN_ENCODING", "cl100k_base")
+
+# On-disk cache of LLM responses keyed by model, temperature, prompt and input;
+# an empty LLM_CACHE_PATH disables it. TTL is in seconds, 0 never expires
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "cache/llm_cache.sqlite3")
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000"))
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", "604800"))
+
 # File handling settings
 ALLOWED_FILE_TYPES = ['.pdf', '.txt', '.md']
 CHUNK_SIZE = 10000
@@ -4,38 +4,234 @@ Main FastAPI Application Module is the main entry point for the FastAPI applicat
 Author: Tanapat Chamted
 """
 
-from fastapi import FastAPI, File, UploadFile, HTTPException, Form
+from fastapi import FastAPI, File, UploadFile, HTTPException, Form, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List, Dict, Any
+from fastapi.responses import StreamingResponse, PlainTextResponse, Response
+from contextlib import asynccontextmanager
+from typing import List, Dict, Any, Optional
 from datetime import datetime
 
-from src.core.models import TeamDetails, NodeUpdate, ProcessingResponse
-from src.services.document_processor import process_documents
-from src.services.team_analyzer import analyze_team_roles, validate_team_details
+from src.core.models import TeamDetails, NodeUpdate, ProcessingResponse, GraphFilter, GraphBatch
+from src.services.document_processor import process_documents, process_documents_async
+from src.services.team_analyzer import analyze_team_roles, analyze_team_roles_async, validate_team_details
 from src.services.graph_manager import (
-    Neo4jManager,
-    add_task_to_role,
-    create_neo4j_manager,
-    create_node,
-    create_relationship,
-    get_workspace_tasks,
-    update_node_by_id,
-    delete_node_by_id,
-    get_graph_statistics
+    AsyncNeo4jManager,
+    init_neo4j_manager,
+    get_neo4j_manager,
+    close_neo4j_manager,
+    apply_graph_batch,
+    workspace_key
 )
+from src.services.graph_store import Neo4jGraphStore, init_graph_store, get_graph_store, close_graph_store
+from src.services.memory_graph_store import InMemoryGraphStore
+from src.services.graph_views import IndexedGraphStore
+from src.services.workspace_cache import WorkspaceReadCache
+from src.services.job_queue import Job, JobQueueFull, init_job_queue, get_job_queue, close_job_queue
+from src.services.analysis_progress import AnalysisProgress
 from src.services.llm_service import get_llm
+from src.services.llm_cache import init_llm_cache, get_llm_cache, close_llm_cache
+from src.services.rate_limiter import init_rate_limiter, get_rate_limiter, close_rate_limiter, load_token_encoding
 from src.utils.file_handler import save_upload_files, cleanup_temp_files
+from src.utils.metrics import REGISTRY
+from src.utils.graph_encoding import negotiate_graph_media_type, encode_graph, dumps_json
 import json
-from config import NEO4J_URI, NEO4J_USERNAME, NEO4J_PASSWORD
+import time
+import asyncio
+from config import (
+    NEO4J_URI,
+    NEO4J_USERNAME,
+    NEO4J_PASSWORD,
+    NEO4J_MAX_CONNECTION_POOL_SIZE,
+    NEO4J_CONNECTION_ACQUISITION_TIMEOUT,
+    NEO4J_LIVENESS_CHECK_TIMEOUT,
+    NEO4J_MAX_CONNECTION_LIFETIME,
+    NEO4J_DATABASE_CACHE_TTL,
+    NEO4J_TRANSACTION_RETRY_DEADLINE,
+    GRAPH_TENANCY_MODE,
+    NEO4J_SHARED_DATABASE,
+    GRAPH_BACKEND,
+    GRAPH_VIEW_MAX_AGE,
+    GRAPH_VIEW_MAX_ENTRIES,
+    GRAPH_WRITE_BATCH_SIZE,
+    READ_CACHE_MAX_ENTRIES,
+    ANALYSIS_JOB_WORKERS,
+    ANALYSIS_JOB_MAX_QUEUED,
+    ANALYSIS_JOB_RETENTION,
+    ANALYSIS_JOB_MAX_EVENTS,
+    LLM_CACHE_PATH,
+    LLM_CACHE_MAX_ENTRIES,
+    LLM_CACHE_TTL,
+    DOCUMENT_EXTRACTION_CONCURRENCY,
+    LLM_REQUESTS_PER_MINUTE,
+    LLM_TOKENS_PER_MINUTE,
+    LLM_RATE_LIMIT_BURST_SECONDS,
+    LLM_COMPLETION_TOKENS,
+    LLM_TOKEN_ENCODING,
+    TEAM_ANALYSIS_CONCURRENCY
+)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Create the graph store (and the shared Neo4j driver), the job queue, the
+    LLM cache and the LLM rate limiter on startup and close them on shutdown.
+    """
+    if LLM_CACHE_PATH:
+        init_llm_cache(LLM_CACHE_PATH, max_entries=LLM_CACHE_MAX_ENTRIES, ttl=LLM_CACHE_TTL)
+    if LLM_REQUESTS_PER_MINUTE > 0 or LLM_TOKENS_PER_MINUTE > 0:
+        # tiktoken may download the encoding, so keep it off the event loop
+        await asyncio.to_thread(load_token_encoding, LLM_TOKEN_ENCODING)
+        init_rate_limiter(
+            requests_per_minute=LLM_REQUESTS_PER_MINUTE,
+            tokens_per_minute=LLM_TOKENS_PER_MINUTE,
+            burst_seconds=LLM_RATE_LIMIT_BURST_SECONDS,
+            completion_tokens=LLM_COMPLETION_TOKENS
+        )
+    
+    if GRAPH_BACKEND == "memory":
+        print("Using in-memory graph store; data is not persisted")
+        init_graph_store(IndexedGraphStore(
+            InMemoryGraphStore(), max_age=GRAPH_VIEW_MAX_AGE, max_entries=GRAPH_VIEW_MAX_ENTRIES
+        ))
+        init_job_queue(ANALYSIS_JOB_WORKERS, ANALYSIS_JOB_MAX_QUEUED, ANALYSIS_JOB_RETENTION, ANALYSIS_JOB_MAX_EVENTS)
+        try:
+            yield
+        finally:
+            await close_job_queue()
+            close_llm_cache()
+            close_rate_limiter()
+            await close_graph_store()
+        return
+
+    print("Creating shared Neo4j connection pool...")
+    manager = init_neo4j_manager(
+        NEO4J_URI,
+        NEO4J_USERNAME,
+        NEO4J_PASSWORD,
+        max_connection_pool_size=NEO4J_MAX_CONNECTION_POOL_SIZE,
+        connection_acquisition_timeout=NEO4J_CONNECTION_ACQUISITION_TIMEOUT,
+        liveness_check_timeout=NEO4J_LIVENESS_CHECK_TIMEOUT,
+        max_connection_lifetime=NEO4J_MAX_CONNECTION_LIFETIME,
+        database_cache_ttl=NEO4J_DATABASE_CACHE_TTL,
+        transaction_retry_deadline=NEO4J_TRANSACTION_RETRY_DEADLINE,
+        tenancy_mode=GRAPH_TENANCY_MODE,
+        shared_database=NEO4J_SHARED_DATABASE
+    )
+    init_graph_store(IndexedGraphStore(
+        Neo4jGraphStore(manager, write_batch_size=GRAPH_WRITE_BATCH_SIZE),
+        max_age=GRAPH_VIEW_MAX_AGE,
+        max_entries=GRAPH_VIEW_MAX_ENTRIES
+    ))
+    init_job_queue(ANALYSIS_JOB_WORKERS, ANALYSIS_JOB_MAX_QUEUED, ANALYSIS_JOB_RETENTION, ANALYSIS_JOB_MAX_EVENTS)
+    try:
+        yield
+    finally:
+        # Jobs still running write through the graph store, so stop them first
+        await close_job_queue()
+        close_llm_cache()
+        close_rate_limiter()
+        await close_graph_store()
+        print("Closing shared Neo4j connection pool...")
+        await close_neo4j_manager()
 
 # Initialize FastAPI app
 app = FastAPI(
+    lifespan=lifespan,
     swagger_ui_parameters={"syntaxHighlight.theme": "obsidian"},
     title="Team and Document Analysis API",
     description="API for processing documents and analyzing team roles with Neo4j integration",
     version="1.0.0"
 )
 
+# Cache for workspace reads keyed on the change version stored with each workspace
+read_cache = WorkspaceReadCache(max_entries=READ_CACHE_MAX_ENTRIES)
+
+HTTP_REQUEST_DURATION = REGISTRY.histogram(
+    "http_request_duration_seconds",
+    "Request latency by route template",
+    ["method", "route", "status"]
+)
+
+def collect_sessions():
+    """
+    Report Neo4j sessions held through the manager at scrape time.
+    """
+    if GRAPH_BACKEND != "neo4j":
+        return
+    snapshot = get_neo4j_manager().session_metrics.snapshot()
+    yield "neo4j_sessions_in_use", {}, snapshot["in_use"]
+
+def collect_session_acquisitions():
+    """
+    Report session acquisitions and acquisition timeouts at scrape time.
+    """
+    if GRAPH_BACKEND != "neo4j":
+        return
+    snapshot = get_neo4j_manager().session_metrics.snapshot()
+    yield "neo4j_session_acquisitions_total", {"outcome": "acquired"}, snapshot["acquisitions"]
+    yield "neo4j_session_acquisitions_total", {"outcome": "timeout"}, snapshot["acquisition_timeouts"]
+
+def collect_read_cache():
+    """
+    Report read cache lookups at scrape time.
+    """
+    stats = read_cache.stats()
+    yield "read_cache_lookups_total", {"result": "hit"}, stats["hits"]
+    yield "read_cache_lookups_total", {"result": "miss"}, stats["misses"]
+
+def collect_llm_cache():
+    """
+    Report the LLM cache size at scrape time.
+    """
+    cache = get_llm_cache()
+    if cache is not None:
+        yield "llm_cache_entries", {}, cache.stats()["entries"] or 0
+
+def collect_rate_limiter():
+    """
+    Report the share of the LLM quota currently used by the rate limiter.
+    """
+    limiter = get_rate_limiter()
+    if limiter is not None:
+        yield "llm_rate_limit_scale", {}, limiter.stats()["scale"]
+
+def collect_jobs():
+    """
+    Report background jobs by status at scrape time.
+    """
+    for status, count in get_job_queue().stats()["jobs"].items():
+        yield "analysis_jobs", {"status": status}, count
+
+REGISTRY.add_collector("neo4j_sessions_in_use", "gauge", "Neo4j sessions currently held through the manager", collect_sessions)
+REGISTRY.add_collector("neo4j_session_acquisitions_total", "counter", "Neo4j session acquisitions by outcome", collect_session_acquisitions)
+REGISTRY.add_collector("read_cache_lookups_total", "counter", "Workspace read cache lookups by result", collect_read_cache)
+REGISTRY.add_collector("llm_cache_entries", "gauge", "Responses stored in the LLM cache", collect_llm_cache)
+REGISTRY.add_collector("llm_rate_limit_scale", "gauge", "Fraction of the LLM quota the rate limiter allows after 429 responses", collect_rate_limiter)
+REGISTRY.add_collector("analysis_jobs", "gauge", "Background analysis jobs kept in memory by status", collect_jobs)
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """
+    Record the latency of every request under its route template.
+    
+    Streaming responses are timed until their headers are sent.
+    """
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Route templates keep label cardinality bounded, unlike raw paths
+        route = request.scope.get("route")
+        HTTP_REQUEST_DURATION.observe(
+            time.perf_counter() - started,
+            method=request.method,
+            route=getattr(route, "path", "unmatched"),
+            status=status
+        )
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -45,24 +241,173 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+def split_query_values(value: Optional[str]) -> List[str]:
+    """
+    Split a comma-separated query parameter into its non-empty values.
+    
+    Args:
+        value (Optional[str]): Raw query parameter
+        
+    Returns:
+        List[str]: Individual values
+    """
+    if not value:
+        return []
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+def require_neo4j_manager() -> AsyncNeo4jManager:
+    """
+    Return the Neo4j manager for endpoints that only the Neo4j backend supports.
+    
+    Returns:
+        AsyncNeo4jManager: Shared manager
+        
+    Raises:
+        HTTPException: 501 when another graph backend is configured
+    """
+    if GRAPH_BACKEND != "neo4j":
+        raise HTTPException(
+            status_code=501,
+            detail=f"Not supported by the '{GRAPH_BACKEND}' graph backend"
+        )
+    return get_neo4j_manager()
+
+async def workspace_version(workspace_id: str) -> str:
+    """
+    Read the stored change version of a workspace for read caching and ETags.
+    
+    The version lives with the graph, so it is the same in every worker and
+    replica and moves with writes made by any of them. The price is that
+    every cached read, hit or not, first runs init_database (a registry
+    lookup once the database is known) and one indexed ChangeClock read.
+    
+    Args:
+        workspace_id (str): Workspace identifier
+        
+    Returns:
+        str: Version token
+    """
+    epoch, seq = await get_graph_store().change_version(workspace_id)
+    return f"{epoch}-{seq}"
+
+def not_modified_response(request: Request, etag: str) -> Optional[Response]:
+    """
+    Answer a conditional GET whose If-None-Match already names the current ETag.
+    
+    Args:
+        request (Request): Incoming request
+        etag (str): Current ETag of the requested read
+        
+    Returns:
+        Optional[Response]: 304 response, or None when the body must be sent
+    """
+    if read_cache.check_not_modified(etag, request.headers.get("if-none-match")):
+        return Response(status_code=304, headers={"ETag": etag})
+    return None
+
+async def run_analysis(
+    workspace_id: str,
+    team_dict: Dict[str, Any],
+    file_paths: List[str],
+    progress: AnalysisProgress
+) -> Dict[str, Any]:
+    """
+    Run the analysis pipeline on saved files and write the result to the graph.
+    
+    Args:
+        workspace_id (str): Workspace identifier
+        team_dict (Dict[str, Any]): Member details keyed by member name
+        file_paths (List[str]): Saved uploads
+        progress (AnalysisProgress): Receives pipeline events
+        
+    Returns:
+        Dict[str, Any]: Details of the ProcessingResponse
+    """
+    # Initialize components
+    print("Initializing LLM model...")
+    llm = get_llm()
+    
+    print("Processing documents...")
+    progress("stage", {"stage": "loading"})
+    current_roles = [member["current_role"] for member in team_dict.values()]
+    if DOCUMENT_EXTRACTION_CONCURRENCY > 1:
+        document_analysis = await process_documents_async(
+            document_paths=file_paths,
+            current_roles=current_roles,
+            progress=progress,
+            max_concurrency=DOCUMENT_EXTRACTION_CONCURRENCY
+        )
+    else:
+        document_analysis = await asyncio.to_thread(
+            process_documents,
+            document_paths=file_paths,
+            current_roles=current_roles,
+            progress=progress
+        )
+    
+    print("Analyzing team roles...")
+    progress("stage", {"stage": "team"})
+    if TEAM_ANALYSIS_CONCURRENCY > 1:
+        team_analysis = await analyze_team_roles_async(
+            team_dict, llm, progress=progress, max_concurrency=TEAM_ANALYSIS_CONCURRENCY
+        )
+    else:
+        team_analysis = await asyncio.to_thread(analyze_team_roles, team_dict, llm, progress=progress)
+    
+    graph_store = get_graph_store()
+    
+    # Write workspace, roles, tasks and members in one transaction
+    print("Writing analysis graph...")
+    progress("stage", {"stage": "writing"})
+    write_summary = await graph_store.write_analysis_graph(
+        workspace_id,
+        document_analysis,
+        team_analysis,
+        team_dict,
+        document_count=len(file_paths),
+        progress=progress
+    )
+    progress("graph_written", {"summary": write_summary})
+    timings = progress.timings()
+    print(f"Analysis of {workspace_id} took {timings['total']}s: {timings['stages']}")
+    
+    # Get graph statistics
+    stats = await graph_store.get_graph_statistics(workspace_id)
+    
+    return {
+        "document_analysis_summary": document_analysis.get("_processing_summary", {}),
+        "document_outcomes": progress.document_outcomes(),
+        "timings": timings,
+        "team_members_processed": len(team_analysis),
+        "team_members_failed": [name for name in team_dict if name not in team_analysis],
+        "graph_write_summary": write_summary,
+        "graph_statistics": stats
+    }
+
 @app.post("/analyze", response_model=ProcessingResponse)
 async def analyze_documents_and_team(
+    response: Response,
     workspace_id: str = Form(...),
     team_details: str = Form(...),
-    files: List[UploadFile] = File(...)
+    files: List[UploadFile] = File(...),
+    background: bool = Query(False, description="Queue the analysis as a background job and return its ID right away")
 ):
     """
     Process documents and team analysis, storing results in Neo4j.
     
+    With background=true the uploads are saved and the analysis is queued;
+    the response (202) carries the job ID to poll at /jobs/{job_id}.
+    
     Args:
+        response (Response): Outgoing response, for the 202 status
         workspace_id (str): Unique identifier for the workspace
         team_details (str): JSON string containing team members information
         files (List[UploadFile]): List of documents to analyze
+        background (bool): Run as a background job
         
     Returns:
-        ProcessingResponse: Analysis results and status
+        ProcessingResponse: Analysis results and status, or the queued job
     """
-    neo4j_manager = None
     try:
         # Parse and validate team details
         try:
@@ -92,171 +437,207 @@ async def analyze_documents_and_team(
         # Save uploaded files
         file_paths, temp_dir = save_upload_files(files)
         
-        try:
-            # Initialize components
-            print("Initializing LLM model...")
-            llm = get_llm()
-            
-            print("Processing documents...")
-            document_analysis = process_documents(
-                document_paths=file_paths,
-                current_roles=[member["current_role"] for member in team_dict.values()]
-            )
-            
-            print("Analyzing team roles...")
-            team_analysis = analyze_team_roles(team_dict, llm)
+        if background:
+            async def run_job(job: Job) -> Dict[str, Any]:
+                return await run_analysis(
+                    workspace_id, team_dict, file_paths, AnalysisProgress(job, document_count=len(file_paths))
+                )
             
-            # Initialize Neo4j
             try:
-                print(f"Initializing database connection for {workspace_id}...")
-                neo4j_manager = create_neo4j_manager(NEO4J_URI, NEO4J_USERNAME, NEO4J_PASSWORD)
-                db_name = neo4j_manager.init_database(workspace_id)
-                
-                # Create workspace node
-                print("Creating workspace node...")
-                create_node(neo4j_manager, db_name, "Workspace", {
-                    "name": workspace_id,
-                    "type": "workspace",
-                    "created_at": datetime.now().isoformat(),
-                    "document_count": len(file_paths),
-                    "team_size": len(team_dict)
-                })
-                
-                # Process roles and tasks
-                print("Processing roles and tasks...")
-                for role, tasks in document_analysis.items():
-                    if role != "_processing_summary":
-                        # Create role node
-                        create_node(neo4j_manager, db_name, "Role", {
-                            "name": role,
-                            "type": "role",
-                            "task_count": len(tasks)
-                        })
-                        
-                        # Link role to workspace
-                        create_relationship(
-                            neo4j_manager,
-                            db_name,
-                            "Workspace", workspace_id,
-                            "Role", role,
-                            "CONTAINS_ROLE"
-                        )
-                        
-                        # Create and link tasks
-                        for task in tasks:
-                            create_node(neo4j_manager, db_name, "Task", {
-                                "name": task,
-                                "type": "task",
-                                "status": "pending",
-                                "priority": "medium",
-                                "estimated_hours": 0
-                            })
-                            create_relationship(
-                                neo4j_manager,
-                                db_name,
-                                "Role", role,
-                                "Task", task,
-                                "HAS_TASK"
-                            )
-                
-                # Process team members
-                print("Processing team members...")
-                for member_name, possible_roles in team_analysis.items():
-                    # Create person node
-                    create_node(neo4j_manager, db_name, "Person", {
-                        "name": member_name,
-                        "type": "person",
-                        "details": json.dumps(team_dict[member_name]),
-                        "role_count": len(possible_roles)
-                    })
-                    
-                    # Link person to workspace
-                    create_relationship(
-                        neo4j_manager,
-                        db_name,
-                        "Workspace", workspace_id,
-                        "Person", member_name,
-                        "HAS_MEMBER"
-                    )
-                    
-                    # Link person to roles
-                    for role in possible_roles:
-                        if role in document_analysis:
-                            create_relationship(
-                                neo4j_manager,
-                                db_name,
-                                "Person", member_name,
-                                "Role", role,
-                                "CAN_PERFORM"
-                            )
-                
-                # Get graph statistics
-                stats = get_graph_statistics(neo4j_manager, db_name, workspace_id)
-                
-                return ProcessingResponse(
-                    status="success",
-                    message="Analysis completed successfully",
-                    details={
-                        "document_analysis_summary": document_analysis.get("_processing_summary", {}),
-                        "team_members_processed": len(team_analysis),
-                        "graph_statistics": stats
-                    }
-                )
+                # The job owns the saved files from here on, even if it is cancelled before it starts
+                job = get_job_queue().submit("analyze", workspace_id, run_job, cleanup=lambda: cleanup_temp_files(temp_dir))
+            except JobQueueFull as e:
+                cleanup_temp_files(temp_dir)
+                raise HTTPException(status_code=503, detail=f"Analysis queue is full: {str(e)}")
             
-            finally:
-                if neo4j_manager:
-                    neo4j_manager.close()
-                    
+            response.status_code = 202
+            return ProcessingResponse(
+                status="queued",
+                message="Analysis queued",
+                details={"job_id": job.job_id, "status_url": f"/jobs/{job.job_id}"}
+            )
+        
+        try:
+            details = await run_analysis(
+                workspace_id, team_dict, file_paths, AnalysisProgress(document_count=len(file_paths))
+            )
+            return ProcessingResponse(
+                status="success",
+                message="Analysis completed successfully",
+                details=details
+            )
         finally:
             cleanup_temp_files(temp_dir)
             
+    except HTTPException:
+        raise
     except Exception as e:
-        if neo4j_manager:
-            neo4j_manager.close()
         raise HTTPException(
             status_code=500,
             detail=f"Processing failed: {str(e)}"
         )
 
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str) -> Dict[str, Any]:
+    """
+    Get the state of a background job.
+    
+    Args:
+        job_id (str): Job identifier returned by /analyze?background=true
+        
+    Returns:
+        Dict[str, Any]: Status, stage, percent, progress details (e.g. per-document
+        outcomes), and the result or error once finished
+    """
+    job = get_job_queue().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job.to_dict()
+
+@app.get("/jobs/{job_id}/events")
+async def stream_job_events(
+    job_id: str,
+    request: Request,
+    after: int = Query(0, ge=0, description="Only send events with a higher sequence number")
+) -> StreamingResponse:
+    """
+    Stream the progress events of a background job as they happen.
+    
+    Sent as server-sent events, or as newline-delimited JSON when the Accept
+    header asks for application/x-ndjson. Past events are replayed first, so
+    a client can connect at any time; EventSource reconnects resume from the
+    Last-Event-ID header. The stream ends with the "finished" event.
+    
+    Each event is {"seq", "event", "at", "data"}; the data of pipeline events
+    carries the stage, percent, seconds elapsed since the analysis started
+    and, for loaded documents, processed pages, analysed members and written
+    graph batches, the duration of that step.
+    
+    Args:
+        job_id (str): Job identifier
+        request (Request): Incoming request, for the Accept and Last-Event-ID headers
+        after (int): Last sequence number already seen
+        
+    Returns:
+        StreamingResponse: text/event-stream or application/x-ndjson
+    """
+    job = get_job_queue().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    
+    last_event_id = request.headers.get("last-event-id", "")
+    if last_event_id.isdigit():
+        after = max(after, int(last_event_id))
+    ndjson = "application/x-ndjson" in request.headers.get("accept", "")
+    
+    async def encode_events():
+        async for event in job.stream_events(after):
+            if ndjson:
+                if event is not None:
+                    yield dumps_json(event) + b"\n"
+            elif event is None:
+                # Comment line, keeps proxies from closing an idle stream
+                yield b": keep-alive\n\n"
+            else:
+                yield (
+                    f"id: {event['seq']}\nevent: {event['event']}\ndata: ".encode("utf-8")
+                    + dumps_json(event) + b"\n\n"
+                )
+    
+    return StreamingResponse(
+        encode_events(),
+        media_type="application/x-ndjson" if ndjson else "text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str) -> Dict[str, Any]:
+    """
+    Cancel a queued or running background job.
+    
+    Args:
+        job_id (str): Job identifier
+        
+    Returns:
+        Dict[str, Any]: Job state; finished jobs are returned unchanged
+    """
+    job = get_job_queue().cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job.to_dict()
+
 @app.get("/workspace/{workspace_id}/tasks")
-async def get_tasks(workspace_id: str) -> Dict[str, List[Dict[str, Any]]]:
+async def get_tasks(
+    request: Request,
+    response: Response,
+    workspace_id: str,
+    split: bool = Query(False, description="Separate assigned tasks from tasks the member is eligible for")
+) -> Dict[str, Any]:
     """
     Get distributed tasks for each team member in the workspace.
     
     Args:
+        request (Request): Incoming request, for If-None-Match
+        response (Response): Outgoing response, for the ETag
         workspace_id (str): Workspace identifier
+        split (bool): Return {"assigned": [...], "eligible": [...]} per member
         
     Returns:
-        Dict[str, List[Dict[str, Any]]]: Tasks grouped by team member
+        Dict[str, Any]: Tasks grouped by team member
     """
-    neo4j_manager = None
-    try:
-        neo4j_manager = create_neo4j_manager(NEO4J_URI, NEO4J_USERNAME, NEO4J_PASSWORD)
-        db_name = neo4j_manager.init_database(workspace_id)
-        return get_workspace_tasks(neo4j_manager, db_name, workspace_id)
-    finally:
-        if neo4j_manager:
-            neo4j_manager.close()
+    graph_store = get_graph_store()
+    
+    version = await workspace_version(workspace_id)
+    etag = read_cache.etag(version, "tasks", split)
+    not_modified = not_modified_response(request, etag)
+    if not_modified:
+        return not_modified
+    response.headers["ETag"] = etag
+    
+    async def load_tasks():
+        return await graph_store.get_workspace_tasks(workspace_id, split=split)
+    
+    return await read_cache.get_or_load(workspace_key(workspace_id), version, "tasks", load_tasks, params=split)
 
 @app.get("/workspace/{workspace_id}/statistics", response_model=Dict[str, Any])
-async def get_workspace_statistics(workspace_id: str) -> Dict[str, Any]:
+async def get_workspace_statistics(
+    request: Request,
+    response: Response,
+    workspace_id: str,
+    recompute: bool = Query(False, description="Rebuild the counters from a full scan of the graph")
+) -> Dict[str, Any]:
     """
     Get statistics about the workspace.
     
     Args:
+        request (Request): Incoming request, for If-None-Match
+        response (Response): Outgoing response, for the ETag
         workspace_id (str): Workspace identifier
+        recompute (bool): Reconcile maintained counters with the stored graph
         
     Returns:
         Dict[str, Any]: Workspace statistics
     """
-    neo4j_manager = None
-    try:
-        neo4j_manager = create_neo4j_manager(NEO4J_URI, NEO4J_USERNAME, NEO4J_PASSWORD)
-        db_name = neo4j_manager.init_database(workspace_id)
-        return get_graph_statistics(neo4j_manager, db_name, workspace_id)
-    finally:
-        if neo4j_manager:
-            neo4j_manager.close()
+    graph_store = get_graph_store()
+    
+    if recompute:
+        # Retire the version the drifted counters were served under, in every worker
+        await graph_store.force_resync(workspace_id)
+        statistics = await graph_store.get_graph_statistics(workspace_id, recompute=True)
+        response.headers["ETag"] = read_cache.etag(await workspace_version(workspace_id), "statistics")
+        return statistics
+    
+    version = await workspace_version(workspace_id)
+    etag = read_cache.etag(version, "statistics")
+    not_modified = not_modified_response(request, etag)
+    if not_modified:
+        return not_modified
+    response.headers["ETag"] = etag
+    
+    async def load_statistics():
+        return await graph_store.get_graph_statistics(workspace_id)
+    
+    return await read_cache.get_or_load(workspace_key(workspace_id), version, "statistics", load_statistics)
 
 @app.put("/workspace/{workspace_id}/node", response_model=ProcessingResponse)
 async def update_node_properties(
@@ -273,14 +654,10 @@ async def update_node_properties(
     Returns:
         ProcessingResponse: Update status
     """
-    neo4j_manager = None
+    graph_store = get_graph_store()
     try:
-        neo4j_manager = create_neo4j_manager(NEO4J_URI, NEO4J_USERNAME, NEO4J_PASSWORD)
-        db_name = neo4j_manager.init_database(workspace_id)
-        
-        success = update_node_by_id(
-            neo4j_manager,
-            db_name,
+        success = await graph_store.update_node(
+            workspace_id,
             int(update_data.node_id),
             update_data.new_properties
         )
@@ -305,9 +682,6 @@ async def update_node_properties(
             status_code=500,
             detail=f"Error updating node: {str(e)}"
         )
-    finally:
-        if neo4j_manager:
-            neo4j_manager.close()
 
 @app.delete("/workspace/{workspace_id}/node/{node_id}")
 async def delete_node_endpoint(
@@ -324,35 +698,16 @@ async def delete_node_endpoint(
     Returns:
         ProcessingResponse: Deletion status
     """
-    neo4j_manager = None
+    graph_store = get_graph_store()
     try:
         print(f"Deleting node {node_id} from workspace {workspace_id}")
-        neo4j_manager = create_neo4j_manager(NEO4J_URI, NEO4J_USERNAME, NEO4J_PASSWORD)
-        db_name = neo4j_manager.init_database(workspace_id)
-        
-        # ตรวจสอบว่า node มีอยู่จริงก่อนลบ
-        check_query = """
-        MATCH (n) 
-        WHERE ID(n) = $node_id
-        RETURN n
-        """
-        
-        result = neo4j_manager.execute_with_retry(db_name, check_query, {"node_id": node_id})
-        if not result['data']:
+        
+        if not await graph_store.delete_node(workspace_id, node_id):
             raise HTTPException(
                 status_code=404,
                 detail=f"Node with ID {node_id} not found"
             )
         
-        # ลบ node และ relationships ที่เกี่ยวข้อง
-        delete_query = """
-        MATCH (n)
-        WHERE ID(n) = $node_id
-        DETACH DELETE n
-        """
-        
-        neo4j_manager.execute_with_retry(db_name, delete_query, {"node_id": node_id})
-        
         return ProcessingResponse(
             status="success",
             message=f"Node {node_id} deleted successfully",
@@ -371,9 +726,16 @@ async def delete_node_endpoint(
             status_code=500,
             detail=f"Error deleting node: {str(e)}"
         )
-    finally:
-        if neo4j_manager:
-            neo4j_manager.close()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics() -> PlainTextResponse:
+    """
+    Expose query, LLM, request, pool and cache metrics in the Prometheus text format.
+    
+    Returns:
+        PlainTextResponse: Text exposition format
+    """
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
 @app.get("/health", response_model=ProcessingResponse)
 async def health_check():
@@ -383,10 +745,12 @@ async def health_check():
     Returns:
         ProcessingResponse: Health status
     """
+    session_status = {}
     try:
-        # Try to create a Neo4j connection
-        neo4j_manager = create_neo4j_manager(NEO4J_URI, NEO4J_USERNAME, NEO4J_PASSWORD)
-        neo4j_manager.close()
+        # Check the shared connection pool instead of opening a new driver
+        await get_graph_store().verify_connectivity()
+        if GRAPH_BACKEND == "neo4j":
+            session_status = get_neo4j_manager().session_metrics.snapshot()
         db_status = "connected"
     except Exception as e:
         db_status = f"error: {str(e)}"
@@ -397,9 +761,17 @@ async def health_check():
         details={
             "version": "1.0.0",
             "timestamp": datetime.now().isoformat(),
+            "graph_backend": GRAPH_BACKEND,
             "database_status": db_status,
+            "neo4j_sessions": session_status,
+            "read_cache": read_cache.stats(),
+            "jobs": get_job_queue().stats(),
+            "llm_cache": get_llm_cache().stats() if get_llm_cache() else None,
+            "llm_rate_limiter": get_rate_limiter().stats() if get_rate_limiter() else None,
             "endpoints": [
                 "/analyze",
+                "/jobs/{job_id}",
+                "/jobs/{job_id}/events",
                 "/workspace/{workspace_id}/tasks",
                 "/workspace/{workspace_id}/statistics",
                 "/workspace/{workspace_id}/node",
@@ -418,68 +790,23 @@ async def add_task(
     estimated_hours: float = Form(0.0)
 ):
     """Add a new task to a role"""
-    neo4j_manager = None
+    graph_store = get_graph_store()
     try:
         print(f"Adding task: {task_name} for role: {role_name}")
-        neo4j_manager = create_neo4j_manager(NEO4J_URI, NEO4J_USERNAME, NEO4J_PASSWORD)
-        db_name = neo4j_manager.init_database(workspace_id)
-        
-        # Verify role exists
-        query = """
-        MATCH (r:Role {name: $role_name})
-        RETURN r
-        """
-        result = neo4j_manager.execute_with_retry(db_name, query, {"role_name": role_name})
-        if not result['data']:
-            raise HTTPException(
-                status_code=404,
-                detail=f"Role '{role_name}' not found in workspace"
-            )
         
-        # Create task node
         task_properties = {
-            "name": task_name,
-            "type": "task",
-            "status": "pending",
             "description": description or "",
             "priority": priority,
-            "estimated_hours": float(estimated_hours),
-            "created_at": datetime.now().isoformat()
+            "estimated_hours": float(estimated_hours)
         }
         
         print(f"Creating task with properties: {task_properties}")
-        task_result = neo4j_manager.execute_with_retry(
-            db_name,
-            """
-            CREATE (t:Task $properties)
-            RETURN ID(t) as id, t
-            """,
-            {"properties": task_properties}
-        )
-        
-        if not task_result['data']:
-            raise Exception("Failed to create task node")
-            
-        task_id = task_result['data'][0]['id']
-        
-        # Create relationship
-        rel_result = neo4j_manager.execute_with_retry(
-            db_name,
-            """
-            MATCH (r:Role {name: $role_name})
-            MATCH (t:Task) WHERE ID(t) = $task_id
-            CREATE (r)-[rel:HAS_TASK {created_at: $timestamp}]->(t)
-            RETURN rel
-            """,
-            {
-                "role_name": role_name,
-                "task_id": task_id,
-                "timestamp": task_properties["created_at"]
-            }
-        )
-        
-        if not rel_result['data']:
-            raise Exception("Failed to create relationship")
+        task = await graph_store.add_task_to_role(workspace_id, role_name, task_name, task_properties)
+        if task is None:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Role '{role_name}' not found in workspace"
+            )
         
         return ProcessingResponse(
             status="success",
@@ -487,8 +814,8 @@ async def add_task(
             details={
                 "task_name": task_name,
                 "role_name": role_name,
-                "node_id": task_id,
-                "properties": task_properties
+                "node_id": task["node_id"],
+                "properties": task["properties"]
             }
         )
         
@@ -500,91 +827,149 @@ async def add_task(
             status_code=500,
             detail=f"Error adding task: {str(e)}"
         )
-    finally:
-        if neo4j_manager:
-            neo4j_manager.close()
 
 @app.get("/workspace/{workspace_id}/graph")
-async def get_workspace_graph(workspace_id: str) -> Dict[str, Any]:
+async def get_workspace_graph(
+    request: Request,
+    workspace_id: str,
+    node_type: Optional[str] = Query(None, alias="type", description="Comma-separated node types"),
+    status: Optional[str] = Query(None, description="Comma-separated task statuses"),
+    priority: Optional[str] = Query(None, description="Comma-separated task priorities"),
+    assignee: Optional[str] = Query(None, description="Name of the assigned person"),
+    around: Optional[int] = Query(None, description="Node ID whose neighbourhood is returned"),
+    hops: int = Query(1, ge=1, le=3, description="Neighbourhood radius"),
+    after: Optional[int] = Query(None, description="Pagination cursor: return nodes with a greater ID"),
+    limit: Optional[int] = Query(None, ge=1, le=5000, description="Maximum nodes per page")
+) -> Response:
     """
-    Get the complete graph structure for visualization.
+    Get the graph structure for visualization, optionally filtered and paginated.
+    
+    The encoding follows the Accept header: application/json (default),
+    application/vnd.mindforge.columnar+json for one list per field without
+    the repeated properties, or application/msgpack for the columnar layout
+    in MessagePack.
     
     Args:
+        request (Request): Incoming request, for the Accept and If-None-Match headers
         workspace_id (str): Workspace identifier
+        node_type, status, priority, assignee: Node filters
+        around, hops: Restrict the graph to the neighbourhood of a node
+        after, limit: Keyset pagination on node ID
         
     Returns:
-        Dict[str, Any]: Graph nodes and edges
+        Response: Graph nodes, edges and the cursor of the next page
     """
-    neo4j_manager = None
-    try:
-        neo4j_manager = create_neo4j_manager(NEO4J_URI, NEO4J_USERNAME, NEO4J_PASSWORD)
-        db_name = neo4j_manager.init_database(workspace_id)
-        
-        query = """
-        MATCH (n)
-        OPTIONAL MATCH (n)-[r]->(m)
-        RETURN collect(distinct {
-            id: ID(n),
-            label: n.name,
-            type: n.type,
-            status: n.status,
-            priority: n.priority,
-            assignee: n.assignee,
-            created_at: n.created_at,
-            properties: properties(n)
-        }) as nodes,
-        collect(distinct {
-            id: ID(r),
-            from: ID(startNode(r)),
-            to: ID(endNode(r)),
-            type: type(r),
-            properties: properties(r)
-        }) as edges
-        """
-        
-        result = neo4j_manager.execute_with_retry(db_name, query)
-        data = result['data'][0]
-        
-        return {
-            "nodes": [node for node in data["nodes"] if node["id"] is not None],
-            "edges": [edge for edge in data["edges"] if edge["id"] is not None]
-        }
+    graph_store = get_graph_store()
+    
+    filters = GraphFilter(
+        node_types=split_query_values(node_type),
+        statuses=split_query_values(status),
+        priorities=split_query_values(priority),
+        assignee=assignee,
+        around=around,
+        hops=hops,
+        after=after,
+        limit=limit
+    )
+    
+    media_type = negotiate_graph_media_type(request.headers.get("accept"))
+    params = (media_type, node_type, status, priority, assignee, around, hops, after, limit)
+    
+    version = await workspace_version(workspace_id)
+    etag = read_cache.etag(version, "graph", params)
+    not_modified = not_modified_response(request, etag)
+    if not_modified:
+        not_modified.headers["Vary"] = "Accept"
+        return not_modified
+    
+    # The encoded body is cached, so repeated reads skip serialisation too
+    async def load_graph():
+        graph = await graph_store.query_workspace_graph(workspace_id, filters)
+        return encode_graph(graph, media_type)
+    
+    body = await read_cache.get_or_load(workspace_key(workspace_id), version, "graph", load_graph, params=params)
+    return Response(content=body, media_type=media_type, headers={"Vary": "Accept", "ETag": etag})
+
+@app.get("/workspace/{workspace_id}/graph/stream")
+async def stream_workspace_graph(workspace_id: str) -> StreamingResponse:
+    """
+    Stream the graph as newline-delimited JSON: every node, then every edge.
+    
+    Args:
+        workspace_id (str): Workspace identifier
         
-    finally:
-        if neo4j_manager:
-            neo4j_manager.close()
+    Returns:
+        StreamingResponse: One {"node": ...} or {"edge": ...} object per line,
+        followed by an {"end": ...} line with the totals
+    """
+    graph_store = get_graph_store()
+    
+    async def encode_lines():
+        async for item in graph_store.iter_workspace_graph(workspace_id):
+            yield dumps_json(item) + b"\n"
+    
+    return StreamingResponse(encode_lines(), media_type="application/x-ndjson")
+
+@app.get("/workspace/{workspace_id}/graph/changes")
+async def get_workspace_graph_changes(
+    workspace_id: str,
+    since: Optional[int] = Query(None, ge=0, description="Change version returned by the previous poll")
+) -> Dict[str, Any]:
+    """
+    Get the nodes and edges added, updated or deleted since a change version.
+    
+    Call without since to get the current version, then fetch the full graph
+    and poll with since=<version> from then on. Deletions are returned as
+    tombstones; when full_resync is true the client must refetch the graph.
+    
+    Args:
+        workspace_id (str): Workspace identifier
+        since (Optional[int]): Change version of the previous poll
+        
+    Returns:
+        Dict[str, Any]: Changed nodes and edges plus the version to poll from next
+    """
+    graph_store = get_graph_store()
+    
+    async def load_changes():
+        return await graph_store.get_graph_changes(workspace_id, since)
+    
+    version = await workspace_version(workspace_id)
+    return await read_cache.get_or_load(
+        workspace_key(workspace_id),
+        version,
+        "graph_changes",
+        load_changes,
+        params=since
+    )
 
 @app.get("/workspace/{workspace_id}/members")
-async def get_workspace_members(workspace_id: str) -> List[Dict[str, Any]]:
+async def get_workspace_members(request: Request, response: Response, workspace_id: str) -> List[Dict[str, Any]]:
     """
     Get all team members in the workspace.
     
     Args:
+        request (Request): Incoming request, for If-None-Match
+        response (Response): Outgoing response, for the ETag
         workspace_id (str): Workspace identifier
         
     Returns:
         List[Dict[str, Any]]: List of team members
     """
-    neo4j_manager = None
-    try:
-        neo4j_manager = create_neo4j_manager(NEO4J_URI, NEO4J_USERNAME, NEO4J_PASSWORD)
-        db_name = neo4j_manager.init_database(workspace_id)
-        
-        query = """
-        MATCH (p:Person)
-        RETURN collect({
-            name: p.name,
-            type: p.type,
-            details: p.details
-        }) as members
-        """
-        
-        result = neo4j_manager.execute_with_retry(db_name, query)
-        return result['data'][0]["members"]
-        
-    finally:
-        if neo4j_manager:
-            neo4j_manager.close()
+    graph_store = get_graph_store()
+    
+    version = await workspace_version(workspace_id)
+    etag = read_cache.etag(version, "members")
+    not_modified = not_modified_response(request, etag)
+    if not_modified:
+        return not_modified
+    response.headers["ETag"] = etag
+    
+    async def load_members():
+        return await graph_store.get_workspace_members(workspace_id)
+    
+    return await read_cache.get_or_load(workspace_key(workspace_id), version, "members", load_members)
+    
 
 @app.put("/workspace/{workspace_id}/node/{node_id}")
 async def update_node_details(
@@ -603,44 +988,18 @@ async def update_node_details(
     Returns:
         ProcessingResponse: Update status
     """
-    neo4j_manager = None
+    graph_store = get_graph_store()
     try:
-        neo4j_manager = create_neo4j_manager(NEO4J_URI, NEO4J_USERNAME, NEO4J_PASSWORD)
-        db_name = neo4j_manager.init_database(workspace_id)
-        
         # เพิ่ม timestamp การอัพเดต
         node_data['updated_at'] = datetime.now().isoformat()
         
         # ถ้ามีการ assign งาน ให้สร้าง relation ASSIGNED_TO
         if node_data.get('type') == 'Task' and node_data.get('assignee'):
-            # ลบ relation ASSIGNED_TO เดิม (ถ้ามี)
-            query_delete_assign = """
-            MATCH (t)-[r:ASSIGNED_TO]->()
-            WHERE ID(t) = $node_id
-            DELETE r
-            """
-            neo4j_manager.execute_with_retry(db_name, query_delete_assign, {"node_id": node_id})
-            
-            # สร้าง relation ใหม่
-            query_assign = """
-            MATCH (t), (p:Person {name: $assignee})
-            WHERE ID(t) = $node_id
-            CREATE (t)-[r:ASSIGNED_TO]->(p)
-            SET r.created_at = $timestamp
-            RETURN r
-            """
-            neo4j_manager.execute_with_retry(
-                db_name,
-                query_assign,
-                {
-                    "node_id": node_id,
-                    "assignee": node_data['assignee'],
-                    "timestamp": node_data['updated_at']
-                }
-            )
+            # แทนที่ relation ASSIGNED_TO เดิมด้วยอันใหม่ใน transaction เดียว
+            await graph_store.assign_task(workspace_id, node_id, node_data['assignee'])
         
         # อัพเดตข้อมูล node
-        success = update_node_by_id(neo4j_manager, db_name, node_id, node_data)
+        success = await graph_store.update_node(workspace_id, node_id, node_data)
         
         if success:
             return ProcessingResponse(
@@ -662,9 +1021,6 @@ async def update_node_details(
             status_code=500,
             detail=f"Error updating node: {str(e)}"
         )
-    finally:
-        if neo4j_manager:
-            neo4j_manager.close()
 
 @app.delete("/workspace/{workspace_id}/edge/{edge_id}")
 async def delete_edge(
@@ -681,20 +1037,9 @@ async def delete_edge(
     Returns:
         ProcessingResponse: Deletion status
     """
-    neo4j_manager = None
+    graph_store = get_graph_store()
     try:
-        neo4j_manager = create_neo4j_manager(NEO4J_URI, NEO4J_USERNAME, NEO4J_PASSWORD)
-        db_name = neo4j_manager.init_database(workspace_id)
-        
-        query = """
-        MATCH ()-[r]->()
-        WHERE ID(r) = $edge_id
-        DELETE r
-        """
-        
-        result = neo4j_manager.execute_with_retry(db_name, query, {"edge_id": edge_id})
-        
-        if result['summary'].counters.relationships_deleted > 0:
+        if await graph_store.delete_edge(workspace_id, edge_id):
             return ProcessingResponse(
                 status="success",
                 message=f"Edge deleted successfully",
@@ -711,9 +1056,46 @@ async def delete_edge(
             status_code=500,
             detail=f"Error deleting edge: {str(e)}"
         )
-    finally:
-        if neo4j_manager:
-            neo4j_manager.close()
+
+@app.post("/workspace/{workspace_id}/batch", response_model=ProcessingResponse)
+async def apply_batch(
+    workspace_id: str,
+    batch: GraphBatch
+) -> ProcessingResponse:
+    """
+    Apply many node updates, assignments and deletes in one request and one transaction.
+    
+    Args:
+        workspace_id (str): Workspace identifier
+        batch (GraphBatch): Mutations to apply
+        
+    Returns:
+        ProcessingResponse: Per-item results; status is "partial" when some
+        items referred to missing nodes or edges
+    """
+    neo4j_manager = require_neo4j_manager()
+    try:
+        db_name = await neo4j_manager.init_database(workspace_id)
+        results = await apply_graph_batch(neo4j_manager, db_name, workspace_id, batch, batch_size=GRAPH_WRITE_BATCH_SIZE)
+        
+        items = [item for section in results.values() for item in section]
+        applied = sum(1 for item in items if item["applied"])
+        return ProcessingResponse(
+            status="success" if applied == len(items) else "partial",
+            message=f"Applied {applied} of {len(items)} changes",
+            details={
+                "workspace_id": workspace_id,
+                "results": results,
+                "applied_at": datetime.now().isoformat()
+            }
+        )
+        
+    except Exception as e:
+        print(f"Error applying batch: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error applying batch: {str(e)}"
+        )
 
 if __name__ == "__main__":
     import uvicorn
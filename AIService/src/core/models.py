@@ -5,7 +5,10 @@
 '''
 
 from typing import Dict, List, Any, Optional
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
+
+# Properties the graph layer maintains itself; clients may not set them
+RESERVED_NODE_PROPERTIES = frozenset({"workspace_id", "change_seq", "created_seq"})
 
 class TeamMemberBase(BaseModel):
     '''
@@ -41,6 +44,78 @@ class NodeUpdate(BaseModel):
     node_name: str = Field(..., description="Name of the node")
     new_properties: Dict[str, Any] = Field(..., description="New properties for the node")
 
+class GraphFilter(BaseModel):
+    '''
+     Model for server-side graph filters and keyset pagination.
+
+     Attributes :
+        node_types (List[str])
+        statuses (List[str])
+        priorities (List[str])
+        assignee (Optional[str])
+        around (Optional[int])
+        hops (int)
+        after (Optional[int])
+        limit (Optional[int])
+    '''
+    node_types: List[str] = Field(default_factory=list, description="Node types to keep, e.g. task or role")
+    statuses: List[str] = Field(default_factory=list, description="Task statuses to keep")
+    priorities: List[str] = Field(default_factory=list, description="Task priorities to keep")
+    assignee: Optional[str] = Field(None, description="Keep only nodes assigned to this person")
+    around: Optional[int] = Field(None, description="Node ID whose neighbourhood is returned")
+    hops: int = Field(1, ge=1, le=3, description="Neighbourhood radius around the node")
+    after: Optional[int] = Field(None, description="Return only nodes with a greater ID (pagination cursor)")
+    limit: Optional[int] = Field(None, ge=1, le=5000, description="Maximum number of nodes per page")
+
+class NodePropertiesUpdate(BaseModel):
+    '''
+     Model for one node update inside a graph batch.
+
+     Attributes :
+        node_id (int)
+        properties (Dict[str, Any])
+    '''
+    node_id: int = Field(..., description="ID of the node to update")
+    properties: Dict[str, Any] = Field(..., description="Properties to set on the node")
+
+    @field_validator("properties")
+    @classmethod
+    def drop_reserved_properties(cls, properties: Dict[str, Any]) -> Dict[str, Any]:
+        '''
+         Drop workspace scoping and change tracking properties.
+
+         find : properties (Dict[str, Any])
+
+         Return : Dict[str, Any]
+        '''
+        return {key: value for key, value in properties.items() if key not in RESERVED_NODE_PROPERTIES}
+
+class TaskAssignment(BaseModel):
+    '''
+     Model for one task assignment inside a graph batch.
+
+     Attributes :
+        task_id (int)
+        assignee (str)
+    '''
+    task_id: int = Field(..., description="ID of the task node")
+    assignee: str = Field(..., description="Name of the person to assign")
+
+class GraphBatch(BaseModel):
+    '''
+     Model for a list of graph mutations applied in one transaction.
+
+     Attributes :
+        node_updates (List[NodePropertiesUpdate])
+        assignments (List[TaskAssignment])
+        node_deletes (List[int])
+        edge_deletes (List[int])
+    '''
+    node_updates: List[NodePropertiesUpdate] = Field(default_factory=list, description="Node property updates")
+    assignments: List[TaskAssignment] = Field(default_factory=list, description="Task assignments, replacing existing ones")
+    node_deletes: List[int] = Field(default_factory=list, description="IDs of nodes to delete with their relationships")
+    edge_deletes: List[int] = Field(default_factory=list, description="IDs of relationships to delete")
+
 class ProcessingResponse(BaseModel):
     '''
      Model for API response messages.
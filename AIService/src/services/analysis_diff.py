@@ -0,0 +1,215 @@
+'''
+ Analysis Diff Service Module is module compares a new analysis result with the analysis graph already stored for a workspace.
+
+ Author: Tanapat Chamted
+'''
+
+from typing import Dict, List, Any
+import json
+
+# Value of the source property on tasks written by /analyze and by users
+ANALYSIS_SOURCE = "analysis"
+USER_SOURCE = "user"
+
+def empty_snapshot() -> Dict[str, Any]:
+    '''
+     Return the snapshot of a workspace that has never been analysed.
+
+     A snapshot describes the analysis graph of a workspace by natural key:
+        workspace: ID of the Workspace node or None
+        roles: role name -> {"id", "task_count"}
+        tasks: (role name, task name) -> {"id", "source", "touched"}
+        people: person name -> {"id", "details", "role_count", "assigned"}
+        capabilities: (person name, role name) -> CAN_PERFORM edge ID
+
+     touched marks tasks a user has updated or assigned; assigned marks people
+     with assigned tasks. The first node seen for a key wins, so duplicates left
+     by older non-idempotent analyses are ignored rather than multiplied.
+
+     Return : Dict[str, Any]
+    '''
+    return {"workspace": None, "roles": {}, "tasks": {}, "people": {}, "capabilities": {}}
+
+def _unique(values: List[str]) -> List[str]:
+    '''
+     Drop repeated values, keeping the first occurrence.
+
+     find : values (List[str])
+
+     Return : List[str]
+    '''
+    return list(dict.fromkeys(values))
+
+def diff_analysis(
+    snapshot: Dict[str, Any],
+    document_analysis: Dict[str, Any],
+    team_analysis: Dict[str, List[str]],
+    team_details: Dict[str, Any]
+) -> Dict[str, Any]:
+    '''
+     Plan the writes that turn a stored analysis graph into a new analysis result.
+
+     Roles and people are matched by name and tasks by (role, task name), so an
+     unchanged analysis plans no writes. User work is never removed: tasks only
+     go away when they came from an analysis and were never updated or
+     assigned, roles only when none of their tasks stay, and people only when
+     nothing is assigned to them. Nodes that stay are left untouched apart from
+     the analysis properties (task_count, details, role_count) that changed.
+     Members of team_details missing from team_analysis could not be analysed:
+     they are kept with their stored role_count and CAN_PERFORM edges.
+
+     A role or task missing from an incomplete extraction may just sit on a
+     page that failed, so when the processing summary reports failed pages (or
+     a pipeline error) no roles or tasks are deleted, capabilities to roles
+     the extraction did not see are kept, and deletes_skipped is set.
+
+     find :
+        snapshot (Dict[str, Any]): Stored analysis graph, see empty_snapshot
+        document_analysis (Dict[str, Any]): Roles and tasks from process_documents
+        team_analysis (Dict[str, List[str]]): Possible roles per member from analyze_team_roles
+        team_details (Dict[str, Any]): Member details keyed by member name, analysed or not
+
+     Return : Dict[str, Any]: {"roles", "tasks", "people", "capabilities"} each with
+        create/update/delete lists (tasks also adopt), "totals" of the new analysis
+        and "deletes_skipped"
+    '''
+    processing = document_analysis.get("_processing_summary") or {}
+    complete = not processing.get("failed_documents") and "error" not in processing
+    roles = {
+        role: _unique(tasks)
+        for role, tasks in document_analysis.items()
+        if role != "_processing_summary"
+    }
+    wanted_tasks = {(role, task) for role, tasks in roles.items() for task in tasks}
+    wanted_capabilities = {
+        (member_name, role)
+        for member_name, possible_roles in team_analysis.items()
+        for role in possible_roles
+        if role in roles
+    }
+
+    stored_roles = snapshot["roles"]
+    stored_tasks = snapshot["tasks"]
+    stored_people = snapshot["people"]
+    stored_capabilities = snapshot["capabilities"]
+
+    task_plan = {
+        "create": [
+            {"role": role, "name": task}
+            for role, tasks in roles.items()
+            for task in tasks
+            if (role, task) not in stored_tasks
+        ],
+        # Tasks from before source was recorded that the analysis still produces
+        "adopt": [
+            stored_tasks[key]["id"]
+            for key in sorted(wanted_tasks & stored_tasks.keys())
+            if stored_tasks[key]["source"] is None
+        ],
+        "delete": [
+            task["id"]
+            for key, task in stored_tasks.items()
+            if complete and key not in wanted_tasks and task["source"] == ANALYSIS_SOURCE and not task["touched"]
+        ]
+    }
+    deleted_tasks = set(task_plan["delete"])
+    kept_task_roles = {role for (role, _), task in stored_tasks.items() if task["id"] not in deleted_tasks}
+
+    role_plan = {
+        "create": [
+            {"name": role, "type": "role", "task_count": len(tasks)}
+            for role, tasks in roles.items()
+            if role not in stored_roles
+        ],
+        "update": [
+            {"id": stored_roles[role]["id"], "task_count": len(tasks)}
+            for role, tasks in roles.items()
+            if role in stored_roles and stored_roles[role]["task_count"] != len(tasks)
+        ],
+        "delete": [
+            role["id"]
+            for name, role in stored_roles.items()
+            if complete and name not in roles and name not in kept_task_roles
+        ]
+    }
+
+    unanalysed = {member_name for member_name in team_details if member_name not in team_analysis}
+    person_rows = {
+        member_name: {
+            "name": member_name,
+            "type": "person",
+            "details": json.dumps(member_details),
+            "role_count": (
+                len(team_analysis[member_name]) if member_name not in unanalysed
+                else (stored_people.get(member_name) or {}).get("role_count") or 0
+            )
+        }
+        for member_name, member_details in team_details.items()
+    }
+    person_plan = {
+        "create": [row for name, row in person_rows.items() if name not in stored_people],
+        "update": [
+            {"id": stored_people[name]["id"], "details": row["details"], "role_count": row["role_count"]}
+            for name, row in person_rows.items()
+            if name in stored_people and (
+                stored_people[name]["details"] != row["details"]
+                or stored_people[name]["role_count"] != row["role_count"]
+            )
+        ],
+        "delete": [
+            person["id"]
+            for name, person in stored_people.items()
+            if name not in person_rows and not person["assigned"]
+        ]
+    }
+
+    # Edges of deleted nodes go with them, so only edges between kept nodes are planned
+    deleted_role_ids = set(role_plan["delete"])
+    deleted_person_ids = set(person_plan["delete"])
+    deleted_roles = {name for name, role in stored_roles.items() if role["id"] in deleted_role_ids}
+    deleted_people = {name for name, person in stored_people.items() if person["id"] in deleted_person_ids}
+    capability_plan = {
+        "create": [
+            {"person": person, "role": role}
+            for person, role in sorted(wanted_capabilities - stored_capabilities.keys())
+        ],
+        "delete": [
+            edge_id
+            for (person, role), edge_id in stored_capabilities.items()
+            if (person, role) not in wanted_capabilities and person not in unanalysed
+            and person not in deleted_people and role not in deleted_roles
+            and (complete or role in roles)
+        ]
+    }
+
+    return {
+        "roles": role_plan,
+        "tasks": task_plan,
+        "people": person_plan,
+        "capabilities": capability_plan,
+        "deletes_skipped": not complete,
+        "totals": {
+            "roles": len(roles),
+            "tasks": len(wanted_tasks),
+            "people": len(person_rows),
+            "capabilities": len(wanted_capabilities)
+        }
+    }
+
+def plan_summary(plan: Dict[str, Any]) -> Dict[str, int]:
+    '''
+     Summarise a plan as the totals of the new analysis plus how many roles,
+     tasks, people and capabilities it creates, updates and deletes, and
+     whether role and task deletes were skipped for an incomplete extraction.
+
+     find : plan (Dict[str, Any]): Result of diff_analysis
+
+     Return : Dict[str, int]
+    '''
+    kinds = ("roles", "tasks", "people", "capabilities")
+    summary = dict(plan["totals"])
+    summary["created"] = sum(len(plan[kind]["create"]) for kind in kinds)
+    summary["updated"] = sum(len(plan[kind].get("update", [])) for kind in kinds) + len(plan["tasks"]["adopt"])
+    summary["deleted"] = sum(len(plan[kind]["delete"]) for kind in kinds)
+    summary["deletes_skipped"] = plan["deletes_skipped"]
+    return summary
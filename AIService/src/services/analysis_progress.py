@@ -0,0 +1,178 @@
+'''
+ Analysis Progress Service Module is module turns the events reported by the analysis pipeline into a stage, a percentage and per-document outcomes.
+
+ Author: Tanapat Chamted
+'''
+
+from typing import Dict, Any, Optional, List
+import threading
+import time
+
+from src.services.job_queue import Job
+from src.utils.metrics import REGISTRY
+
+# Share of the overall percentage taken by each pipeline stage
+ANALYSIS_STAGES = {
+    "loading": (0.0, 10.0),
+    "extracting": (10.0, 70.0),
+    "team": (70.0, 90.0),
+    "writing": (90.0, 100.0)
+}
+
+ANALYSIS_STAGE_DURATION = REGISTRY.histogram(
+    "analysis_stage_duration_seconds",
+    "Time spent in each stage of an analysis run",
+    ["stage"],
+    buckets=(0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0)
+)
+
+class AnalysisProgress:
+    '''
+     Progress of one analysis run, optionally mirrored onto a background job.
+
+     The instance is the progress callback passed to process_documents,
+     analyze_team_roles and write_analysis_graph, which may call it from
+     worker threads. Every event is forwarded to the job's event stream with
+     the seconds elapsed since the run started; a stage_finished event with
+     its duration is added whenever the pipeline moves to the next stage.
+    '''
+    def __init__(self, job: Optional[Job] = None, document_count: int = 0):
+        '''
+         Initialize progress at the start of the loading stage.
+
+         find :
+            job (Optional[Job]): Job receiving stage, percent and document outcomes
+            document_count (int): Number of uploaded files
+        '''
+        self.job = job
+        self.document_count = document_count
+        self.stage = "loading"
+        self.percent = 0.0
+        self.documents: Dict[str, Dict[str, Any]] = {}
+        self.started = time.perf_counter()
+        self.stage_started = self.started
+        self.stage_durations: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def _stage_percent(self, stage: str, done: int, total: int) -> float:
+        '''
+         Return the overall percentage after done of total steps of a stage.
+
+         find :
+            stage (str)
+            done (int)
+            total (int)
+
+         Return : float
+        '''
+        start, end = ANALYSIS_STAGES[stage]
+        if total <= 0:
+            return start
+        return start + (end - start) * min(done, total) / total
+
+    def _enter_stage(self, stage: str, now: float) -> Optional[Dict[str, Any]]:
+        '''
+         Move to a stage, closing the timing of the current one.
+
+         find :
+            stage (str)
+            now (float): time.perf_counter() of the event
+
+         Return : Optional[Dict[str, Any]]: stage_finished event data, None when the stage is unchanged
+        '''
+        if stage == self.stage:
+            return None
+        finished = self._close_stage(now)
+        self.stage = stage
+        return finished
+
+    def _close_stage(self, now: float) -> Dict[str, Any]:
+        '''
+         Record the duration of the current stage and restart the stage clock.
+
+         find : now (float)
+
+         Return : Dict[str, Any]: stage_finished event data
+        '''
+        duration = now - self.stage_started
+        self.stage_started = now
+        self.stage_durations[self.stage] = self.stage_durations.get(self.stage, 0.0) + duration
+        ANALYSIS_STAGE_DURATION.observe(duration, stage=self.stage)
+        return {"stage": self.stage, "duration": round(duration, 3)}
+
+    def timings(self) -> Dict[str, Any]:
+        '''
+         Return the seconds spent so far, overall and per finished stage.
+
+         Return : Dict[str, Any]
+        '''
+        with self._lock:
+            return {
+                "total": round(time.perf_counter() - self.started, 3),
+                "stages": {stage: round(duration, 3) for stage, duration in self.stage_durations.items()}
+            }
+
+    def document_outcomes(self) -> List[Dict[str, Any]]:
+        '''
+         Return the outcome of every loaded document.
+
+         Return : List[Dict[str, Any]]
+        '''
+        with self._lock:
+            return [dict(document, document=name) for name, document in self.documents.items()]
+
+    def __call__(self, event: str, data: Dict[str, Any]) -> None:
+        '''
+         Apply one pipeline event.
+
+         Events: stage {stage}, document_loaded {document, pages, duration},
+         page_processed {document, index, completed, total, ok, duration}, member_analyzed
+         {member, index, completed, total, duration}, graph_batch_written {step, rows,
+         duration} and graph_written {summary}. Durations are in seconds.
+
+         find :
+            event (str)
+            data (Dict[str, Any])
+
+         Error : asyncio.CancelledError: The job was cancelled
+        '''
+        now = time.perf_counter()
+        finished_stage = None
+        with self._lock:
+            if event == "stage":
+                finished_stage = self._enter_stage(data["stage"], now)
+                self.percent = max(self.percent, ANALYSIS_STAGES[self.stage][0])
+            elif event == "document_loaded":
+                self.documents[data["document"]] = {
+                    "status": "loaded", "pages": data["pages"], "processed": 0, "failed": 0
+                }
+                self.percent = self._stage_percent("loading", len(self.documents), self.document_count)
+            elif event == "page_processed":
+                document = self.documents.setdefault(
+                    data["document"], {"status": "loaded", "pages": 0, "processed": 0, "failed": 0}
+                )
+                finished_stage = self._enter_stage("extracting", now)
+                document["processed" if data.get("ok") else "failed"] += 1
+                if document["processed"] + document["failed"] >= document["pages"]:
+                    if not document["failed"]:
+                        document["status"] = "processed"
+                    elif document["processed"]:
+                        document["status"] = "partial"
+                    else:
+                        document["status"] = "failed"
+                # Pages may finish out of order, so count completed pages rather than the page index
+                self.percent = max(self.percent, self._stage_percent("extracting", data.get("completed", data["index"]), data["total"]))
+            elif event == "member_analyzed":
+                finished_stage = self._enter_stage("team", now)
+                self.percent = max(self.percent, self._stage_percent("team", data.get("completed", data["index"]), data["total"]))
+            elif event == "graph_written":
+                self.percent = ANALYSIS_STAGES["writing"][1]
+                finished_stage = self._close_stage(now)
+            stage, percent = self.stage, self.percent
+        elapsed = round(now - self.started, 3)
+
+        if self.job is not None:
+            self.job.update(stage=stage, percent=percent, documents=self.document_outcomes())
+            if finished_stage is not None:
+                self.job.emit("stage_finished", dict(finished_stage, elapsed=elapsed))
+            self.job.emit(event, dict(data, stage=stage, percent=percent, elapsed=elapsed))
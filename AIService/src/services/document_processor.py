@@ -4,20 +4,62 @@
  Author: Kongpop Panchai
 '''
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Callable, Tuple
 from langchain_community.document_loaders import PyPDFLoader, TextLoader, UnstructuredMarkdownLoader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
+import asyncio
 import json
+import os
 import time
 from tenacity import retry, stop_after_attempt, wait_exponential
 
-def load_documents(file_paths: List[str]) -> List[Any]:
+from src.services.llm_service import invoke_cached, ainvoke_cached
+
+# Progress hook: called with an event name and its data, see analysis_progress
+ProgressCallback = Callable[[str, Dict[str, Any]], None]
+
+ROLE_EXTRACTION_TEMPLATE = """
+            <system>
+            You are a helpful assistant specializing in data extraction from documents.
+            </system>
+
+            <user>
+            Your task is to extract all roles mentioned in the given documents and their associated tasks.
+            Provide your answer as a JSON string where keys are roles and values are lists of tasks.
+            Only return the JSON string without any additional explanation or formatting.
+
+            Example format:
+            {{"Role1": ["Task1", "Task2", "Task3"], "Role2": ["Task1", "Task2"]}}
+
+            Ensure your output is a valid JSON string that can be parsed directly.
+            </user>
+
+            <query>
+            Role in my team: {myteam}
+            Extract all roles and their associated tasks from the following document:
+            {document_content}
+            </query>
+            """
+
+def document_name(source: str) -> str:
+    '''
+     Return the name a loaded document is reported under.
+
+     find : source (str): File path, or the source metadata of a loaded page
+
+     Return : str
+    '''
+    return os.path.basename(source)
+
+def load_documents(file_paths: List[str], progress: Optional[ProgressCallback] = None) -> List[Any]:
     '''
      Load documents from various file formats.
 
-     find : file_paths (List[str])
+     find :
+        file_paths (List[str])
+        progress (Optional[ProgressCallback]): Receives a document_loaded event per file
         
      Return : List[Any]
     '''
@@ -34,7 +76,15 @@ def load_documents(file_paths: List[str]) -> List[Any]:
         else:
             print(f"Unsupported file type: {file_path}")
             continue
-        documents.extend(loader.load())
+        started = time.perf_counter()
+        pages = loader.load()
+        documents.extend(pages)
+        if progress:
+            progress("document_loaded", {
+                "document": document_name(file_path),
+                "pages": len(pages),
+                "duration": round(time.perf_counter() - started, 3)
+            })
     print(f"Loaded {len(documents)} documents.")
     return documents
 
@@ -88,40 +138,70 @@ def process_single_document(
         Dict[str, List[str]]
     '''
     try:
-        prompt = ChatPromptTemplate.from_template(
-            template="""
-            <system>
-            You are a helpful assistant specializing in data extraction from documents.
-            </system>
-
-            <user>
-            Your task is to extract all roles mentioned in the given documents and their associated tasks.
-            Provide your answer as a JSON string where keys are roles and values are lists of tasks.
-            Only return the JSON string without any additional explanation or formatting.
-
-            Example format:
-            {{"Role1": ["Task1", "Task2", "Task3"], "Role2": ["Task1", "Task2"]}}
-
-            Ensure your output is a valid JSON string that can be parsed directly.
-            </user>
-
-            <query>
-            Role in my team: {myteam}
-            Extract all roles and their associated tasks from the following document:
-            {document_content}
-            </query>
-            """
+        prompt = ChatPromptTemplate.from_template(template=ROLE_EXTRACTION_TEMPLATE)
+        chain = prompt | llm | output_parser
+        
+        return invoke_cached(
+            "extract_roles_tasks",
+            chain,
+            llm,
+            ROLE_EXTRACTION_TEMPLATE,
+            {
+                "myteam": ", ".join(current_roles),
+                "document_content": doc_content
+            },
+            parse=json.loads,
+            request_delay=request_delay
         )
+    
+    except json.JSONDecodeError as e:
+        print(f"Error parsing JSON response: {e}")
+        raise
+    except Exception as e:
+        print(f"Error during document processing: {e}")
+        raise
 
-        chain = prompt | llm | output_parser
-        time.sleep(request_delay)
+@retry(
+    stop=stop_after_attempt(3),
+    wait=wait_exponential(multiplier=1, min=4, max=10),
+    retry_error_callback=lambda retry_state: {}
+)
+async def process_single_document_async(
+    doc_content: str,
+    current_roles: List[str],
+    llm: Any,
+    output_parser: Any,
+    request_delay: float = 1.0
+) -> Dict[str, List[str]]:
+    '''
+     Asynchronous version of process_single_document, calling the LLM with ainvoke.
+
+     find :
+        doc_content (str)
+        current_roles (List[str])
+        llm (Any)
+        output_parser (Any)
+        request_delay (float)
         
-        response = chain.invoke({
-            "myteam": ", ".join(current_roles),
-            "document_content": doc_content
-        })
+     Return :
+        Dict[str, List[str]]
+    '''
+    try:
+        prompt = ChatPromptTemplate.from_template(template=ROLE_EXTRACTION_TEMPLATE)
+        chain = prompt | llm | output_parser
         
-        return json.loads(response)
+        return await ainvoke_cached(
+            "extract_roles_tasks",
+            chain,
+            llm,
+            ROLE_EXTRACTION_TEMPLATE,
+            {
+                "myteam": ", ".join(current_roles),
+                "document_content": doc_content
+            },
+            parse=json.loads,
+            request_delay=request_delay
+        )
     
     except json.JSONDecodeError as e:
         print(f"Error parsing JSON response: {e}")
@@ -130,13 +210,100 @@ def process_single_document(
         print(f"Error during document processing: {e}")
         raise
 
+def _page_source(doc: Any) -> str:
+    '''
+     Return the source of a loaded page.
+
+     find : doc (Any)
+
+     Return : str
+    '''
+    return getattr(doc, 'metadata', {}).get('source', 'Unknown source')
+
+def _merge_page_results(roles_tasks_summary: Dict[str, Dict[str, None]], doc_results: Dict[str, List[str]]) -> None:
+    '''
+     Add the roles and tasks of one page to the summary.
+
+     Tasks are kept in dicts used as ordered sets, so merging pages in page
+     order always gives the same result.
+
+     find :
+        roles_tasks_summary (Dict[str, Dict[str, None]])
+        doc_results (Dict[str, List[str]])
+    '''
+    for role, tasks in doc_results.items():
+        roles_tasks_summary.setdefault(role, {}).update(dict.fromkeys(tasks))
+
+def _processing_result(
+    roles_tasks_summary: Dict[str, Dict[str, None]],
+    loaded_docs: List[Any],
+    failed_docs: List[Any],
+    settings: Dict[str, Any]
+) -> Dict[str, Any]:
+    '''
+     Build the result of process_documents.
+
+     failed_docs holds every page that raised or came back without roles
+     (the retries give up with {}), so failed_documents tells re-analysis
+     that the extraction is incomplete.
+
+     find :
+        roles_tasks_summary (Dict[str, Dict[str, None]])
+        loaded_docs (List[Any])
+        failed_docs (List[Any])
+        settings (Dict[str, Any])
+
+     Return : Dict[str, Any]
+    '''
+    if failed_docs:
+        print(f"\nFailed to process {len(failed_docs)} documents:")
+        for doc in failed_docs:
+            print(f"- Document: {_page_source(doc)}")
+    
+    result = {
+        role: list(tasks) 
+        for role, tasks in roles_tasks_summary.items()
+    }
+    
+    result['_processing_summary'] = {
+        'total_documents': len(loaded_docs),
+        'successful_documents': len(loaded_docs) - len(failed_docs),
+        'failed_documents': len(failed_docs),
+        'settings': settings
+    }
+    
+    return result
+
+def _failed_processing_result(document_paths: List[str], error: Exception, settings: Dict[str, Any]) -> Dict[str, Any]:
+    '''
+     Build the result of process_documents when the pipeline itself failed.
+
+     find :
+        document_paths (List[str])
+        error (Exception)
+        settings (Dict[str, Any])
+
+     Return : Dict[str, Any]
+    '''
+    print(f"Critical error in document processing pipeline: {error}")
+    return {
+        '_processing_summary': {
+            'error': str(error),
+            'total_documents': len(document_paths),
+            'successful_documents': 0,
+            'failed_documents': len(document_paths),
+            'settings': settings
+        }
+    }
+
 def process_documents(
     document_paths: List[str],
     current_roles: List[str],
     model_name: str = "llama-3.1-70b-versatile",
     temperature: float = 0.3,
     request_delay: float = 1.0,
-    max_retries: int = 3
+    max_retries: int = 3,
+    progress: Optional[ProgressCallback] = None
 ) -> Dict[str, List[str]]:
     '''
      Process multiple documents to extract roles and tasks.
@@ -148,9 +315,16 @@ def process_documents(
         temperature (float)
         request_delay (float)
         max_retries (int)
+        progress (Optional[ProgressCallback]): Receives document_loaded, stage and page_processed events
         
      Return : Dict[str, List[str]]
     '''
+    settings = {
+        'model': model_name,
+        'temperature': temperature,
+        'request_delay': request_delay,
+        'max_retries': max_retries
+    }
     try:
         from src.services.llm_service import get_llm
         
@@ -158,14 +332,23 @@ def process_documents(
         output_parser = StrOutputParser()
         
         print(f"Loading documents from {len(document_paths)} paths...")
-        loaded_docs = load_documents(document_paths)
+        loaded_docs = load_documents(document_paths, progress=progress)
         print(f"Loaded {len(loaded_docs)} documents successfully.")
+        if progress:
+            progress("stage", {"stage": "extracting"})
         
-        roles_tasks_summary = {}
+        roles_tasks_summary: Dict[str, Dict[str, None]] = {}
         failed_docs = []
         
         for i, doc in enumerate(loaded_docs, 1):
             print(f"\nProcessing document {i}/{len(loaded_docs)}...")
+            page_event = {
+                "document": document_name(_page_source(doc)),
+                "index": i,
+                "completed": i,
+                "total": len(loaded_docs)
+            }
+            started = time.perf_counter()
             try:
                 doc_results = process_single_document(
                     doc_content=doc.page_content,
@@ -175,54 +358,140 @@ def process_documents(
                     request_delay=request_delay
                 )
                 
-                print(f"Successfully processed document {i}")
-                for role, tasks in doc_results.items():
-                    if role not in roles_tasks_summary:
-                        roles_tasks_summary[role] = set()
-                    roles_tasks_summary[role].update(tasks)
+                _merge_page_results(roles_tasks_summary, doc_results)
+                # Retries that give up return {} instead of raising
+                page_event.update(ok=bool(doc_results), roles=len(doc_results))
+                if doc_results:
+                    print(f"Successfully processed document {i}")
+                else:
+                    print(f"No roles extracted from document {i}")
+                    failed_docs.append(doc)
                     
             except Exception as e:
                 print(f"Failed to process document {i} after retries: {e}")
                 failed_docs.append(doc)
-                continue
+                page_event.update(ok=False, error=str(e))
+            
+            # Includes the request delay and any retries
+            page_event["duration"] = round(time.perf_counter() - started, 3)
+            if progress:
+                progress("page_processed", page_event)
         
-        if failed_docs:
-            print(f"\nFailed to process {len(failed_docs)} documents:")
-            for doc in failed_docs:
-                print(f"- Document: {getattr(doc, 'metadata', {}).get('source', 'Unknown source')}")
+        return _processing_result(roles_tasks_summary, loaded_docs, failed_docs, settings)
         
-        result = {
-            role: list(tasks) 
-            for role, tasks in roles_tasks_summary.items()
-        }
+    except Exception as e:
+        return _failed_processing_result(document_paths, e, settings)
+
+async def process_documents_async(
+    document_paths: List[str],
+    current_roles: List[str],
+    model_name: str = "llama-3.1-70b-versatile",
+    temperature: float = 0.3,
+    request_delay: float = 1.0,
+    max_retries: int = 3,
+    progress: Optional[ProgressCallback] = None,
+    max_concurrency: int = 4
+) -> Dict[str, List[str]]:
+    '''
+     Process multiple documents with up to max_concurrency pages extracted at once.
+
+     Pages are extracted with ainvoke as slots free up, but their results are
+     merged in page order, so the output matches process_documents. Each page
+     keeps its own retries and request delay. page_processed events are sent
+     in completion order; their completed field counts finished pages.
+
+     find :
+        document_paths (List[str])
+        current_roles (List[str])
+        model_name (str)
+        temperature (float)
+        request_delay (float)
+        max_retries (int)
+        progress (Optional[ProgressCallback]): Receives document_loaded, stage and page_processed events
+        max_concurrency (int): Pages extracted at the same time
+        
+     Return : Dict[str, List[str]]
+    '''
+    settings = {
+        'model': model_name,
+        'temperature': temperature,
+        'request_delay': request_delay,
+        'max_retries': max_retries,
+        'max_concurrency': max_concurrency
+    }
+    try:
+        from src.services.llm_service import get_llm
         
-        result['_processing_summary'] = {
-            'total_documents': len(loaded_docs),
-            'successful_documents': len(loaded_docs) - len(failed_docs),
-            'failed_documents': len(failed_docs),
-            'settings': {
-                'model': model_name,
-                'temperature': temperature,
-                'request_delay': request_delay,
-                'max_retries': max_retries
+        llm = get_llm(model_name, temperature)
+        output_parser = StrOutputParser()
+        
+        print(f"Loading documents from {len(document_paths)} paths...")
+        loaded_docs = await asyncio.to_thread(load_documents, document_paths, progress)
+        print(f"Loaded {len(loaded_docs)} documents successfully.")
+        if progress:
+            progress("stage", {"stage": "extracting"})
+        
+        semaphore = asyncio.Semaphore(max(max_concurrency, 1))
+        completed = 0
+        
+        async def extract(i: int, doc: Any) -> Tuple[Optional[Dict[str, List[str]]], Optional[Exception]]:
+            nonlocal completed
+            async with semaphore:
+                print(f"\nProcessing document {i}/{len(loaded_docs)}...")
+                started = time.perf_counter()
+                try:
+                    doc_results = await process_single_document_async(
+                        doc_content=doc.page_content,
+                        current_roles=current_roles,
+                        llm=llm,
+                        output_parser=output_parser,
+                        request_delay=request_delay
+                    )
+                    outcome = (doc_results, None)
+                except Exception as e:
+                    outcome = (None, e)
+            
+            completed += 1
+            page_event = {
+                "document": document_name(_page_source(doc)),
+                "index": i,
+                "completed": completed,
+                "total": len(loaded_docs),
+                # Includes the request delay and any retries, not the wait for a slot
+                "duration": round(time.perf_counter() - started, 3)
             }
-        }
+            if outcome[1] is None:
+                # Retries that give up return {} instead of raising
+                page_event.update(ok=bool(outcome[0]), roles=len(outcome[0]))
+                if outcome[0]:
+                    print(f"Successfully processed document {i}")
+                else:
+                    print(f"No roles extracted from document {i}")
+            else:
+                print(f"Failed to process document {i} after retries: {outcome[1]}")
+                page_event.update(ok=False, error=str(outcome[1]))
+            if progress:
+                progress("page_processed", page_event)
+            return outcome
         
-        return result
+        tasks = [asyncio.ensure_future(extract(i, doc)) for i, doc in enumerate(loaded_docs, 1)]
+        try:
+            outcomes = await asyncio.gather(*tasks)
+        except BaseException:
+            # Cancellation (or a progress hook stopping the job) ends the other pages too
+            for task in tasks:
+                task.cancel()
+            raise
+        
+        roles_tasks_summary: Dict[str, Dict[str, None]] = {}
+        failed_docs = []
+        for doc, (doc_results, error) in zip(loaded_docs, outcomes):
+            if doc_results:
+                _merge_page_results(roles_tasks_summary, doc_results)
+            else:
+                failed_docs.append(doc)
+        
+        return _processing_result(roles_tasks_summary, loaded_docs, failed_docs, settings)
         
     except Exception as e:
-        print(f"Critical error in document processing pipeline: {e}")
-        return {
-            '_processing_summary': {
-                'error': str(e),
-                'total_documents': len(document_paths),
-                'successful_documents': 0,
-                'failed_documents': len(document_paths),
-                'settings': {
-                    'model': model_name,
-                    'temperature': temperature,
-                    'request_delay': request_delay,
-                    'max_retries': max_retries
-                }
-            }
-        }
\ No newline at end of file
+        return _failed_processing_result(document_paths, e, settings)
@@ -4,41 +4,587 @@
  Author: Tanapat Chamted
 '''
 
-from neo4j import GraphDatabase, Result
-from typing import Dict, Any, Optional, List, Union
+from neo4j import AsyncGraphDatabase, READ_ACCESS, WRITE_ACCESS
+from neo4j.exceptions import ClientError, Neo4jError
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Optional, List, Tuple, Union, Iterator, AsyncIterator, Callable, Awaitable
 import re
 import time
+import hashlib
 import json
-from datetime import datetime
+import asyncio
+import threading
+from datetime import datetime, timedelta
 
-class Neo4jManager:
+from src.core.models import GraphFilter, GraphBatch, RESERVED_NODE_PROPERTIES
+from src.utils.metrics import REGISTRY
+from src.services.analysis_diff import ANALYSIS_SOURCE, USER_SOURCE, empty_snapshot, diff_analysis, plan_summary
+
+QUERY_DURATION = REGISTRY.histogram(
+    "neo4j_query_duration_seconds",
+    "Wall time of a Neo4j query or transaction including driver retries",
+    ["query", "mode"]
+)
+QUERY_RESULT_AVAILABLE = REGISTRY.histogram(
+    "neo4j_query_result_available_seconds",
+    "Server time until the first record was available (result_available_after)",
+    ["query"]
+)
+QUERY_RESULT_CONSUMED = REGISTRY.histogram(
+    "neo4j_query_result_consumed_seconds",
+    "Server time until all records were consumed (result_consumed_after)",
+    ["query"]
+)
+QUERY_ROWS = REGISTRY.histogram(
+    "neo4j_query_rows",
+    "Records returned per query",
+    ["query"],
+    buckets=(0, 1, 10, 100, 1000, 10000, 100000)
+)
+QUERY_RETRIES = REGISTRY.counter(
+    "neo4j_query_retries_total",
+    "Transaction attempts re-run after a retryable error",
+    ["query"]
+)
+QUERY_ERRORS = REGISTRY.counter(
+    "neo4j_query_errors_total",
+    "Queries that failed after all retries",
+    ["query", "error"]
+)
+
+# Labels and relationship types that make up a workspace graph. Anything else
+# (schema bookkeeping, change tracking) is internal and never shown to clients.
+GRAPH_NODE_LABELS = ["Workspace", "Role", "Task", "Person"]
+GRAPH_RELATIONSHIP_TYPES = ["CONTAINS_ROLE", "HAS_TASK", "HAS_MEMBER", "CAN_PERFORM", "ASSIGNED_TO"]
+INTERNAL_LABELS = ["SchemaVersion", "ChangeClock", "Tombstone"]
+
+# Schema statements applied to every workspace database, keyed by schema version.
+# Add a new version instead of editing an applied one; databases record the
+# highest version they have seen on a (:SchemaVersion) node.
+SCHEMA_MIGRATIONS: Dict[int, List[str]] = {
+    1: [
+        "CREATE INDEX workspace_name IF NOT EXISTS FOR (n:Workspace) ON (n.name)",
+        "CREATE INDEX role_name IF NOT EXISTS FOR (n:Role) ON (n.name)",
+        "CREATE INDEX person_name IF NOT EXISTS FOR (n:Person) ON (n.name)",
+        "CREATE INDEX task_name IF NOT EXISTS FOR (n:Task) ON (n.name)",
+        "CREATE INDEX task_status IF NOT EXISTS FOR (n:Task) ON (n.status)"
+    ],
+    # Change tracking for /graph/changes: one clock per database plus
+    # change_seq indexes so deltas never scan the whole graph.
+    2: [
+        "MERGE (c:ChangeClock) ON CREATE SET c.seq = 0",
+        *[
+            f"CREATE INDEX {label.lower()}_change_seq IF NOT EXISTS FOR (n:{label}) ON (n.change_seq)"
+            for label in GRAPH_NODE_LABELS + ["Tombstone"]
+        ],
+        *[
+            f"CREATE INDEX {rel_type.lower()}_change_seq IF NOT EXISTS FOR ()-[r:{rel_type}]-() ON (r.change_seq)"
+            for rel_type in GRAPH_RELATIONSHIP_TYPES
+        ],
+        "CREATE INDEX tombstone_deleted_at IF NOT EXISTS FOR (n:Tombstone) ON (n.deleted_at)"
+    ],
+    # Workspace scoping for the shared tenancy mode. Per-workspace databases
+    # are backfilled with their own key so both modes run the same queries.
+    3: [
+        *[
+            statement
+            for label in GRAPH_NODE_LABELS
+            for statement in (
+                f"CREATE INDEX {label.lower()}_workspace IF NOT EXISTS FOR (n:{label}) ON (n.workspace_id)",
+                f"CREATE INDEX {label.lower()}_workspace_name IF NOT EXISTS FOR (n:{label}) ON (n.workspace_id, n.name)",
+                f"CREATE INDEX {label.lower()}_workspace_change_seq IF NOT EXISTS FOR (n:{label}) ON (n.workspace_id, n.change_seq)"
+            )
+        ],
+        "CREATE INDEX tombstone_workspace_change_seq IF NOT EXISTS FOR (n:Tombstone) ON (n.workspace_id, n.change_seq)",
+        "CREATE INDEX tombstone_workspace_deleted_at IF NOT EXISTS FOR (n:Tombstone) ON (n.workspace_id, n.deleted_at)",
+        *[
+            f"CREATE INDEX {rel_type.lower()}_workspace_change_seq IF NOT EXISTS "
+            f"FOR ()-[r:{rel_type}]-() ON (r.workspace_id, r.change_seq)"
+            for rel_type in GRAPH_RELATIONSHIP_TYPES
+        ],
+        """
+        MATCH (n) WHERE $backfill_workspace_key IS NOT NULL AND n.workspace_id IS NULL AND NOT n:SchemaVersion
+        CALL { WITH n SET n.workspace_id = $backfill_workspace_key } IN TRANSACTIONS OF 10000 ROWS
+        """,
+        """
+        MATCH ()-[r]->() WHERE $backfill_workspace_key IS NOT NULL AND r.workspace_id IS NULL
+        CALL { WITH r SET r.workspace_id = $backfill_workspace_key } IN TRANSACTIONS OF 10000 ROWS
+        """,
+        # Unique clocks keep concurrent first writes of a new workspace from creating two
+        "CREATE CONSTRAINT change_clock_workspace IF NOT EXISTS FOR (c:ChangeClock) REQUIRE c.workspace_id IS UNIQUE"
+    ],
+    # Re-analysis updates the one Workspace node of a workspace. The unique
+    # constraint replaces the plain index on the same property; workspaces
+    # analysed twice by older versions hold duplicates, so they keep the index.
+    4: [
+        "DROP INDEX workspace_workspace IF EXISTS",
+        "CREATE CONSTRAINT workspace_key IF NOT EXISTS FOR (w:Workspace) REQUIRE w.workspace_id IS UNIQUE",
+        "CREATE INDEX workspace_workspace IF NOT EXISTS FOR (n:Workspace) ON (n.workspace_id)"
+    ],
+    # Read caches and ETags are keyed on (epoch, seq) of the change clock. The
+    # epoch tells a recreated clock apart from the old one at the same seq.
+    5: [
+        "MATCH (c:ChangeClock) WHERE c.epoch IS NULL SET c.epoch = randomUUID()"
+    ]
+}
+SCHEMA_VERSION = max(SCHEMA_MIGRATIONS)
+
+# Migration statements that may fail on existing data; they are logged and skipped
+BEST_EFFORT_SCHEMA_STATEMENTS = {
+    SCHEMA_MIGRATIONS[4][1],
+    SCHEMA_MIGRATIONS[4][2]
+}
+
+class SessionMetrics:
+    '''
+     Thread-safe counters describing the sessions opened through the manager.
+     These count session slots of the manager's semaphore, not driver connections.
+    '''
+    def __init__(self, max_sessions: int):
+        '''
+         Initialize empty session metrics.
+
+         find : max_sessions (int)
+        '''
+        self.max_sessions = max_sessions
+        self.in_use = 0
+        self.peak_in_use = 0
+        self.acquisitions = 0
+        self.acquisition_timeouts = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record_acquire(self, wait_seconds: float) -> None:
+        '''
+         Record a session slot being acquired.
+
+         find : wait_seconds (float)
+        '''
+        with self._lock:
+            self.in_use += 1
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+            self.acquisitions += 1
+            self.total_wait_seconds += wait_seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, wait_seconds)
+
+    def record_timeout(self, wait_seconds: float) -> None:
+        '''
+         Record a session that gave up waiting for a slot.
+
+         find : wait_seconds (float)
+        '''
+        with self._lock:
+            self.acquisition_timeouts += 1
+            self.total_wait_seconds += wait_seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, wait_seconds)
+
+    def record_release(self) -> None:
+        '''
+         Record a session slot being released.
+        '''
+        with self._lock:
+            self.in_use -= 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        '''
+         Return a point-in-time copy of the session metrics.
+
+         Return : Dict[str, Any]
+        '''
+        with self._lock:
+            attempts = self.acquisitions + self.acquisition_timeouts
+            return {
+                "max_sessions": self.max_sessions,
+                "in_use": self.in_use,
+                "peak_in_use": self.peak_in_use,
+                "acquisitions": self.acquisitions,
+                "acquisition_timeouts": self.acquisition_timeouts,
+                "avg_wait_ms": round(self.total_wait_seconds * 1000 / attempts, 3) if attempts else 0.0,
+                "max_wait_ms": round(self.max_wait_seconds * 1000, 3)
+            }
+
+class DatabaseRegistry:
+    '''
+     Process-level registry of workspace databases known to be online.
+    '''
+    def __init__(self, ttl_seconds: float):
+        '''
+         Initialize an empty registry.
+
+         find : ttl_seconds (float): How long a database stays trusted before it is revalidated
+        '''
+        self.ttl_seconds = ttl_seconds
+        self.pending: Dict[str, asyncio.Future] = {}
+        self.schema_ready: set = set()
+        self.claimed_keys: set = set()
+        self._validated_at: Dict[str, float] = {}
+
+    def is_online(self, db_name: str) -> bool:
+        '''
+         Check whether a database was confirmed online within the TTL.
+
+         find : db_name (str)
+
+         Return : bool
+        '''
+        validated_at = self._validated_at.get(db_name)
+        return validated_at is not None and time.monotonic() - validated_at < self.ttl_seconds
+
+    def mark_online(self, db_name: str) -> None:
+        '''
+         Record that a database has just been confirmed online.
+
+         find : db_name (str)
+        '''
+        self._validated_at[db_name] = time.monotonic()
+
+    def forget(self, db_name: str) -> None:
+        '''
+         Drop a database from the registry so the next request revalidates it.
+
+         find : db_name (str)
+        '''
+        self._validated_at.pop(db_name, None)
+
+def workspace_database_name(workspace_id: str) -> str:
+    '''
+     Normalize a workspace ID to the name of its own Neo4j database.
+
+     Different IDs can share a database (Team-A and team_a both become teama),
+     so data inside it is scoped by workspace_key.
+
+     find : workspace_id (str)
+
+     Return : str
+    '''
+    return re.sub(r'[^a-zA-Z0-9]', '', workspace_id).lower()
+
+def workspace_key(workspace_id: str) -> str:
+    '''
+     Derive the key stored on every node and edge as workspace_id.
+
+     The readable database name is followed by a hash of the raw ID, so IDs
+     that normalize to the same name still get their own key. Keys written
+     before the hash was added are the bare database name; see
+     AsyncNeo4jManager.init_database.
+
+     find : workspace_id (str)
+
+     Return : str
+    '''
+    digest = hashlib.sha256(workspace_id.encode("utf-8")).hexdigest()[:12]
+    return f"{workspace_database_name(workspace_id)}-{digest}"
+
+SHOW_DATABASE_STATUS_QUERY = "SHOW DATABASES YIELD name, currentStatus WHERE name = $name RETURN currentStatus"
+SCHEMA_VERSION_QUERY = "MATCH (s:SchemaVersion) RETURN max(s.version) as version"
+SET_SCHEMA_VERSION_QUERY = """
+MERGE (s:SchemaVersion)
+SET s.version = $version, s.updated_at = $timestamp
+"""
+# Every edge leaves a graph node, so it is rekeyed in the same transaction as
+# its start node and an interrupted claim can simply be run again. Workspace
+# and ChangeClock are unique per key: if the current key already has one, the
+# legacy node is merged into it instead of rekeyed. A merged clock moves past
+# both old sequences and prunes them, so pollers reload the whole graph.
+CLAIM_LEGACY_KEY_STATEMENTS = [
+    *[
+        f"""
+        MATCH (old:Workspace {{workspace_id: $legacy_key}})
+        MATCH (new:Workspace {{workspace_id: $workspace_key}})
+        CALL {{
+            WITH old, new
+            MATCH (old)-[r:{rel_type}]->(target)
+            CREATE (new)-[moved:{rel_type}]->(target)
+            SET moved = properties(r), moved.workspace_id = $workspace_key
+            DELETE r
+        }}
+        """
+        for rel_type in ("CONTAINS_ROLE", "HAS_MEMBER")
+    ],
+    """
+    MATCH (old:Workspace {workspace_id: $legacy_key})
+    MATCH (new:Workspace {workspace_id: $workspace_key})
+    DETACH DELETE old
+    """,
+    *[
+        f"""
+        MATCH (n:{label}) WHERE n.workspace_id = $legacy_key
+        CALL {{
+            WITH n
+            OPTIONAL MATCH (n)-[r]->() WHERE r.workspace_id = $legacy_key
+            SET r.workspace_id = $workspace_key
+            WITH DISTINCT n
+            SET n.workspace_id = $workspace_key
+        }} IN TRANSACTIONS OF 1000 ROWS
+        """
+        for label in GRAPH_NODE_LABELS
+    ],
+    """
+    MATCH (t:Tombstone) WHERE t.workspace_id = $legacy_key
+    CALL { WITH t SET t.workspace_id = $workspace_key } IN TRANSACTIONS OF 10000 ROWS
+    """,
+    """
+    MATCH (old:ChangeClock {workspace_id: $legacy_key})
+    OPTIONAL MATCH (new:ChangeClock {workspace_id: $workspace_key})
+    FOREACH (_ IN CASE WHEN new IS NULL THEN [1] ELSE [] END |
+        SET old.workspace_id = $workspace_key
+    )
+    FOREACH (_ IN CASE WHEN new IS NULL THEN [] ELSE [1] END |
+        SET new.seq = CASE WHEN old.seq > new.seq THEN old.seq ELSE new.seq END + 1
+        SET new.pruned_seq = new.seq
+        DELETE old
+    )
+    """
+]
+
+def _query_name(query: Union[str, Callable[..., Any]]) -> str:
+    '''
+     Derive a metrics name for a query that was not given one.
+
+     Transaction functions are named after the helper that defines them.
+
+     find : query (Union[str, Callable[..., Any]])
+
+     Return : str
+    '''
+    if callable(query):
+        return getattr(query, "__qualname__", "work").split(".<locals>")[0]
+    return "unnamed"
+
+class _RecordingTransaction:
+    '''
+     Transaction proxy remembering every result so server timings can be read after the work.
     '''
-     Manager class for Neo4j database operations
+    def __init__(self, tx: Any):
+        self._tx = tx
+        self.results: List[Any] = []
+
+    async def run(self, query: str, parameters: Dict = None, **kwargs: Any) -> Any:
+        result = await self._tx.run(query, parameters, **kwargs)
+        self.results.append(result)
+        return result
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._tx, name)
+
+class AsyncNeo4jManager:
     '''
-    def __init__(self, uri: str, user: str, password: str):
+     Manager for Neo4j database operations built on the asyncio Neo4j driver.
+
+     Queries never block the event loop, so a slow query only delays the
+     request that issued it.
+    '''
+    def __init__(
+        self,
+        uri: str,
+        user: str,
+        password: str,
+        max_connection_pool_size: int = 50,
+        connection_acquisition_timeout: float = 30.0,
+        liveness_check_timeout: Optional[float] = 30.0,
+        max_connection_lifetime: float = 3600.0,
+        database_cache_ttl: float = 300.0,
+        transaction_retry_deadline: float = 30.0,
+        tenancy_mode: str = "database",
+        shared_database: str = "neo4j"
+    ):
         '''
-         Initialize Neo4j connection.
+         Initialize async Neo4j connection pool.
 
          find :
             uri (str)
             user (str)
             password (str)
+            max_connection_pool_size (int)
+            connection_acquisition_timeout (float)
+            liveness_check_timeout (Optional[float])
+            max_connection_lifetime (float)
+            database_cache_ttl (float)
+            transaction_retry_deadline (float): Seconds a managed transaction keeps retrying retryable errors
+            tenancy_mode (str): "database" for one database per workspace, "shared" for one database for all
+            shared_database (str): Database used by the shared tenancy mode
         '''
         self.uri = uri
         self.user = user
         self.password = password
-        self.driver = GraphDatabase.driver(uri, auth=(user, password))
+        self.connection_acquisition_timeout = connection_acquisition_timeout
+        self.driver = AsyncGraphDatabase.driver(
+            uri,
+            auth=(user, password),
+            max_connection_pool_size=max_connection_pool_size,
+            connection_acquisition_timeout=connection_acquisition_timeout,
+            liveness_check_timeout=liveness_check_timeout,
+            max_connection_lifetime=max_connection_lifetime,
+            max_transaction_retry_time=transaction_retry_deadline
+        )
+        self.session_metrics = SessionMetrics(max_connection_pool_size)
+        self._slots = asyncio.Semaphore(max_connection_pool_size)
+        self.databases = DatabaseRegistry(database_cache_ttl)
+        self.tenancy_mode = tenancy_mode
+        self.shared_database = shared_database
 
-    def close(self):
+    async def close(self):
         '''
          Close the database connection.
         '''
         if self.driver:
-            self.driver.close()
+            await self.driver.close()
 
-    def init_database(self, db_name: str) -> str:
+    async def verify_connectivity(self) -> None:
+        '''
+         Check that the pooled driver can reach the server.
+
+         Error : Exception
         '''
-         Initialize database with retry mechanism.
+        await self.driver.verify_connectivity()
+
+    @asynccontextmanager
+    async def session(self, database: str, access_mode: str = WRITE_ACCESS) -> AsyncIterator[Any]:
+        '''
+         Open an async session on the shared pool, recording session metrics.
+
+         find :
+            database (str)
+            access_mode (str): READ_ACCESS or WRITE_ACCESS
+
+         Return : AsyncIterator[AsyncSession]
+
+         Error : TimeoutError
+        '''
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.connection_acquisition_timeout)
+        except asyncio.TimeoutError:
+            self.session_metrics.record_timeout(time.perf_counter() - started)
+            raise TimeoutError(
+                f"Could not acquire a Neo4j connection within {self.connection_acquisition_timeout}s"
+            )
+        self.session_metrics.record_acquire(time.perf_counter() - started)
+        try:
+            async with self.driver.session(database=database, default_access_mode=access_mode) as session:
+                yield session
+        finally:
+            self.session_metrics.record_release()
+            self._slots.release()
+
+    async def _get_database_status(self, safe_db_name: str) -> Optional[str]:
+        '''
+         Return the current status of a database, or None if it does not exist.
+
+         find : safe_db_name (str)
+
+         Return : Optional[str]
+        '''
+        async with self.session("system") as session:
+            result = await session.run(SHOW_DATABASE_STATUS_QUERY, {"name": safe_db_name})
+            record = await result.single()
+            return record["currentStatus"] if record else None
+
+    async def _ensure_schema(self, safe_db_name: str) -> None:
+        '''
+         Apply any schema migrations newer than the version recorded in the database.
+
+         find : safe_db_name (str)
+        '''
+        async with self.session(safe_db_name) as session:
+            result = await session.run(SCHEMA_VERSION_QUERY)
+            current_version = (await result.single())["version"] or 0
+            if current_version >= SCHEMA_VERSION:
+                return
+
+            for version in range(current_version + 1, SCHEMA_VERSION + 1):
+                print(f"Applying schema version {version} to {safe_db_name}...")
+                for statement in SCHEMA_MIGRATIONS[version]:
+                    try:
+                        result = await session.run(statement, self._schema_parameters(safe_db_name))
+                        await result.consume()
+                    except Neo4jError as e:
+                        if not self._skip_schema_statement(safe_db_name, statement, e):
+                            raise
+
+            result = await session.run(
+                SET_SCHEMA_VERSION_QUERY,
+                {"version": SCHEMA_VERSION, "timestamp": datetime.now().isoformat()}
+            )
+            await result.consume()
+
+    async def _claim_legacy_key(self, safe_db_name: str, legacy_key: str, key: str) -> None:
+        '''
+         Move the nodes and edges stored under a legacy workspace key to its current key.
+
+         find :
+            safe_db_name (str)
+            legacy_key (str)
+            key (str)
+        '''
+        async with self.session(safe_db_name) as session:
+            for statement in CLAIM_LEGACY_KEY_STATEMENTS:
+                result = await session.run(statement, {"legacy_key": legacy_key, "workspace_key": key})
+                await result.consume()
+
+    async def _create_database(self, safe_db_name: str) -> None:
+        '''
+         Create a database through the system database.
+
+         find : safe_db_name (str)
+        '''
+        async with self.session("system") as session:
+            result = await session.run(f"CREATE DATABASE {safe_db_name} IF NOT EXISTS")
+            await result.consume()
+
+    def database_for(self, workspace_id: str) -> str:
+        '''
+         Return the database holding a workspace under the configured tenancy mode.
+
+         find : workspace_id (str)
+
+         Return : str
+        '''
+        if self.tenancy_mode == "shared":
+            return self.shared_database
+        return workspace_database_name(workspace_id)
+
+    def _schema_parameters(self, safe_db_name: str) -> Dict[str, Any]:
+        '''
+         Parameters passed to every schema migration statement.
+
+         find : safe_db_name (str)
+
+         Return : Dict[str, Any]
+        '''
+        # A per-workspace database belongs to exactly one workspace, so its
+        # unscoped data can be claimed for it; a shared database cannot.
+        return {"backfill_workspace_key": safe_db_name if self.tenancy_mode == "database" else None}
+
+    def _skip_schema_statement(self, safe_db_name: str, statement: str, error: Exception) -> bool:
+        '''
+         Decide whether a failed migration statement can be skipped.
+
+         find :
+            safe_db_name (str)
+            statement (str)
+            error (Exception)
+
+         Return : bool: True for best-effort statements, after logging the failure
+        '''
+        if statement not in BEST_EFFORT_SCHEMA_STATEMENTS:
+            return False
+        print(f"Skipping schema statement on {safe_db_name} ({error.code}): {statement}")
+        return True
+
+    async def init_database(self, db_name: str) -> str:
+        '''
+         Make sure the database holding a workspace exists and is online.
+
+         Databases already known to be online are served from the process-level
+         registry without touching the system database. Concurrent first requests
+         for the same workspace share a single creation.
+
+         The first call for a workspace in a process also moves its data from
+         the legacy key (the bare database name) to workspace_key. Workspaces
+         whose IDs collided under the legacy key already shared that data, so
+         the first of them to be used takes it over.
 
          find : db_name (str)
             
@@ -46,116 +592,742 @@ class Neo4jManager:
             
          Error : Exception
         '''
-        safe_db_name = re.sub(r'[^a-zA-Z0-9]', '', db_name)
+        safe_db_name = self.database_for(db_name)
+        if not self.databases.is_online(safe_db_name):
+            await self._share_pending(
+                safe_db_name, lambda: self._ensure_database(safe_db_name), "Error initializing database"
+            )
+
+        # Checked on every call: in the shared tenancy mode the database is
+        # already online for all but the first workspace of the process
+        key = workspace_key(db_name)
+        if key not in self.databases.claimed_keys:
+            await self._share_pending(
+                f"claim:{key}",
+                lambda: self._claim_legacy_key(safe_db_name, workspace_database_name(db_name), key),
+                "Error claiming legacy workspace data"
+            )
+            self.databases.claimed_keys.add(key)
+        return safe_db_name
+
+    async def _share_pending(self, name: str, start: Callable[[], Awaitable[None]], error_message: str) -> None:
+        '''
+         Run a setup step once for all concurrent requests waiting on it.
+
+         find :
+            name (str): Key of the step in the registry's pending futures
+            start (Callable[[], Awaitable[None]]): Starts the step
+            error_message (str): Logged when the step fails
+
+         Error : Exception
+        '''
+        pending = self.databases.pending.get(name)
+        if pending is None:
+            pending = asyncio.ensure_future(start())
+            self.databases.pending[name] = pending
+            pending.add_done_callback(lambda _: self.databases.pending.pop(name, None))
+
+        try:
+            # Shield the shared step so one cancelled request cannot abort it for the others
+            await asyncio.shield(pending)
+        except Exception as e:
+            print(f"{error_message}: {str(e)}")
+            raise
+
+    async def _ensure_database(self, safe_db_name: str) -> None:
+        '''
+         Check the system database and create the workspace database if needed.
+
+         find : safe_db_name (str)
+
+         Error : Exception
+        '''
         max_retries = 5
         retry_delay = 2
-        
+
+        status = await self._get_database_status(safe_db_name)
+        if status is not None:
+            print(f"Database {safe_db_name} already exists and will be used")
+        else:
+            print(f"Creating database {safe_db_name}...")
+            await self._create_database(safe_db_name)
+
+            # Wait for database to be ready without blocking the event loop
+            for attempt in range(max_retries):
+                await asyncio.sleep(retry_delay)
+                status = await self._get_database_status(safe_db_name)
+                if status == "online":
+                    print(f"Database {safe_db_name} is ready")
+                    break
+                print(f"Database status: {status}, attempt {attempt + 1}/{max_retries}")
+            else:
+                raise Exception(f"Database {safe_db_name} not ready after {max_retries} attempts")
+
+        # Schema only needs checking once per database per process
+        if safe_db_name not in self.databases.schema_ready:
+            await self._ensure_schema(safe_db_name)
+            self.databases.schema_ready.add(safe_db_name)
+        self.databases.mark_online(safe_db_name)
+
+    def _forget_missing_database(self, db_name: str, error: Exception) -> bool:
+        '''
+         Evict a database from the registry when the server reports it missing.
+
+         find :
+            db_name (str)
+            error (Exception)
+
+         Return : bool: True when the error was a missing database
+        '''
+        if isinstance(error, ClientError) and error.code == "Neo.ClientError.Database.DatabaseNotFound":
+            # The database was dropped behind our back; revalidate on the next request
+            self.databases.forget(db_name)
+            return True
+        return False
+
+    async def execute_read(
+        self,
+        db_name: str,
+        query: Union[str, Callable[[Any], Awaitable[Any]]],
+        parameters: Dict = None,
+        query_name: Optional[str] = None
+    ) -> Any:
+        '''
+         Run a query or unit of work in a managed read transaction.
+
+         Read transactions use read access mode so a cluster can route them to
+         any member.
+
+         find :
+            db_name (str)
+            query (Union[str, Callable[[Any], Awaitable[Any]]]): Cypher text or a coroutine function receiving the transaction
+            parameters (Dict): Query parameters when query is Cypher text
+            query_name (Optional[str]): Name reported in metrics; defaults to the work's name
+
+         Return : Any: {'data', 'summary'} for Cypher text, otherwise the work's return value
+
+         Error : Exception
+        '''
+        return await self._execute(db_name, READ_ACCESS, query, parameters, query_name)
+
+    async def execute_write(
+        self,
+        db_name: str,
+        query: Union[str, Callable[[Any], Awaitable[Any]]],
+        parameters: Dict = None,
+        query_name: Optional[str] = None
+    ) -> Any:
+        '''
+         Run a query or unit of work in a managed write transaction.
+
+         All statements issued by the work commit or roll back together.
+
+         find :
+            db_name (str)
+            query (Union[str, Callable[[Any], Awaitable[Any]]]): Cypher text or a coroutine function receiving the transaction
+            parameters (Dict): Query parameters when query is Cypher text
+            query_name (Optional[str]): Name reported in metrics; defaults to the work's name
+
+         Return : Any: {'data', 'summary'} for Cypher text, otherwise the work's return value
+
+         Error : Exception
+        '''
+        return await self._execute(db_name, WRITE_ACCESS, query, parameters, query_name)
+
+    async def _execute(
+        self,
+        db_name: str,
+        access_mode: str,
+        query: Union[str, Callable[[Any], Awaitable[Any]]],
+        parameters: Dict = None,
+        query_name: Optional[str] = None
+    ) -> Any:
+        '''
+         Run work in a managed transaction and record its metrics.
+
+         The driver re-runs the work only for retryable failures (transient
+         errors, unavailable servers, expired sessions) with jittered exponential
+         backoff until the transaction retry deadline. Anything else, such as a
+         syntax error or a constraint violation, is raised straight away.
+
+         find :
+            db_name (str)
+            access_mode (str): READ_ACCESS or WRITE_ACCESS
+            query (Union[str, Callable[[Any], Awaitable[Any]]])
+            parameters (Dict)
+            query_name (Optional[str])
+
+         Return : Any
+
+         Error : Exception
+        '''
+        name = query_name or _query_name(query)
+        mode = "read" if access_mode == READ_ACCESS else "write"
+
+        if callable(query):
+            work = query
+        else:
+            async def work(tx) -> Dict[str, Any]:
+                result = await tx.run(query, parameters or {})
+                data = [record async for record in result]
+                return {
+                    'data': data,
+                    'summary': await result.consume()
+                }
+
+        attempts = 0
+        server_times: Dict[str, int] = {}
+
+        async def recorded_work(tx) -> Any:
+            nonlocal attempts
+            attempts += 1
+            recorder = _RecordingTransaction(tx)
+            value = await work(recorder)
+            # Summaries stay readable until the transaction closes
+            server_times.clear()
+            for result in recorder.results:
+                summary = await result.consume()
+                server_times["available"] = server_times.get("available", 0) + (summary.result_available_after or 0)
+                server_times["consumed"] = server_times.get("consumed", 0) + (summary.result_consumed_after or 0)
+            return value
+
+        started = time.perf_counter()
         try:
-            # Use system database to create new database
-            with self.driver.session(database="system") as session:
-                # Check if database exists
-                result = session.run("SHOW DATABASES")
-                exists = any(record["name"] == safe_db_name for record in result)
-                
-                if not exists:
-                    print(f"Creating database {safe_db_name}...")
-                    session.run(f"CREATE DATABASE {safe_db_name}")
-                    
-                    # Wait for database to be ready
-                    for attempt in range(max_retries):
-                        time.sleep(retry_delay)
-                        result = session.run("SHOW DATABASES")
-                        for record in result:
-                            if record["name"] == safe_db_name:
-                                status = record["currentStatus"]
-                                if status == "online":
-                                    print(f"Database {safe_db_name} is ready")
-                                    return safe_db_name
-                                else:
-                                    print(f"Database status: {status}, attempt {attempt + 1}/{max_retries}")
-                                break
-                    
-                    raise Exception(f"Database {safe_db_name} not ready after {max_retries} attempts")
+            async with self.session(db_name, access_mode) as session:
+                if access_mode == READ_ACCESS:
+                    value = await session.execute_read(recorded_work)
                 else:
-                    print(f"Database {safe_db_name} already exists and will be used")
-                    return safe_db_name
-                    
+                    value = await session.execute_write(recorded_work)
+        except Exception as e:
+            QUERY_ERRORS.inc(query=name, error=type(e).__name__)
+            self._forget_missing_database(db_name, e)
+            print(f"Transaction {name} failed with error: {str(e)}")
+            if not callable(query):
+                print(f"Query: {query}")
+                print(f"Parameters: {parameters}")
+            raise
+        finally:
+            QUERY_DURATION.observe(time.perf_counter() - started, query=name, mode=mode)
+            if attempts > 1:
+                QUERY_RETRIES.inc(attempts - 1, query=name)
+
+        if server_times:
+            QUERY_RESULT_AVAILABLE.observe(server_times["available"] / 1000, query=name)
+            QUERY_RESULT_CONSUMED.observe(server_times["consumed"] / 1000, query=name)
+        if not callable(query):
+            QUERY_ROWS.observe(len(value['data']), query=name)
+        return value
+
+    async def stream(
+        self,
+        db_name: str,
+        query: str,
+        parameters: Dict = None,
+        query_name: str = "stream"
+    ) -> AsyncIterator[Dict[str, Any]]:
+        '''
+         Lazily yield query records, pulling them from the server in fetch-size batches.
+
+         The session stays open until the iterator is exhausted or closed.
+         Duration and rows are recorded when the stream ends.
+
+         find :
+            db_name (str)
+            query (str)
+            parameters (Dict)
+            query_name (str): Name reported in metrics
+
+         Return : AsyncIterator[Dict[str, Any]]
+        '''
+        started = time.perf_counter()
+        rows = 0
+        try:
+            async with self.session(db_name, READ_ACCESS) as session:
+                result = await session.run(query, parameters or {})
+                async for record in result:
+                    rows += 1
+                    yield record.data()
+                summary = await result.consume()
+                QUERY_RESULT_AVAILABLE.observe((summary.result_available_after or 0) / 1000, query=query_name)
+                QUERY_RESULT_CONSUMED.observe((summary.result_consumed_after or 0) / 1000, query=query_name)
         except Exception as e:
-            print(f"Error initializing database: {str(e)}")
+            QUERY_ERRORS.inc(query=query_name, error=type(e).__name__)
             raise
+        finally:
+            QUERY_DURATION.observe(time.perf_counter() - started, query=query_name, mode="read")
+            QUERY_ROWS.observe(rows, query=query_name)
+
+_shared_manager: Optional[AsyncNeo4jManager] = None
+
+def init_neo4j_manager(uri: str, user: str, password: str, **pool_settings: Any) -> AsyncNeo4jManager:
+    '''
+     Create the process-wide async Neo4j manager shared by all request handlers.
+
+     find :
+        uri (str)
+        user (str)
+        password (str)
+        pool_settings (Any): Keyword arguments forwarded to AsyncNeo4jManager
+
+     Return : AsyncNeo4jManager
+    '''
+    global _shared_manager
+    if _shared_manager is None:
+        _shared_manager = AsyncNeo4jManager(uri, user, password, **pool_settings)
+    return _shared_manager
+
+def get_neo4j_manager() -> AsyncNeo4jManager:
+    '''
+     Return the process-wide async Neo4j manager.
+
+     Return : AsyncNeo4jManager
+
+     Error : RuntimeError
+    '''
+    if _shared_manager is None:
+        raise RuntimeError("Neo4j manager has not been initialized")
+    return _shared_manager
+
+async def close_neo4j_manager() -> None:
+    '''
+     Close the process-wide Neo4j manager and its connection pool.
+    '''
+    global _shared_manager
+    if _shared_manager is not None:
+        await _shared_manager.close()
+        _shared_manager = None
+
+def _graph_node_condition(alias: str) -> str:
+    '''
+     Build a Cypher condition excluding internal bookkeeping nodes.
+
+     find : alias (str): Node variable the condition applies to
+
+     Return : str
+    '''
+    return " AND ".join(f"NOT {alias}:{label}" for label in INTERNAL_LABELS)
+
+def _workspace_nodes(alias: str) -> str:
+    '''
+     Build a CALL subquery yielding every graph node of $workspace_key through the label indexes.
+
+     find : alias (str): Node variable the subquery returns
+
+     Return : str
+    '''
+    lookups = " UNION ".join(
+        f"MATCH ({alias}:{label}) WHERE {alias}.workspace_id = $workspace_key RETURN {alias}"
+        for label in GRAPH_NODE_LABELS
+    )
+    return f"CALL {{ {lookups} }}"
+
+# Shapes returned to graph visualization clients
+NODE_PROJECTION = """{
+    id: ID(n),
+    label: n.name,
+    type: n.type,
+    status: n.status,
+    priority: n.priority,
+    assignee: n.assignee,
+    created_at: n.created_at,
+    properties: properties(n)
+}"""
+EDGE_PROJECTION = """{
+    id: ID(r),
+    from: ID(startNode(r)),
+    to: ID(endNode(r)),
+    type: type(r),
+    properties: properties(r)
+}"""
+
+async def iter_workspace_graph(manager: AsyncNeo4jManager, db_name: str, workspace_id: str) -> AsyncIterator[Dict[str, Any]]:
+    '''
+     Stream all nodes and then all edges of a workspace graph.
+
+     Each item is {"node": ...} or {"edge": ...}; a final {"end": ...} item
+     carries the counts so clients can detect a truncated stream.
+
+     find :
+        manager (AsyncNeo4jManager)
+        db_name (str)
+        workspace_id (str)
+
+     Return : AsyncIterator[Dict[str, Any]]
+    '''
+    params = {"workspace_key": workspace_key(workspace_id)}
+    node_count = 0
+    async for record in manager.stream(
+        db_name,
+        f"{_workspace_nodes('n')} RETURN {NODE_PROJECTION} as node",
+        params,
+        query_name="stream_graph_nodes"
+    ):
+        node_count += 1
+        yield {"node": record["node"]}
+
+    edge_count = 0
+    async for record in manager.stream(
+        db_name,
+        f"{_workspace_nodes('n')} MATCH (n)-[r]->() RETURN {EDGE_PROJECTION} as edge",
+        params,
+        query_name="stream_graph_edges"
+    ):
+        edge_count += 1
+        yield {"edge": record["edge"]}
+
+    yield {"end": {"nodes": node_count, "edges": edge_count}}
+
+def _node_filter_conditions(alias: str, filters: GraphFilter) -> List[str]:
+    '''
+     Build Cypher WHERE conditions for a node variable from graph filters.
+
+     find :
+        alias (str): Node variable the conditions apply to
+        filters (GraphFilter)
+
+     Return : List[str]
+    '''
+    conditions = [f"{alias}.workspace_id = $workspace_key"]
+    if filters.node_types:
+        conditions.append(f"{alias}.type IN $node_types")
+    if filters.statuses:
+        conditions.append(f"{alias}.status IN $statuses")
+    if filters.priorities:
+        conditions.append(f"{alias}.priority IN $priorities")
+    if filters.assignee:
+        conditions.append(
+            f"({alias}.assignee = $assignee OR "
+            f"EXISTS {{ ({alias})-[:ASSIGNED_TO]->(:Person {{name: $assignee}}) }})"
+        )
+    return conditions
+
+async def query_workspace_graph(
+    manager: AsyncNeo4jManager,
+    db_name: str,
+    workspace_id: str,
+    filters: Optional[GraphFilter] = None
+) -> Dict[str, Any]:
+    '''
+     Get graph nodes and edges, optionally filtered and paginated by node ID.
+
+     Edges are returned when they leave a node on the page and end on a node
+     that also passes the filters. Nodes are listed by ID; next_cursor is the
+     highest node ID of a full page and None when there is nothing left.
+
+     find :
+        manager (AsyncNeo4jManager)
+        db_name (str)
+        workspace_id (str)
+        filters (Optional[GraphFilter])
+
+     Return : Dict[str, Any]
+    '''
+    filters = filters or GraphFilter()
+    node_conditions = " AND ".join(_node_filter_conditions("n", filters))
+    page_condition = "ID(n) > $after" if filters.after is not None else "true"
+    page_limit = "LIMIT $limit" if filters.limit else ""
+
+    if filters.around is not None:
+        # Neighbourhood queries collect the matched set once, so edges can be
+        # limited to nodes inside the neighbourhood.
+        query = f"""
+        MATCH (c) WHERE ID(c) = $around AND c.workspace_id = $workspace_key
+        MATCH (c)-[*0..{filters.hops}]-(n)
+        WITH DISTINCT n WHERE {node_conditions}
+        WITH collect(n) as matched
+        UNWIND matched as n
+        WITH matched, n WHERE {page_condition}
+        WITH matched, n ORDER BY ID(n) {page_limit}
+        OPTIONAL MATCH (n)-[r]->(m) WHERE m IN matched
+        RETURN collect(distinct {NODE_PROJECTION}) as nodes,
+               collect(distinct {EDGE_PROJECTION}) as edges
+        """
+    else:
+        edge_conditions = " AND ".join(_node_filter_conditions("m", filters))
+        query = f"""
+        {_workspace_nodes('n')}
+        WITH n WHERE {node_conditions} AND {page_condition}
+        WITH n ORDER BY ID(n) {page_limit}
+        OPTIONAL MATCH (n)-[r]->(m) WHERE {edge_conditions}
+        RETURN collect(distinct {NODE_PROJECTION}) as nodes,
+               collect(distinct {EDGE_PROJECTION}) as edges
+        """
+
+    params = {
+        "workspace_key": workspace_key(workspace_id),
+        "node_types": filters.node_types,
+        "statuses": filters.statuses,
+        "priorities": filters.priorities,
+        "assignee": filters.assignee,
+        "around": filters.around,
+        "after": filters.after,
+        "limit": filters.limit
+    }
+    result = await manager.execute_read(db_name, query, params, query_name="workspace_graph")
+    data = result['data'][0]
+
+    # collect() does not promise to keep the ORDER BY, so restore it before picking the cursor
+    nodes = sorted((node for node in data["nodes"] if node["id"] is not None), key=lambda node: node["id"])
+    edges = [edge for edge in data["edges"] if edge["id"] is not None]
+    next_cursor = None
+    if filters.limit and len(nodes) == filters.limit:
+        next_cursor = nodes[-1]["id"]
+
+    return {
+        "nodes": nodes,
+        "edges": edges,
+        "next_cursor": next_cursor
+    }
+
+async def get_graph_changes(
+    manager: AsyncNeo4jManager,
+    db_name: str,
+    workspace_id: str,
+    since: Optional[int] = None
+) -> Dict[str, Any]:
+    '''
+     Get nodes and edges added, updated or deleted after a change version.
+
+     version is the change clock read before the delta, so polling again with
+     since=version never misses a commit; a change may be repeated once, so
+     clients should apply items idempotently in change_seq order. Without
+     since only the current version is returned. full_resync is set when the
+     tombstones needed for the delta were pruned or the clock is behind since
+     (e.g. the database was recreated).
+
+     find :
+        manager (AsyncNeo4jManager)
+        db_name (str)
+        workspace_id (str)
+        since (Optional[int])
+
+     Return : Dict[str, Any]
+    '''
+    ws_key = workspace_key(workspace_id)
+    clock = (await manager.execute_read(
+        db_name,
+        CHANGE_CLOCK_QUERY,
+        {"workspace_key": ws_key},
+        query_name="change_clock"
+    ))['data'][0]
+    version = clock["seq"] or 0
+    changes = {
+        "since": since,
+        "version": version,
+        "full_resync": False,
+        "nodes": {"added": [], "updated": [], "deleted": []},
+        "edges": {"added": [], "deleted": []}
+    }
+    if since is None:
+        return changes
+    if since < (clock["pruned_seq"] or 0) or since > version:
+        changes["full_resync"] = True
+        return changes
+
+    # One indexed lookup per label/type instead of scanning every node and edge
+    node_lookups = " UNION ".join(
+        f"MATCH (n:{label}) WHERE n.workspace_id = $workspace_key AND n.change_seq > $since RETURN n"
+        for label in GRAPH_NODE_LABELS
+    )
+    nodes = await manager.execute_read(
+        db_name,
+        f"""
+        CALL {{ {node_lookups} }}
+        RETURN {NODE_PROJECTION} as node, coalesce(n.created_seq, 0) > $since as added
+        ORDER BY n.change_seq
+        """,
+        {"workspace_key": ws_key, "since": since},
+        query_name="changed_nodes"
+    )
+    for record in nodes['data']:
+        changes["nodes"]["added" if record["added"] else "updated"].append(record["node"])
+
+    edge_lookups = " UNION ".join(
+        f"MATCH ()-[r:{rel_type}]->() WHERE r.workspace_id = $workspace_key AND r.change_seq > $since RETURN r"
+        for rel_type in GRAPH_RELATIONSHIP_TYPES
+    )
+    edges = await manager.execute_read(
+        db_name,
+        f"""
+        CALL {{ {edge_lookups} }}
+        RETURN {EDGE_PROJECTION} as edge
+        ORDER BY r.change_seq
+        """,
+        {"workspace_key": ws_key, "since": since},
+        query_name="changed_edges"
+    )
+    changes["edges"]["added"] = [record["edge"] for record in edges['data']]
+
+    tombstones = await manager.execute_read(
+        db_name,
+        """
+        MATCH (t:Tombstone) WHERE t.workspace_id = $workspace_key AND t.change_seq > $since
+        RETURN t.entity as entity, t.ref_id as id, t.change_seq as change_seq, t.deleted_at as deleted_at
+        ORDER BY t.change_seq
+        """,
+        {"workspace_key": ws_key, "since": since},
+        query_name="tombstones"
+    )
+    for record in tombstones['data']:
+        changes[f"{record['entity']}s"]["deleted"].append({
+            "id": record["id"],
+            "change_seq": record["change_seq"],
+            "deleted_at": record["deleted_at"]
+        })
+    return changes
+
+def serialize_property_value(value: Any) -> Any:
+    '''
+     Serialize property value if needed.
+
+     find : value
+        
+     Return : Serialized value
+    '''
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return value
+
+# Every write transaction bumps its workspace's change clock before it commits.
+# The clock node stays write-locked until commit, so change_seq order matches
+# commit order and a reader never sees a sequence number ahead of a pending write.
+NEXT_CHANGE_SEQ_QUERY = """
+MERGE (clock:ChangeClock {workspace_id: $workspace_key})
+ON CREATE SET clock.epoch = randomUUID()
+SET clock.seq = coalesce(clock.seq, 0) + 1
+RETURN clock.seq as seq
+"""
+CHANGE_CLOCK_QUERY = """
+MATCH (c:ChangeClock {workspace_id: $workspace_key})
+RETURN max(c.seq) as seq, max(c.pruned_seq) as pruned_seq, max(c.epoch) as epoch
+"""
+TOMBSTONE_RETENTION = timedelta(days=7)
+TOMBSTONE_PRUNE_BATCH = 100
+
+async def get_change_version(manager: AsyncNeo4jManager, db_name: str, workspace_id: str) -> Tuple[str, int]:
+    '''
+     Read the change clock of a workspace.
+
+     Every write transaction advances seq by one, so (epoch, seq) identifies
+     the stored state of a workspace across all workers and replicas.
+
+     find :
+        manager (AsyncNeo4jManager)
+        db_name (str)
+        workspace_id (str)
+
+     Return : Tuple[str, int]: (epoch, seq); ("0", 0) before the first write
+    '''
+    clock = (await manager.execute_read(
+        db_name,
+        CHANGE_CLOCK_QUERY,
+        {"workspace_key": workspace_key(workspace_id)},
+        query_name="change_clock"
+    ))['data'][0]
+    return clock["epoch"] or "0", clock["seq"] or 0
+
+FORCE_RESYNC_QUERY = """
+MATCH (clock:ChangeClock {workspace_id: $workspace_key})
+SET clock.seq = clock.seq + 1
+SET clock.pruned_seq = clock.seq
+RETURN clock.seq as seq
+"""
+
+async def force_change_resync(manager: AsyncNeo4jManager, db_name: str, workspace_id: str) -> bool:
+    '''
+     Advance the change clock of a workspace and prune every earlier version.
+
+     Read caches, ETags and views keyed on an older version are retired, and
+     /graph/changes tells pollers to reload the whole graph.
+
+     find :
+        manager (AsyncNeo4jManager)
+        db_name (str)
+        workspace_id (str)
 
-    def execute_with_retry(self, db_name: str, query: str, parameters: Dict = None) -> Dict[str, Any]:
-        '''
-         Execute query with retry mechanism.
+     Return : bool: False when the workspace was never written
+    '''
+    async def work(tx) -> bool:
+        result = await tx.run(FORCE_RESYNC_QUERY, {"workspace_key": workspace_key(workspace_id)})
+        return await result.single() is not None
 
-         find :
-            db_name (str)
-            query (str)
-            parameters (Dict)
-            
-         Return : Dict[str, Any]
-            
-         Error : Exception
-        '''
-        max_retries = 3
-        retry_delay = 1
-        last_error = None
-        
-        for attempt in range(max_retries):
-            try:
-                with self.driver.session(database=db_name) as session:
-                    # Execute query and collect results immediately
-                    result = session.run(query, parameters or {})
-                    # For queries that return data, collect it
-                    data = list(result)
-                    # Get summary information
-                    summary = result.consume()
-                    return {
-                        'data': data,
-                        'summary': summary
-                    }
-            except Exception as e:
-                last_error = e
-                if attempt == max_retries - 1:
-                    print(f"Final attempt failed with error: {str(e)}")
-                    print(f"Query: {query}")
-                    print(f"Parameters: {parameters}")
-                    raise
-                print(f"Query attempt {attempt + 1} failed: {str(e)}, retrying...")
-                time.sleep(retry_delay)
-
-def create_neo4j_manager(uri: str, user: str, password: str) -> Neo4jManager:
-    '''
-     Create and return Neo4j manager instance.
+    return await manager.execute_write(db_name, work)
+
+async def _next_change_seq(tx, key: str) -> int:
+    '''
+     Take the next change sequence number of a workspace inside a write transaction.
 
      find :
-        uri (str)
-        user (str)
-        password (str)
-        
-     Return : Neo4jManager
+        tx (AsyncManagedTransaction)
+        key (str): Workspace key
+
+     Return : int
     '''
-    return Neo4jManager(uri, user, password)
+    result = await tx.run(NEXT_CHANGE_SEQ_QUERY, {"workspace_key": key})
+    return (await result.single())["seq"]
 
-def serialize_property_value(value: Any) -> Any:
+async def _record_tombstones(tx, key: str, seq: int, deleted: List[Dict[str, Any]], timestamp: str) -> None:
     '''
-     Serialize property value if needed.
+     Leave tombstones for deleted nodes or edges and prune expired ones.
 
-     find : value
-        
-     Return : Serialized value
+     Pruning is bounded per call and raises the clock's pruned_seq so clients
+     polling from before the oldest remaining tombstone are told to resync.
+
+     find :
+        tx (AsyncManagedTransaction)
+        key (str): Workspace key
+        seq (int): Change sequence of the deleting transaction
+        deleted (List[Dict[str, Any]]): {"entity": "node" | "edge", "ref_id": int} rows
+        timestamp (str)
     '''
-    if isinstance(value, (dict, list)):
-        return json.dumps(value)
-    return value
+    if deleted:
+        result = await tx.run(
+            """
+            UNWIND $rows AS row
+            CREATE (:Tombstone {
+                workspace_id: $workspace_key,
+                entity: row.entity,
+                ref_id: row.ref_id,
+                deleted_at: $timestamp,
+                change_seq: $seq
+            })
+            """,
+            {"rows": deleted, "workspace_key": key, "timestamp": timestamp, "seq": seq}
+        )
+        await result.consume()
+
+    cutoff = (datetime.now() - TOMBSTONE_RETENTION).isoformat()
+    result = await tx.run(
+        """
+        MATCH (t:Tombstone) WHERE t.workspace_id = $workspace_key AND t.deleted_at < $cutoff
+        WITH t ORDER BY t.change_seq LIMIT $limit
+        WITH collect(t) as expired, max(t.change_seq) as pruned_seq
+        WHERE pruned_seq IS NOT NULL
+        MATCH (clock:ChangeClock {workspace_id: $workspace_key})
+        SET clock.pruned_seq = CASE
+            WHEN coalesce(clock.pruned_seq, 0) > pruned_seq THEN clock.pruned_seq
+            ELSE pruned_seq
+        END
+        FOREACH (t IN expired | DELETE t)
+        """,
+        {"workspace_key": key, "cutoff": cutoff, "limit": TOMBSTONE_PRUNE_BATCH}
+    )
+    await result.consume()
 
-def create_node(manager: Neo4jManager, db_name: str, label: str, properties: Dict[str, Any]) -> Dict[str, Any]:
+async def create_node(
+    manager: AsyncNeo4jManager,
+    db_name: str,
+    workspace_id: str,
+    label: str,
+    properties: Dict[str, Any]
+) -> Dict[str, Any]:
     '''
      Create a node in the graph database.
 
      find :
-        manager (Neo4jManager)
+        manager (AsyncNeo4jManager)
         db_name (str)
+        workspace_id (str)
         label (str)
         properties (Dict[str, Any])
         
@@ -172,29 +1344,33 @@ def create_node(manager: Neo4jManager, db_name: str, label: str, properties: Dic
         for key, value in properties.items()
     }
 
+    ws_key = workspace_key(workspace_id)
     query = f"""
     CREATE (n:{label} $properties)
-    RETURN n
+    SET n.workspace_id = $workspace_key, n.created_seq = $seq, n.change_seq = $seq
+    RETURN n, ID(n) as id
     """
 
+    async def work(tx):
+        seq = await _next_change_seq(tx, ws_key)
+        result = await tx.run(query, {"properties": processed_properties, "workspace_key": ws_key, "seq": seq})
+        return await result.single()
+
     try:
         print(f"Creating node: {label} with name: {properties.get('name', 'unnamed')}")
-        result = manager.execute_with_retry(
-            db_name,
-            query,
-            {"properties": processed_properties}
-        )
+        record = await manager.execute_write(db_name, work)
         print(f"Node created successfully")
-        return result['data'][0] if result['data'] else None
+        return record
     except Exception as e:
         print(f"Error creating node: {str(e)}")
         print(f"Query: {query}")
         print(f"Properties: {processed_properties}")
         raise
 
-def create_relationship(
-    manager: Neo4jManager,
+async def create_relationship(
+    manager: AsyncNeo4jManager,
     db_name: str,
+    workspace_id: str,
     label1: str,
     name1: str,
     label2: str,
@@ -206,8 +1382,9 @@ def create_relationship(
      Create a relationship between nodes.
 
      find :
-        manager (Neo4jManager)
+        manager (AsyncNeo4jManager)
         db_name (str)
+        workspace_id (str)
         label1 (str)
         name1 (str)
         label2 (str)
@@ -229,77 +1406,80 @@ def create_relationship(
         for key, value in props.items()
     }
 
-    # Create property string for the query
-    if processed_props:
-        props_list = [f"{k}: ${k}" for k in processed_props.keys()]
-        props_str = f"{{{', '.join(props_list)}}}"
-        query = f"""
-        MATCH (a:{label1}), (b:{label2})
-        WHERE a.name = $name1 AND b.name = $name2
-        CREATE (a)-[r:{rel_type} {props_str}]->(b)
-        RETURN a, r, b
-        """
-    else:
-        query = f"""
-        MATCH (a:{label1}), (b:{label2})
-        WHERE a.name = $name1 AND b.name = $name2
-        CREATE (a)-[r:{rel_type}]->(b)
-        RETURN a, r, b
-        """
+    query = f"""
+    MATCH (a:{label1} {{workspace_id: $workspace_key, name: $name1}})
+    MATCH (b:{label2} {{workspace_id: $workspace_key, name: $name2}})
+    CREATE (a)-[r:{rel_type}]->(b)
+    SET r = $properties, r.workspace_id = $workspace_key, r.change_seq = $seq
+    RETURN a, r, b, ID(r) as id
+    """
 
     params = {
+        "workspace_key": workspace_key(workspace_id),
         "name1": name1,
         "name2": name2,
-        **processed_props
+        "properties": processed_props
     }
 
+    async def work(tx):
+        seq = await _next_change_seq(tx, params["workspace_key"])
+        result = await tx.run(query, {**params, "seq": seq})
+        records = [record async for record in result]
+        return records[0] if records else None
+
     try:
         print(f"Creating relationship: ({label1})-[{rel_type}]->({label2})")
-        result = manager.execute_with_retry(db_name, query, params)
+        record = await manager.execute_write(db_name, work)
         print(f"Relationship created successfully")
-        return result['data'][0] if result['data'] else None
+        return record
     except Exception as e:
         print(f"Error creating relationship: {str(e)}")
         print(f"Query: {query}")
         print(f"Parameters: {params}")
         raise
 
-def get_node_by_id(manager: Neo4jManager, db_name: str, node_id: int) -> Optional[Dict[str, Any]]:
+async def get_node_by_id(manager: AsyncNeo4jManager, db_name: str, workspace_id: str, node_id: int) -> Optional[Dict[str, Any]]:
     '''
      Retrieve a node by its ID.
 
      find :
-        manager (Neo4jManager)
+        manager (AsyncNeo4jManager)
         db_name (str)
+        workspace_id (str)
         node_id (int)
         
      Return : Optional[Dict[str, Any]]
     '''
     query = """
     MATCH (n)
-    WHERE ID(n) = $node_id
+    WHERE ID(n) = $node_id AND n.workspace_id = $workspace_key
     RETURN n
     """
     
-    result = manager.execute_with_retry(db_name, query, {"node_id": node_id})
+    result = await manager.execute_read(
+        db_name,
+        query,
+        {"node_id": node_id, "workspace_key": workspace_key(workspace_id)},
+        query_name="get_node_by_id"
+    )
     if result['data']:
         node = result['data'][0]["n"]
         return dict(node)
     return None
 
-def get_workspace_tasks(manager: Neo4jManager, db_name: str, workspace_id: str) -> Dict[str, List[Dict[str, Any]]]:
+async def get_workspace_tasks(manager: AsyncNeo4jManager, db_name: str, workspace_id: str) -> Dict[str, List[Dict[str, Any]]]:
     '''
      Get workspace tasks.
 
      find :
-        manager (Neo4jManager)
+        manager (AsyncNeo4jManager)
         db_name (str)
         workspace_id (str)
         
      Return : Dict[str, List[Dict[str, Any]]]
     '''
     query = """
-    MATCH (w:Workspace {name: $workspace})-[:CONTAINS_ROLE]->(r)-[:HAS_TASK]->(t)
+    MATCH (w:Workspace {workspace_id: $workspace_key, name: $workspace})-[:CONTAINS_ROLE]->(r)-[:HAS_TASK]->(t)
     MATCH (p:Person)-[:CAN_PERFORM]->(r)
     RETURN p.name as person,
            collect({
@@ -314,19 +1494,67 @@ def get_workspace_tasks(manager: Neo4jManager, db_name: str, workspace_id: str)
     ORDER BY p.name
     """
     
-    result = manager.execute_with_retry(db_name, query, {"workspace": workspace_id})
+    result = await manager.execute_read(
+        db_name,
+        query,
+        {"workspace": workspace_id, "workspace_key": workspace_key(workspace_id)},
+        query_name="workspace_tasks"
+    )
     tasks_by_person = {}
     for record in result['data']:
         tasks_by_person[record["person"]] = record["tasks"]
     return tasks_by_person
 
-def update_node_by_id(manager: Neo4jManager, db_name: str, node_id: int, new_properties: Dict[str, Any]) -> bool:
+async def get_assigned_tasks(manager: AsyncNeo4jManager, db_name: str, workspace_id: str) -> Dict[str, List[Dict[str, Any]]]:
+    '''
+     Get the tasks actually assigned to each member, shaped like get_workspace_tasks.
+
+     find :
+        manager (AsyncNeo4jManager)
+        db_name (str)
+        workspace_id (str)
+
+     Return : Dict[str, List[Dict[str, Any]]]
+    '''
+    query = """
+    MATCH (t:Task {workspace_id: $workspace_key})-[:ASSIGNED_TO]->(p:Person)
+    OPTIONAL MATCH (r:Role)-[:HAS_TASK]->(t)
+    WITH p, t, min(r.name) as role
+    RETURN p.name as person,
+           collect({
+               task: t.name,
+               role: role,
+               node_id: ID(t),
+               status: t.status,
+               created_at: t.created_at,
+               priority: t.priority,
+               estimated_hours: t.estimated_hours
+           }) as tasks
+    ORDER BY p.name
+    """
+
+    result = await manager.execute_read(
+        db_name,
+        query,
+        {"workspace_key": workspace_key(workspace_id)},
+        query_name="assigned_tasks"
+    )
+    return {record["person"]: record["tasks"] for record in result['data']}
+
+async def update_node_by_id(
+    manager: AsyncNeo4jManager,
+    db_name: str,
+    workspace_id: str,
+    node_id: int,
+    new_properties: Dict[str, Any]
+) -> bool:
     '''
      Update node properties.
 
      find :
-        manager (Neo4jManager): Database manager
+        manager (AsyncNeo4jManager): Database manager
         db_name (str): Database name
+        workspace_id (str): Workspace the node belongs to
         node_id (int): Node ID
         new_properties (Dict[str, Any]): New properties to set
         
@@ -338,67 +1566,126 @@ def update_node_by_id(manager: Neo4jManager, db_name: str, node_id: int, new_pro
     processed_properties = {
         key: serialize_property_value(value)
         for key, value in new_properties.items()
+        if key not in RESERVED_NODE_PROPERTIES
     }
     
-    query = """
+    ws_key = workspace_key(workspace_id)
+    query = f"""
     MATCH (n)
-    WHERE ID(n) = $node_id
-    SET n += $new_properties
-    RETURN n
+    WHERE ID(n) = $node_id AND n.workspace_id = $workspace_key AND {_graph_node_condition('n')}
+    RETURN ID(n) as id
     """
-    
-    result = manager.execute_with_retry(
-        db_name,
-        query,
-        {"node_id": node_id, "new_properties": processed_properties}
-    )
-    return bool(result['data'])
 
-def delete_node_by_id(manager: Neo4jManager, db_name: str, node_id: int) -> bool:
+    async def work(tx) -> bool:
+        result = await tx.run(query, {"node_id": node_id, "workspace_key": ws_key})
+        if await result.single() is None:
+            return False
+
+        # Only an update that happened advances the clock
+        seq = await _next_change_seq(tx, ws_key)
+        result = await tx.run(
+            """
+            MATCH (n) WHERE ID(n) = $node_id
+            SET n += $new_properties, n.workspace_id = $workspace_key, n.change_seq = $seq
+            """,
+            {"node_id": node_id, "new_properties": processed_properties, "workspace_key": ws_key, "seq": seq}
+        )
+        await result.consume()
+        return True
+
+    return await manager.execute_write(db_name, work)
+
+async def delete_node_by_id(manager: AsyncNeo4jManager, db_name: str, workspace_id: str, node_id: int) -> bool:
     '''
-     Delete a node and its relationships from the database.
+     Delete a node and its relationships, leaving tombstones for change polling.
 
      find :
-        manager (Neo4jManager)
+        manager (AsyncNeo4jManager)
         db_name (str)
+        workspace_id (str)
         node_id (int)
         
      Return : bool
     '''
-    # Check if node exists
-    check_query = """
-    MATCH (n) 
-    WHERE ID(n) = $node_id
-    RETURN n
-    """
-    
-    result = manager.execute_with_retry(db_name, check_query, {"node_id": node_id})
-    if not result['data']:
-        return False
-    
-    # Delete node and relationships
-    delete_query = """
-    MATCH (n)
-    WHERE ID(n) = $node_id
-    DETACH DELETE n
-    """
-    
-    delete_result = manager.execute_with_retry(db_name, delete_query, {"node_id": node_id})
-    return True
+    ws_key = workspace_key(workspace_id)
+
+    async def work(tx) -> bool:
+        result = await tx.run(
+            f"""
+            MATCH (n) WHERE ID(n) = $node_id AND n.workspace_id = $workspace_key AND {_graph_node_condition('n')}
+            OPTIONAL MATCH (n)-[r]-()
+            RETURN ID(n) as id, collect(DISTINCT ID(r)) as edge_ids
+            """,
+            {"node_id": node_id, "workspace_key": ws_key}
+        )
+        record = await result.single()
+        if record is None:
+            return False
+
+        seq = await _next_change_seq(tx, ws_key)
+        result = await tx.run(
+            """
+            MATCH (n) WHERE ID(n) = $node_id
+            DETACH DELETE n
+            """,
+            {"node_id": node_id}
+        )
+        await result.consume()
+
+        deleted = [{"entity": "edge", "ref_id": edge_id} for edge_id in record["edge_ids"]]
+        deleted.append({"entity": "node", "ref_id": node_id})
+        await _record_tombstones(tx, ws_key, seq, deleted, datetime.now().isoformat())
+        return True
+
+    return await manager.execute_write(db_name, work)
+
+async def delete_edge_by_id(manager: AsyncNeo4jManager, db_name: str, workspace_id: str, edge_id: int) -> bool:
+    '''
+     Delete a relationship, leaving a tombstone for change polling.
 
-def get_graph_statistics(manager: Neo4jManager, db_name: str, workspace_id: str) -> Dict[str, Any]:
+     find :
+        manager (AsyncNeo4jManager)
+        db_name (str)
+        workspace_id (str)
+        edge_id (int)
+
+     Return : bool
+    '''
+    ws_key = workspace_key(workspace_id)
+
+    async def work(tx) -> bool:
+        result = await tx.run(
+            """
+            MATCH ()-[r]->()
+            WHERE ID(r) = $edge_id AND r.workspace_id = $workspace_key
+            DELETE r
+            RETURN count(*) as deleted
+            """,
+            {"edge_id": edge_id, "workspace_key": ws_key}
+        )
+        if (await result.single())["deleted"] == 0:
+            return False
+
+        # Only a delete that happened advances the clock
+        seq = await _next_change_seq(tx, ws_key)
+        await _record_tombstones(tx, ws_key, seq, [{"entity": "edge", "ref_id": edge_id}], datetime.now().isoformat())
+        return True
+
+    return await manager.execute_write(db_name, work)
+
+async def get_graph_statistics(manager: AsyncNeo4jManager, db_name: str, workspace_id: str) -> Dict[str, Any]:
     '''
      Get graph statistics.
 
      find :
-        manager (Neo4jManager)
+        manager (AsyncNeo4jManager)
         db_name (str)
         workspace_id (str)
         
      Return : Dict[str, Any]
     '''
     query = """
-    MATCH (w:Workspace {name: $workspace})
+    MATCH (w:Workspace {workspace_id: $workspace_key, name: $workspace})
     OPTIONAL MATCH (w)-[:CONTAINS_ROLE]->(r)
     OPTIONAL MATCH (r)-[:HAS_TASK]->(t)
     OPTIONAL MATCH (p:Person)-[:CAN_PERFORM]->(r)
@@ -408,14 +1695,24 @@ def get_graph_statistics(manager: Neo4jManager, db_name: str, workspace_id: str)
         count(DISTINCT p) as person_count,
         collect(DISTINCT r.name) as roles,
         collect(DISTINCT p.name) as team_members,
-        collect(DISTINCT t.status) as task_statuses
+        collect(DISTINCT t.status) as task_statuses,
+        collect(DISTINCT {task: ID(t), status: t.status}) as task_rows
     """
     
-    result = manager.execute_with_retry(db_name, query, {"workspace": workspace_id})
+    result = await manager.execute_read(
+        db_name,
+        query,
+        {"workspace": workspace_id, "workspace_key": workspace_key(workspace_id)},
+        query_name="graph_statistics"
+    )
     if not result['data']:
         return {}
         
     record = result['data'][0]
+    status_counts: Dict[str, int] = {}
+    for row in record["task_rows"]:
+        if row["task"] is not None:
+            status_counts[str(row["status"])] = status_counts.get(str(row["status"]), 0) + 1
     return {
         "role_count": record["role_count"],
         "task_count": record["task_count"],
@@ -423,119 +1720,199 @@ def get_graph_statistics(manager: Neo4jManager, db_name: str, workspace_id: str)
         "roles": record["roles"],
         "team_members": record["team_members"],
         "task_statuses": record["task_statuses"],
+        "task_status_counts": status_counts,
         "workspace_id": workspace_id,
         "timestamp": datetime.now().isoformat()
     }
 
-def add_task_to_role(
-    manager: Neo4jManager, 
+async def add_task_to_role(
+    manager: AsyncNeo4jManager, 
     db_name: str, 
+    workspace_id: str,
     role_name: str, 
     task_name: str,
     task_properties: Dict[str, Any] = None
-) -> Dict[str, Any]:
+) -> Optional[Dict[str, Any]]:
     '''
-     Add a new task to an existing role.
+     Add a new task to an existing role in a single transaction.
 
      find :
-        manager (Neo4jManager)
+        manager (AsyncNeo4jManager)
         db_name (str)
+        workspace_id (str)
         role_name (str)
         task_name (str)
         task_properties (Dict[str, Any], optional)
         
-     Return : Dict[str, Any]
+     Return : Optional[Dict[str, Any]]: None when the role does not exist
     '''
     # Prepare task properties
     base_properties = {
         "name": task_name,
         "type": "task",
         "status": "pending",
+        "source": USER_SOURCE,
         "created_at": datetime.now().isoformat()
     }
     if task_properties:
         base_properties.update(task_properties)
 
-    # Create task node
-    task_node = create_node(manager, db_name, "Task", base_properties)
-    if not task_node:
-        raise Exception(f"Failed to create task node: {task_name}")
+    processed_properties = {
+        key: serialize_property_value(value)
+        for key, value in base_properties.items()
+    }
+
+    ws_key = workspace_key(workspace_id)
 
-    # Create relationship
-    create_relationship(
-        manager,
-        db_name,
-        "Role", role_name,
-        "Task", task_name,
-        "HAS_TASK",
-        {"created_at": base_properties["created_at"]}
-    )
+    async def work(tx) -> Optional[int]:
+        result = await tx.run(
+            "MATCH (r:Role {workspace_id: $workspace_key, name: $role_name}) RETURN ID(r) as id LIMIT 1",
+            {"workspace_key": ws_key, "role_name": role_name}
+        )
+        role = await result.single()
+        if role is None:
+            return None
 
-    return {"task": task_node, "role": role_name}
+        seq = await _next_change_seq(tx, ws_key)
+        result = await tx.run(
+            """
+            MATCH (r) WHERE ID(r) = $role_id
+            CREATE (r)-[rel:HAS_TASK {workspace_id: $workspace_key, created_at: $timestamp, change_seq: $seq}]->(t:Task)
+            SET t = $properties, t.workspace_id = $workspace_key, t.created_seq = $seq, t.change_seq = $seq
+            RETURN ID(t) as id
+            """,
+            {
+                "workspace_key": ws_key,
+                "role_id": role["id"],
+                "properties": processed_properties,
+                "timestamp": base_properties["created_at"],
+                "seq": seq
+            }
+        )
+        return (await result.single())["id"]
+
+    task_id = await manager.execute_write(db_name, work)
+    if task_id is None:
+        return None
+    return {"node_id": task_id, "role": role_name, "properties": base_properties}
 
-def assign_task(
-    manager: Neo4jManager,
+async def assign_task(
+    manager: AsyncNeo4jManager,
     db_name: str,
+    workspace_id: str,
     task_id: int,
     assignee_name: str
 ) -> bool:
     '''
-     Assign a task to a person.
+     Assign a task to a person, replacing any existing assignment.
 
      find :
-        manager (Neo4jManager)
+        manager (AsyncNeo4jManager)
         db_name (str)
+        workspace_id (str)
         task_id (int)
         assignee_name (str)
         
-     Return : bool
+     Return : bool: False when the task or person does not exist
     '''
-    # Delete existing assignment if any
-    query_delete = """
-    MATCH (t)-[r:ASSIGNED_TO]->()
-    WHERE ID(t) = $task_id
-    DELETE r
-    """
-    
-    manager.execute_with_retry(db_name, query_delete, {"task_id": task_id})
-    
-    # Create new assignment
-    query_assign = """
-    MATCH (t), (p:Person {name: $assignee})
-    WHERE ID(t) = $task_id
-    CREATE (t)-[r:ASSIGNED_TO]->(p)
-    SET r.created_at = $timestamp
-    RETURN r
-    """
-    
     timestamp = datetime.now().isoformat()
-    result = manager.execute_with_retry(
+    ws_key = workspace_key(workspace_id)
+
+    async def work(tx) -> bool:
+        result = await tx.run(
+            """
+            MATCH (t) WHERE ID(t) = $task_id AND t.workspace_id = $workspace_key
+            MATCH (p:Person {workspace_id: $workspace_key, name: $assignee})
+            RETURN ID(p) as id LIMIT 1
+            """,
+            {"task_id": task_id, "workspace_key": ws_key, "assignee": assignee_name}
+        )
+        person = await result.single()
+        if person is None:
+            return False
+
+        seq = await _next_change_seq(tx, ws_key)
+        # Delete existing assignment if any
+        result = await tx.run(
+            """
+            MATCH (t)-[r:ASSIGNED_TO]->()
+            WHERE ID(t) = $task_id
+            WITH r, ID(r) as id
+            DELETE r
+            RETURN id
+            """,
+            {"task_id": task_id}
+        )
+        removed = [{"entity": "edge", "ref_id": record["id"]} async for record in result]
+        await _record_tombstones(tx, ws_key, seq, removed, timestamp)
+
+        # Create new assignment
+        result = await tx.run(
+            """
+            MATCH (t) WHERE ID(t) = $task_id
+            MATCH (p) WHERE ID(p) = $person_id
+            CREATE (t)-[r:ASSIGNED_TO]->(p)
+            SET r.workspace_id = $workspace_key, r.created_at = $timestamp, r.change_seq = $seq
+            """,
+            {
+                "task_id": task_id,
+                "person_id": person["id"],
+                "workspace_key": ws_key,
+                "timestamp": timestamp,
+                "seq": seq
+            }
+        )
+        await result.consume()
+        return True
+
+    return await manager.execute_write(db_name, work)
+
+async def get_workspace_members(manager: AsyncNeo4jManager, db_name: str, workspace_id: str) -> List[Dict[str, Any]]:
+    '''
+     Get all team members of a workspace.
+
+     find :
+        manager (AsyncNeo4jManager)
+        db_name (str)
+        workspace_id (str)
+
+     Return : List[Dict[str, Any]]
+    '''
+    query = """
+    MATCH (p:Person)
+    WHERE p.workspace_id = $workspace_key
+    RETURN collect({
+        name: p.name,
+        type: p.type,
+        details: p.details
+    }) as members
+    """
+
+    result = await manager.execute_read(
         db_name,
-        query_assign,
-        {
-            "task_id": task_id,
-            "assignee": assignee_name,
-            "timestamp": timestamp
-        }
+        query,
+        {"workspace_key": workspace_key(workspace_id)},
+        query_name="workspace_members"
     )
-    
-    return bool(result['data'])
+    return result['data'][0]["members"]
 
-def get_task_assignments(
-    manager: Neo4jManager,
-    db_name: str
+async def get_task_assignments(
+    manager: AsyncNeo4jManager,
+    db_name: str,
+    workspace_id: str
 ) -> Dict[str, List[Dict[str, Any]]]:
     '''
      Get all task assignments grouped by person.
 
      find :
-        manager (Neo4jManager)
+        manager (AsyncNeo4jManager)
         db_name (str)
+        workspace_id (str)
         
      Return : Dict[str, List[Dict[str, Any]]]
     '''
     query = """
-    MATCH (p:Person)<-[a:ASSIGNED_TO]-(t:Task)
+    MATCH (p:Person {workspace_id: $workspace_key})<-[a:ASSIGNED_TO]-(t:Task)
     RETURN p.name as person,
            collect({
                task_id: ID(t),
@@ -546,10 +1923,529 @@ def get_task_assignments(
            }) as tasks
     """
     
-    result = manager.execute_with_retry(db_name, query)
+    result = await manager.execute_read(
+        db_name,
+        query,
+        {"workspace_key": workspace_key(workspace_id)},
+        query_name="task_assignments"
+    )
     assignments = {}
     
     for record in result['data']:
         assignments[record["person"]] = record["tasks"]
     
-    return assignments
\ No newline at end of file
+    return assignments
+
+def _chunks(rows: List[Any], size: int) -> Iterator[List[Any]]:
+    '''
+     Split rows into consecutive batches.
+
+     find :
+        rows (List[Any])
+        size (int)
+
+     Return : Iterator[List[Any]]
+    '''
+    for start in range(0, len(rows), max(size, 1)):
+        yield rows[start:start + size]
+
+ANALYSIS_SNAPSHOT_QUERIES = {
+    "workspace": """
+        MATCH (w:Workspace) WHERE w.workspace_id = $workspace_key
+        RETURN ID(w) as id ORDER BY id LIMIT 1
+    """,
+    "roles": """
+        MATCH (r:Role) WHERE r.workspace_id = $workspace_key
+        RETURN r.name as name, ID(r) as id, r.task_count as task_count ORDER BY id
+    """,
+    "tasks": """
+        MATCH (r:Role)-[:HAS_TASK]->(t:Task) WHERE r.workspace_id = $workspace_key
+        RETURN r.name as role, t.name as name, ID(t) as id, t.source as source,
+               t.updated_at IS NOT NULL OR EXISTS { (t)-[:ASSIGNED_TO]->() } as touched
+        ORDER BY id
+    """,
+    "people": """
+        MATCH (p:Person) WHERE p.workspace_id = $workspace_key
+        RETURN p.name as name, ID(p) as id, p.details as details, p.role_count as role_count,
+               EXISTS { (p)<-[:ASSIGNED_TO]-() } as assigned
+        ORDER BY id
+    """,
+    "capabilities": """
+        MATCH (p:Person)-[c:CAN_PERFORM]->(r:Role) WHERE p.workspace_id = $workspace_key
+        RETURN p.name as person, r.name as role, ID(c) as id ORDER BY id
+    """
+}
+
+async def _read_analysis_snapshot(tx, key: str) -> Dict[str, Any]:
+    '''
+     Read the analysis graph of a workspace by natural key (see analysis_diff.empty_snapshot).
+
+     Only names, IDs and the few properties the diff compares are returned.
+
+     find :
+        tx (AsyncManagedTransaction)
+        key (str): Workspace key
+
+     Return : Dict[str, Any]
+    '''
+    snapshot = empty_snapshot()
+    params = {"workspace_key": key}
+
+    result = await tx.run(ANALYSIS_SNAPSHOT_QUERIES["workspace"], params)
+    record = await result.single()
+    snapshot["workspace"] = record["id"] if record else None
+
+    result = await tx.run(ANALYSIS_SNAPSHOT_QUERIES["roles"], params)
+    async for record in result:
+        snapshot["roles"].setdefault(record["name"], {"id": record["id"], "task_count": record["task_count"]})
+
+    result = await tx.run(ANALYSIS_SNAPSHOT_QUERIES["tasks"], params)
+    async for record in result:
+        snapshot["tasks"].setdefault(
+            (record["role"], record["name"]),
+            {"id": record["id"], "source": record["source"], "touched": record["touched"]}
+        )
+
+    result = await tx.run(ANALYSIS_SNAPSHOT_QUERIES["people"], params)
+    async for record in result:
+        snapshot["people"].setdefault(record["name"], {
+            "id": record["id"],
+            "details": record["details"],
+            "role_count": record["role_count"],
+            "assigned": record["assigned"]
+        })
+
+    result = await tx.run(ANALYSIS_SNAPSHOT_QUERIES["capabilities"], params)
+    async for record in result:
+        snapshot["capabilities"].setdefault((record["person"], record["role"]), record["id"])
+
+    return snapshot
+
+async def write_analysis_graph(
+    manager: AsyncNeo4jManager,
+    db_name: str,
+    workspace_id: str,
+    document_analysis: Dict[str, Any],
+    team_analysis: Dict[str, List[str]],
+    team_details: Dict[str, Any],
+    document_count: int,
+    batch_size: int = 500,
+    progress: Optional[Callable[[str, Dict[str, Any]], None]] = None
+) -> Dict[str, int]:
+    '''
+     Bring the workspace graph in line with an analysis result in one transaction.
+
+     The stored analysis graph is read by natural key and diffed against the
+     new result (see analysis_diff.diff_analysis); only the planned creates,
+     updates and deletes are written, with a few UNWIND statements each. Running
+     the same analysis twice writes nothing but the Workspace node, and task
+     status, assignee and priority set by users are kept.
+
+     find :
+        manager (AsyncNeo4jManager)
+        db_name (str)
+        workspace_id (str)
+        document_analysis (Dict[str, Any]): Roles and tasks from process_documents
+        team_analysis (Dict[str, List[str]]): Possible roles per member from analyze_team_roles
+        team_details (Dict[str, Any]): Member details keyed by member name
+        document_count (int)
+        batch_size (int): Maximum rows sent per UNWIND statement
+        progress (Optional[Callable[[str, Dict[str, Any]], None]]): Receives a
+            graph_batch_written {step, rows, duration} event per statement; the
+            events of a retried transaction are reported again
+
+     Return : Dict[str, int]: Totals of the analysis and the number of roles, tasks,
+        people and capabilities created, updated and deleted (see analysis_diff.plan_summary)
+    '''
+    timestamp = datetime.now().isoformat()
+    ws_key = workspace_key(workspace_id)
+
+    async def work(tx) -> Dict[str, int]:
+        async def run_batches(step: str, query: str, rows: List[Any], **params: Any) -> List[Any]:
+            records = []
+            for batch in _chunks(rows, batch_size):
+                started = time.perf_counter()
+                result = await tx.run(
+                    query,
+                    {"rows": batch, "workspace_key": ws_key, "timestamp": timestamp, **params}
+                )
+                records.extend([record async for record in result])
+                if progress:
+                    progress("graph_batch_written", {
+                        "step": step,
+                        "rows": len(batch),
+                        "duration": round(time.perf_counter() - started, 3)
+                    })
+            return records
+
+        # Taking the change clock first serialises concurrent analyses of a workspace
+        seq = await _next_change_seq(tx, ws_key)
+        snapshot = await _read_analysis_snapshot(tx, ws_key)
+        plan = diff_analysis(snapshot, document_analysis, team_analysis, team_details)
+
+        workspace_properties = {"document_count": document_count, "team_size": len(team_details)}
+        if snapshot["workspace"] is None:
+            result = await tx.run(
+                """
+                CREATE (w:Workspace $properties)
+                SET w.workspace_id = $workspace_key, w.created_seq = $seq, w.change_seq = $seq
+                RETURN ID(w) as id
+                """,
+                {"properties": {
+                    "name": workspace_id,
+                    "type": "workspace",
+                    "created_at": timestamp,
+                    **workspace_properties
+                }, "workspace_key": ws_key, "seq": seq}
+            )
+            workspace_node_id = (await result.single())["id"]
+        else:
+            workspace_node_id = snapshot["workspace"]
+            result = await tx.run(
+                """
+                MATCH (w) WHERE ID(w) = $workspace_node_id
+                SET w += $properties, w.analyzed_at = $timestamp, w.change_seq = $seq
+                """,
+                {
+                    "workspace_node_id": workspace_node_id,
+                    "properties": workspace_properties,
+                    "timestamp": timestamp,
+                    "seq": seq
+                }
+            )
+            await result.consume()
+
+        # Deletes first, so their edges are gone before anything is linked again
+        deleted: List[Dict[str, Any]] = []
+        records = await run_batches(
+            "delete_nodes",
+            """
+            UNWIND $rows AS node_id
+            MATCH (n) WHERE ID(n) = node_id
+            OPTIONAL MATCH (n)-[r]-()
+            WITH n, node_id, collect(ID(r)) as edge_ids
+            DETACH DELETE n
+            RETURN node_id, edge_ids
+            """,
+            plan["tasks"]["delete"] + plan["roles"]["delete"] + plan["people"]["delete"]
+        )
+        edge_ids = {edge_id for record in records for edge_id in record["edge_ids"]}
+        deleted.extend({"entity": "node", "ref_id": record["node_id"]} for record in records)
+        records = await run_batches(
+            "delete_capabilities",
+            """
+            UNWIND $rows AS edge_id
+            MATCH ()-[r:CAN_PERFORM]->() WHERE ID(r) = edge_id
+            DELETE r
+            RETURN edge_id
+            """,
+            plan["capabilities"]["delete"]
+        )
+        edge_ids.update(record["edge_id"] for record in records)
+        deleted.extend({"entity": "edge", "ref_id": edge_id} for edge_id in sorted(edge_ids))
+        await _record_tombstones(tx, ws_key, seq, deleted, timestamp)
+
+        await run_batches(
+            "update_roles",
+            """
+            UNWIND $rows AS row
+            MATCH (r) WHERE ID(r) = row.id
+            SET r.task_count = row.task_count, r.change_seq = $seq
+            """,
+            plan["roles"]["update"],
+            seq=seq
+        )
+        role_ids = {name: role["id"] for name, role in snapshot["roles"].items()}
+        records = await run_batches(
+            "create_roles",
+            """
+            MATCH (w) WHERE ID(w) = $workspace_node_id
+            UNWIND $rows AS row
+            CREATE (w)-[:CONTAINS_ROLE {workspace_id: $workspace_key, created_at: $timestamp, change_seq: $seq}]->(r:Role)
+            SET r = row, r.created_at = $timestamp, r.workspace_id = $workspace_key,
+                r.created_seq = $seq, r.change_seq = $seq
+            RETURN row.name as name, ID(r) as id
+            """,
+            plan["roles"]["create"],
+            workspace_node_id=workspace_node_id,
+            seq=seq
+        )
+        role_ids.update({record["name"]: record["id"] for record in records})
+
+        await run_batches(
+            "adopt_tasks",
+            """
+            UNWIND $rows AS task_id
+            MATCH (t) WHERE ID(t) = task_id
+            SET t.source = $source, t.change_seq = $seq
+            """,
+            plan["tasks"]["adopt"],
+            source=ANALYSIS_SOURCE,
+            seq=seq
+        )
+        task_rows = [
+            {
+                "role_id": role_ids[task["role"]],
+                "properties": {
+                    "name": task["name"],
+                    "type": "task",
+                    "status": "pending",
+                    "priority": "medium",
+                    "estimated_hours": 0,
+                    "source": ANALYSIS_SOURCE,
+                    "created_at": timestamp
+                }
+            }
+            for task in plan["tasks"]["create"]
+        ]
+        await run_batches(
+            "create_tasks",
+            """
+            UNWIND $rows AS row
+            MATCH (r) WHERE ID(r) = row.role_id
+            CREATE (r)-[:HAS_TASK {workspace_id: $workspace_key, created_at: $timestamp, change_seq: $seq}]->(t:Task)
+            SET t = row.properties, t.workspace_id = $workspace_key, t.created_seq = $seq, t.change_seq = $seq
+            """,
+            task_rows,
+            seq=seq
+        )
+
+        await run_batches(
+            "update_people",
+            """
+            UNWIND $rows AS row
+            MATCH (p) WHERE ID(p) = row.id
+            SET p.details = row.details, p.role_count = row.role_count, p.change_seq = $seq
+            """,
+            plan["people"]["update"],
+            seq=seq
+        )
+        person_ids = {name: person["id"] for name, person in snapshot["people"].items()}
+        records = await run_batches(
+            "create_people",
+            """
+            MATCH (w) WHERE ID(w) = $workspace_node_id
+            UNWIND $rows AS row
+            CREATE (w)-[:HAS_MEMBER {workspace_id: $workspace_key, created_at: $timestamp, change_seq: $seq}]->(p:Person)
+            SET p = row, p.created_at = $timestamp, p.workspace_id = $workspace_key,
+                p.created_seq = $seq, p.change_seq = $seq
+            RETURN row.name as name, ID(p) as id
+            """,
+            plan["people"]["create"],
+            workspace_node_id=workspace_node_id,
+            seq=seq
+        )
+        person_ids.update({record["name"]: record["id"] for record in records})
+
+        capability_rows = [
+            {"person_id": person_ids[capability["person"]], "role_id": role_ids[capability["role"]]}
+            for capability in plan["capabilities"]["create"]
+        ]
+        await run_batches(
+            "create_capabilities",
+            """
+            UNWIND $rows AS row
+            MATCH (p) WHERE ID(p) = row.person_id
+            MATCH (r) WHERE ID(r) = row.role_id
+            CREATE (p)-[:CAN_PERFORM {workspace_id: $workspace_key, created_at: $timestamp, change_seq: $seq}]->(r)
+            """,
+            capability_rows,
+            seq=seq
+        )
+
+        return plan_summary(plan)
+
+    print(f"Writing analysis graph for {workspace_id} in one transaction...")
+    summary = await manager.execute_write(db_name, work)
+    print(f"Analysis graph written: {summary}")
+    return summary
+
+async def apply_graph_batch(
+    manager: AsyncNeo4jManager,
+    db_name: str,
+    workspace_id: str,
+    batch: GraphBatch,
+    batch_size: int = 500
+) -> Dict[str, List[Dict[str, Any]]]:
+    '''
+     Apply node updates, assignments, edge deletes and node deletes in one write transaction.
+
+     Items referring to missing nodes or edges are reported as not applied and
+     do not abort the rest of the batch. A task assigned more than once keeps
+     the last assignment. Results are listed in request order per section.
+     The change clock only advances when at least one item applied.
+
+     find :
+        manager (AsyncNeo4jManager)
+        db_name (str)
+        workspace_id (str)
+        batch (GraphBatch)
+        batch_size (int): Maximum rows sent per UNWIND statement
+
+     Return : Dict[str, List[Dict[str, Any]]]
+    '''
+    timestamp = datetime.now().isoformat()
+    ws_key = workspace_key(workspace_id)
+    graph_node = f"n.workspace_id = $workspace_key AND {_graph_node_condition('n')}"
+
+    update_rows = [
+        {
+            "index": index,
+            "node_id": update.node_id,
+            "properties": {
+                **{key: serialize_property_value(value) for key, value in update.properties.items()},
+                "updated_at": timestamp
+            }
+        }
+        for index, update in enumerate(batch.node_updates)
+    ]
+    assignment_rows = [
+        {"index": index, "task_id": assignment.task_id, "assignee": assignment.assignee}
+        for index, assignment in enumerate(batch.assignments)
+    ]
+    edge_ids = list(dict.fromkeys(batch.edge_deletes))
+    node_ids = list(dict.fromkeys(batch.node_deletes))
+
+    async def work(tx) -> Dict[str, set]:
+        seq: Optional[int] = None
+
+        async def change_seq() -> int:
+            # Allocated on first use so a batch that applies nothing leaves the clock alone
+            nonlocal seq
+            if seq is None:
+                seq = await _next_change_seq(tx, ws_key)
+            return seq
+
+        updated, assigned, deleted_edges, deleted_nodes = set(), set(), set(), set()
+        updated_node_ids: List[int] = []
+        tombstones: Dict[int, str] = {}
+
+        for rows in _chunks(update_rows, batch_size):
+            result = await tx.run(
+                f"""
+                UNWIND $rows AS row
+                MATCH (n) WHERE ID(n) = row.node_id AND {graph_node}
+                SET n += row.properties, n.workspace_id = $workspace_key
+                RETURN row.index as index, row.node_id as node_id
+                """,
+                {"rows": rows, "workspace_key": ws_key}
+            )
+            async for record in result:
+                updated.add(record["index"])
+                updated_node_ids.append(record["node_id"])
+
+        for ids in _chunks(list(dict.fromkeys(updated_node_ids)), batch_size):
+            result = await tx.run(
+                "UNWIND $ids AS node_id MATCH (n) WHERE ID(n) = node_id SET n.change_seq = $seq",
+                {"ids": ids, "seq": await change_seq()}
+            )
+            await result.consume()
+
+        # Resolve assignments first so a missing person leaves the old assignment alone
+        valid_assignments: Dict[int, Dict[str, Any]] = {}
+        for rows in _chunks(assignment_rows, batch_size):
+            result = await tx.run(
+                f"""
+                UNWIND $rows AS row
+                MATCH (n) WHERE ID(n) = row.task_id AND {graph_node}
+                MATCH (p:Person {{workspace_id: $workspace_key, name: row.assignee}})
+                RETURN row.index as index, row.task_id as task_id, min(ID(p)) as person_id
+                """,
+                {"rows": rows, "workspace_key": ws_key}
+            )
+            async for record in result:
+                assigned.add(record["index"])
+                previous = valid_assignments.get(record["task_id"])
+                if previous is None or previous["index"] < record["index"]:
+                    valid_assignments[record["task_id"]] = record.data()
+
+        new_assignments = list(valid_assignments.values())
+        for rows in _chunks(new_assignments, batch_size):
+            result = await tx.run(
+                """
+                UNWIND $rows AS row
+                MATCH (t)-[r:ASSIGNED_TO]->() WHERE ID(t) = row.task_id
+                WITH r, ID(r) as id
+                DELETE r
+                RETURN id
+                """,
+                {"rows": rows}
+            )
+            tombstones.update({record["id"]: "edge" async for record in result})
+
+            result = await tx.run(
+                """
+                UNWIND $rows AS row
+                MATCH (t) WHERE ID(t) = row.task_id
+                MATCH (p) WHERE ID(p) = row.person_id
+                CREATE (t)-[r:ASSIGNED_TO]->(p)
+                SET r.workspace_id = $workspace_key, r.created_at = $timestamp, r.change_seq = $seq
+                """,
+                {"rows": rows, "workspace_key": ws_key, "timestamp": timestamp, "seq": await change_seq()}
+            )
+            await result.consume()
+
+        for ids in _chunks(edge_ids, batch_size):
+            result = await tx.run(
+                """
+                UNWIND $ids AS edge_id
+                MATCH ()-[r]->() WHERE ID(r) = edge_id AND r.workspace_id = $workspace_key
+                DELETE r
+                RETURN edge_id
+                """,
+                {"ids": ids, "workspace_key": ws_key}
+            )
+            deleted_edges.update([record["edge_id"] async for record in result])
+        tombstones.update({edge_id: "edge" for edge_id in deleted_edges})
+
+        for ids in _chunks(node_ids, batch_size):
+            result = await tx.run(
+                f"""
+                UNWIND $ids AS node_id
+                MATCH (n) WHERE ID(n) = node_id AND {graph_node}
+                OPTIONAL MATCH (n)-[r]-()
+                WITH n, node_id, collect(DISTINCT ID(r)) as edge_ids
+                DETACH DELETE n
+                RETURN node_id, edge_ids
+                """,
+                {"ids": ids, "workspace_key": ws_key}
+            )
+            async for record in result:
+                deleted_nodes.add(record["node_id"])
+                tombstones.update({edge_id: "edge" for edge_id in record["edge_ids"]})
+
+        if tombstones or deleted_nodes:
+            await _record_tombstones(
+                tx,
+                ws_key,
+                await change_seq(),
+                [{"entity": "edge", "ref_id": ref_id} for ref_id in tombstones]
+                + [{"entity": "node", "ref_id": ref_id} for ref_id in deleted_nodes],
+                timestamp
+            )
+        return {
+            "updated": updated,
+            "assigned": assigned,
+            "deleted_edges": deleted_edges,
+            "deleted_nodes": deleted_nodes
+        }
+
+    applied = await manager.execute_write(db_name, work)
+    return {
+        "node_updates": [
+            {"node_id": update.node_id, "applied": index in applied["updated"]}
+            for index, update in enumerate(batch.node_updates)
+        ],
+        "assignments": [
+            {"task_id": assignment.task_id, "assignee": assignment.assignee, "applied": index in applied["assigned"]}
+            for index, assignment in enumerate(batch.assignments)
+        ],
+        "edge_deletes": [
+            {"edge_id": edge_id, "applied": edge_id in applied["deleted_edges"]}
+            for edge_id in batch.edge_deletes
+        ],
+        "node_deletes": [
+            {"node_id": node_id, "applied": node_id in applied["deleted_nodes"]}
+            for node_id in batch.node_deletes
+        ]
+    }
@@ -0,0 +1,488 @@
+'''
+ Graph Store Service Module is defines the backend-independent interface to workspace graphs and its Neo4j implementation.
+
+ Author: Tanapat Chamted
+'''
+
+from abc import ABC, abstractmethod
+from typing import Dict, Any, Optional, List, Tuple, AsyncIterator, Callable
+
+from src.core.models import GraphFilter
+from src.services.graph_manager import (
+    AsyncNeo4jManager,
+    create_node,
+    create_relationship,
+    get_node_by_id,
+    update_node_by_id,
+    delete_node_by_id,
+    delete_edge_by_id,
+    get_workspace_tasks,
+    get_assigned_tasks,
+    get_graph_statistics,
+    get_workspace_members,
+    get_change_version,
+    get_graph_changes,
+    force_change_resync,
+    add_task_to_role,
+    assign_task,
+    write_analysis_graph,
+    query_workspace_graph,
+    iter_workspace_graph
+)
+
+def split_task_views(
+    eligible: Dict[str, List[Dict[str, Any]]],
+    assigned: Dict[str, List[Dict[str, Any]]]
+) -> Dict[str, Dict[str, List[Dict[str, Any]]]]:
+    '''
+     Combine eligible and assigned tasks into one entry per member.
+
+     find :
+        eligible (Dict[str, List[Dict[str, Any]]]): Tasks of roles each member can perform
+        assigned (Dict[str, List[Dict[str, Any]]]): Tasks assigned to each member
+
+     Return : Dict[str, Dict[str, List[Dict[str, Any]]]]: {"assigned": [...], "eligible": [...]} per member
+    '''
+    people = sorted(set(eligible) | set(assigned), key=str)
+    return {
+        person: {"assigned": assigned.get(person, []), "eligible": eligible.get(person, [])}
+        for person in people
+    }
+
+class GraphStore(ABC):
+    '''
+     Workspace graph operations shared by every graph backend.
+
+     Every method takes the workspace ID and resolves its own storage, so
+     request handlers never deal with database names. Node and edge IDs are
+     integers unique within the store.
+    '''
+    # Short backend name reported by the health check
+    backend = "abstract"
+
+    @abstractmethod
+    async def create_node(self, workspace_id: str, label: str, properties: Dict[str, Any]) -> int:
+        '''
+         Create a node and return its ID.
+
+         find :
+            workspace_id (str)
+            label (str)
+            properties (Dict[str, Any])
+
+         Return : int
+        '''
+
+    @abstractmethod
+    async def create_relationship(
+        self,
+        workspace_id: str,
+        label1: str,
+        name1: str,
+        label2: str,
+        name2: str,
+        rel_type: str,
+        rel_properties: Optional[Dict[str, Any]] = None
+    ) -> Optional[int]:
+        '''
+         Create a relationship between two nodes found by label and name.
+
+         find :
+            workspace_id (str)
+            label1 (str)
+            name1 (str)
+            label2 (str)
+            name2 (str)
+            rel_type (str)
+            rel_properties (Optional[Dict[str, Any]])
+
+         Return : Optional[int]: Relationship ID, None when either node does not exist
+        '''
+
+    @abstractmethod
+    async def get_node(self, workspace_id: str, node_id: int) -> Optional[Dict[str, Any]]:
+        '''
+         Get the properties of a node.
+
+         find :
+            workspace_id (str)
+            node_id (int)
+
+         Return : Optional[Dict[str, Any]]
+        '''
+
+    @abstractmethod
+    async def update_node(self, workspace_id: str, node_id: int, new_properties: Dict[str, Any]) -> bool:
+        '''
+         Merge properties into a node.
+
+         find :
+            workspace_id (str)
+            node_id (int)
+            new_properties (Dict[str, Any])
+
+         Return : bool: False when the node does not exist
+        '''
+
+    @abstractmethod
+    async def delete_node(self, workspace_id: str, node_id: int) -> bool:
+        '''
+         Delete a node and its relationships.
+
+         find :
+            workspace_id (str)
+            node_id (int)
+
+         Return : bool: False when the node does not exist
+        '''
+
+    @abstractmethod
+    async def delete_edge(self, workspace_id: str, edge_id: int) -> bool:
+        '''
+         Delete a relationship.
+
+         find :
+            workspace_id (str)
+            edge_id (int)
+
+         Return : bool: False when the relationship does not exist
+        '''
+
+    @abstractmethod
+    async def get_workspace_tasks(self, workspace_id: str, split: bool = False) -> Dict[str, Any]:
+        '''
+         Get the tasks each member can perform, grouped by member name.
+
+         find :
+            workspace_id (str)
+            split (bool): Return {"assigned", "eligible"} per member instead of eligible tasks only
+
+         Return : Dict[str, Any]
+        '''
+
+    @abstractmethod
+    async def get_graph_statistics(self, workspace_id: str, recompute: bool = False) -> Dict[str, Any]:
+        '''
+         Get role, task and member counts of a workspace.
+
+         find :
+            workspace_id (str)
+            recompute (bool): Ignore maintained counters and scan the graph; backends
+                without counters always scan
+
+         Return : Dict[str, Any]: Empty when the workspace does not exist
+        '''
+
+    @abstractmethod
+    async def get_workspace_members(self, workspace_id: str) -> List[Dict[str, Any]]:
+        '''
+         Get all team members of a workspace.
+
+         find : workspace_id (str)
+
+         Return : List[Dict[str, Any]]
+        '''
+
+    @abstractmethod
+    async def add_task_to_role(
+        self,
+        workspace_id: str,
+        role_name: str,
+        task_name: str,
+        task_properties: Dict[str, Any] = None
+    ) -> Optional[Dict[str, Any]]:
+        '''
+         Add a new task to an existing role.
+
+         find :
+            workspace_id (str)
+            role_name (str)
+            task_name (str)
+            task_properties (Dict[str, Any], optional)
+
+         Return : Optional[Dict[str, Any]]: None when the role does not exist
+        '''
+
+    @abstractmethod
+    async def assign_task(self, workspace_id: str, task_id: int, assignee_name: str) -> bool:
+        '''
+         Assign a task to a person, replacing any existing assignment.
+
+         find :
+            workspace_id (str)
+            task_id (int)
+            assignee_name (str)
+
+         Return : bool: False when the task or person does not exist
+        '''
+
+    @abstractmethod
+    async def write_analysis_graph(
+        self,
+        workspace_id: str,
+        document_analysis: Dict[str, Any],
+        team_analysis: Dict[str, List[str]],
+        team_details: Dict[str, Any],
+        document_count: int,
+        progress: Optional[Callable[[str, Dict[str, Any]], None]] = None
+    ) -> Dict[str, int]:
+        '''
+         Bring the workspace graph in line with an analysis result as one atomic change.
+
+         Re-analysing a workspace only writes what changed and keeps user edits
+         (see analysis_diff.diff_analysis).
+
+         find :
+            workspace_id (str)
+            document_analysis (Dict[str, Any])
+            team_analysis (Dict[str, List[str]])
+            team_details (Dict[str, Any])
+            document_count (int)
+            progress (Optional[Callable[[str, Dict[str, Any]], None]]): Receives
+                graph_batch_written {step, rows, duration} events
+
+         Return : Dict[str, int]: Totals of the analysis plus created, updated and deleted counts
+        '''
+
+    @abstractmethod
+    async def query_workspace_graph(self, workspace_id: str, filters: Optional[GraphFilter] = None) -> Dict[str, Any]:
+        '''
+         Get graph nodes and edges, optionally filtered and paginated by node ID.
+
+         find :
+            workspace_id (str)
+            filters (Optional[GraphFilter])
+
+         Return : Dict[str, Any]: nodes, edges and next_cursor
+        '''
+
+    @abstractmethod
+    def iter_workspace_graph(self, workspace_id: str) -> AsyncIterator[Dict[str, Any]]:
+        '''
+         Stream all nodes, then all edges, then an {"end": ...} item with the counts.
+
+         find : workspace_id (str)
+
+         Return : AsyncIterator[Dict[str, Any]]
+        '''
+
+    @abstractmethod
+    async def change_version(self, workspace_id: str) -> Tuple[str, int]:
+        '''
+         Get the stored change version of a workspace.
+
+         seq grows by one with every write to the workspace, whichever process
+         made it; epoch changes when the workspace's storage is recreated.
+
+         find : workspace_id (str)
+
+         Return : Tuple[str, int]: (epoch, seq)
+        '''
+
+    @abstractmethod
+    async def get_graph_changes(self, workspace_id: str, since: Optional[int] = None) -> Dict[str, Any]:
+        '''
+         Get nodes and edges added, updated or deleted after a change version.
+
+         find :
+            workspace_id (str)
+            since (Optional[int]): Change version of the previous poll; None returns only the version
+
+         Return : Dict[str, Any]: Shaped like get_graph_changes in graph_manager
+        '''
+
+    @abstractmethod
+    async def force_resync(self, workspace_id: str) -> bool:
+        '''
+         Advance the change version without a write and mark earlier versions pruned.
+
+         Every worker then drops what it derived from the workspace, and
+         /graph/changes pollers reload the whole graph.
+
+         find : workspace_id (str)
+
+         Return : bool: False when the workspace was never written
+        '''
+
+    async def verify_connectivity(self) -> None:
+        '''
+         Raise when the backend cannot serve requests.
+
+         Error : Exception
+        '''
+
+    async def close(self) -> None:
+        '''
+         Release resources held by the store.
+        '''
+
+class Neo4jGraphStore(GraphStore):
+    '''
+     Graph store backed by the shared async Neo4j manager.
+
+     Each method resolves the workspace database and delegates to the
+     Cypher helpers in graph_manager. The manager's lifetime is owned by
+     whoever created it, so close() leaves the connection pool alone.
+    '''
+    backend = "neo4j"
+
+    def __init__(self, manager: AsyncNeo4jManager, write_batch_size: int = 500):
+        '''
+         Initialize the store on top of an existing manager.
+
+         find :
+            manager (AsyncNeo4jManager)
+            write_batch_size (int): Maximum rows sent per UNWIND statement
+        '''
+        self.manager = manager
+        self.write_batch_size = write_batch_size
+
+    async def create_node(self, workspace_id: str, label: str, properties: Dict[str, Any]) -> int:
+        db_name = await self.manager.init_database(workspace_id)
+        record = await create_node(self.manager, db_name, workspace_id, label, properties)
+        return record["id"]
+
+    async def create_relationship(
+        self,
+        workspace_id: str,
+        label1: str,
+        name1: str,
+        label2: str,
+        name2: str,
+        rel_type: str,
+        rel_properties: Optional[Dict[str, Any]] = None
+    ) -> Optional[int]:
+        db_name = await self.manager.init_database(workspace_id)
+        record = await create_relationship(
+            self.manager, db_name, workspace_id, label1, name1, label2, name2, rel_type, rel_properties
+        )
+        return record["id"] if record is not None else None
+
+    async def get_node(self, workspace_id: str, node_id: int) -> Optional[Dict[str, Any]]:
+        db_name = await self.manager.init_database(workspace_id)
+        return await get_node_by_id(self.manager, db_name, workspace_id, node_id)
+
+    async def update_node(self, workspace_id: str, node_id: int, new_properties: Dict[str, Any]) -> bool:
+        db_name = await self.manager.init_database(workspace_id)
+        return await update_node_by_id(self.manager, db_name, workspace_id, node_id, new_properties)
+
+    async def delete_node(self, workspace_id: str, node_id: int) -> bool:
+        db_name = await self.manager.init_database(workspace_id)
+        return await delete_node_by_id(self.manager, db_name, workspace_id, node_id)
+
+    async def delete_edge(self, workspace_id: str, edge_id: int) -> bool:
+        db_name = await self.manager.init_database(workspace_id)
+        return await delete_edge_by_id(self.manager, db_name, workspace_id, edge_id)
+
+    async def get_workspace_tasks(self, workspace_id: str, split: bool = False) -> Dict[str, Any]:
+        db_name = await self.manager.init_database(workspace_id)
+        eligible = await get_workspace_tasks(self.manager, db_name, workspace_id)
+        if not split:
+            return eligible
+        assigned = await get_assigned_tasks(self.manager, db_name, workspace_id)
+        return split_task_views(eligible, assigned)
+
+    async def get_graph_statistics(self, workspace_id: str, recompute: bool = False) -> Dict[str, Any]:
+        db_name = await self.manager.init_database(workspace_id)
+        return await get_graph_statistics(self.manager, db_name, workspace_id)
+
+    async def get_workspace_members(self, workspace_id: str) -> List[Dict[str, Any]]:
+        db_name = await self.manager.init_database(workspace_id)
+        return await get_workspace_members(self.manager, db_name, workspace_id)
+
+    async def add_task_to_role(
+        self,
+        workspace_id: str,
+        role_name: str,
+        task_name: str,
+        task_properties: Dict[str, Any] = None
+    ) -> Optional[Dict[str, Any]]:
+        db_name = await self.manager.init_database(workspace_id)
+        return await add_task_to_role(self.manager, db_name, workspace_id, role_name, task_name, task_properties)
+
+    async def assign_task(self, workspace_id: str, task_id: int, assignee_name: str) -> bool:
+        db_name = await self.manager.init_database(workspace_id)
+        return await assign_task(self.manager, db_name, workspace_id, task_id, assignee_name)
+
+    async def write_analysis_graph(
+        self,
+        workspace_id: str,
+        document_analysis: Dict[str, Any],
+        team_analysis: Dict[str, List[str]],
+        team_details: Dict[str, Any],
+        document_count: int,
+        progress: Optional[Callable[[str, Dict[str, Any]], None]] = None
+    ) -> Dict[str, int]:
+        db_name = await self.manager.init_database(workspace_id)
+        return await write_analysis_graph(
+            self.manager,
+            db_name,
+            workspace_id,
+            document_analysis,
+            team_analysis,
+            team_details,
+            document_count=document_count,
+            batch_size=self.write_batch_size,
+            progress=progress
+        )
+
+    async def query_workspace_graph(self, workspace_id: str, filters: Optional[GraphFilter] = None) -> Dict[str, Any]:
+        db_name = await self.manager.init_database(workspace_id)
+        return await query_workspace_graph(self.manager, db_name, workspace_id, filters)
+
+    async def iter_workspace_graph(self, workspace_id: str) -> AsyncIterator[Dict[str, Any]]:
+        db_name = await self.manager.init_database(workspace_id)
+        async for item in iter_workspace_graph(self.manager, db_name, workspace_id):
+            yield item
+
+    async def change_version(self, workspace_id: str) -> Tuple[str, int]:
+        db_name = await self.manager.init_database(workspace_id)
+        return await get_change_version(self.manager, db_name, workspace_id)
+
+    async def get_graph_changes(self, workspace_id: str, since: Optional[int] = None) -> Dict[str, Any]:
+        db_name = await self.manager.init_database(workspace_id)
+        return await get_graph_changes(self.manager, db_name, workspace_id, since)
+
+    async def force_resync(self, workspace_id: str) -> bool:
+        db_name = await self.manager.init_database(workspace_id)
+        return await force_change_resync(self.manager, db_name, workspace_id)
+
+    async def verify_connectivity(self) -> None:
+        await self.manager.verify_connectivity()
+
+# Process-wide graph store, created once in the application lifespan
+_shared_store: Optional[GraphStore] = None
+
+def init_graph_store(store: GraphStore) -> GraphStore:
+    '''
+     Install the process-wide graph store used by all request handlers.
+
+     find : store (GraphStore)
+
+     Return : GraphStore
+    '''
+    global _shared_store
+    if _shared_store is None:
+        _shared_store = store
+    return _shared_store
+
+def get_graph_store() -> GraphStore:
+    '''
+     Return the process-wide graph store.
+
+     Return : GraphStore
+
+     Error : RuntimeError
+    '''
+    if _shared_store is None:
+        raise RuntimeError("Graph store has not been initialized")
+    return _shared_store
+
+async def close_graph_store() -> None:
+    '''
+     Close and forget the process-wide graph store.
+    '''
+    global _shared_store
+    if _shared_store is not None:
+        await _shared_store.close()
+        _shared_store = None
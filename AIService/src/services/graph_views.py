@@ -0,0 +1,601 @@
+'''
+ Graph Views Service Module is maintains derived per-workspace views (per-person task index, statistics counters) on top of any graph store.
+
+ Author: Tanapat Chamted
+'''
+
+from collections import OrderedDict
+from typing import Dict, Any, Optional, List, Set, Tuple, Callable, AsyncIterator
+from datetime import datetime
+import threading
+import time
+
+from src.core.models import GraphFilter
+from src.services.graph_manager import workspace_key
+from src.services.graph_store import GraphStore, split_task_views
+
+# Task properties copied into the index and returned by /tasks
+TASK_FIELDS = ("status", "created_at", "priority", "estimated_hours")
+
+# Relationship types the views follow, as (start, end) roles
+INDEXED_RELATIONSHIPS = {
+    "CONTAINS_ROLE": ("workspace", "role"),
+    "HAS_TASK": ("role", "task"),
+    "CAN_PERFORM": ("person", "role"),
+    "ASSIGNED_TO": ("task", "person")
+}
+
+class _WorkspaceView:
+    '''
+     Roles, tasks, capabilities and assignments of one workspace as adjacency sets.
+
+     forward[rel_type][start] and backward[rel_type][end] hold node IDs, so
+     every lookup the /tasks endpoint needs is a dict access. The view is
+     built once from a full stream and then kept current by applying the
+     store's change feed from seq onwards.
+
+     Statistics follow get_graph_statistics: roles contained by the workspace,
+     tasks of those roles and people who can perform them. They are kept as
+     reference counts updated on every link and unlink, so reading them never
+     walks the graph.
+    '''
+    def __init__(self):
+        '''
+         Initialize an empty view.
+        '''
+        # node ID -> name plus TASK_FIELDS
+        self.nodes: Dict[int, Dict[str, Any]] = {}
+        # edge ID -> (type, start, end)
+        self.edges: Dict[int, Tuple[str, int, int]] = {}
+        self.node_edges: Dict[int, Set[int]] = {}
+        self.forward: Dict[str, Dict[int, Set[int]]] = {rel_type: {} for rel_type in INDEXED_RELATIONSHIPS}
+        self.backward: Dict[str, Dict[int, Set[int]]] = {rel_type: {} for rel_type in INDEXED_RELATIONSHIPS}
+        # Change version of the store the view reflects
+        self.epoch: Optional[str] = None
+        self.seq = 0
+        # Statistics counters
+        self.workspace_nodes: Set[int] = set()
+        self.counted_roles: Set[int] = set()
+        self.task_refs: Dict[int, int] = {}
+        self.person_refs: Dict[int, int] = {}
+        self.status_counts: Dict[Any, int] = {}
+
+    def set_node(self, node_id: int, properties: Dict[str, Any]) -> None:
+        '''
+         Record a node, or merge properties into a recorded one.
+
+         find :
+            node_id (int)
+            properties (Dict[str, Any])
+        '''
+        node = self.nodes.setdefault(node_id, {"name": None, **{field: None for field in TASK_FIELDS}})
+        if node_id in self.task_refs and "status" in properties:
+            self._count_status(node["status"], -1)
+            self._count_status(properties["status"], 1)
+        for field in ("name",) + TASK_FIELDS:
+            if field in properties:
+                node[field] = properties[field]
+        if properties.get("type") == "workspace":
+            self.workspace_nodes.add(node_id)
+
+    def add_edge(self, edge_id: int, rel_type: str, start: int, end: int) -> None:
+        '''
+         Record an edge once; edges of other types are only remembered for deletes.
+
+         find :
+            edge_id (int)
+            rel_type (str)
+            start (int)
+            end (int)
+        '''
+        if edge_id in self.edges:
+            return
+        self.edges[edge_id] = (rel_type, start, end)
+        self.node_edges.setdefault(start, set()).add(edge_id)
+        self.node_edges.setdefault(end, set()).add(edge_id)
+        if rel_type in INDEXED_RELATIONSHIPS and end not in self.forward[rel_type].get(start, ()):
+            self.forward[rel_type].setdefault(start, set()).add(end)
+            self.backward[rel_type].setdefault(end, set()).add(start)
+            self._link(rel_type, start, end, 1)
+
+    def remove_edge(self, edge_id: int) -> None:
+        '''
+         Forget an edge, keeping the pair linked while a parallel edge remains.
+
+         find : edge_id (int)
+        '''
+        if edge_id not in self.edges:
+            return
+        rel_type, start, end = self.edges.pop(edge_id)
+        self.node_edges.get(start, set()).discard(edge_id)
+        self.node_edges.get(end, set()).discard(edge_id)
+        if rel_type not in INDEXED_RELATIONSHIPS:
+            return
+        parallel = any(self.edges[other] == (rel_type, start, end) for other in self.node_edges.get(start, ()))
+        if not parallel:
+            self.forward[rel_type].get(start, set()).discard(end)
+            self.backward[rel_type].get(end, set()).discard(start)
+            self._link(rel_type, start, end, -1)
+
+    def remove_node(self, node_id: int) -> None:
+        '''
+         Forget a node together with its edges.
+
+         find : node_id (int)
+        '''
+        for edge_id in list(self.node_edges.get(node_id, ())):
+            self.remove_edge(edge_id)
+        self.node_edges.pop(node_id, None)
+        self.nodes.pop(node_id, None)
+        self.workspace_nodes.discard(node_id)
+
+    def _link(self, rel_type: str, start: int, end: int, delta: int) -> None:
+        '''
+         Update the statistics counters after a pair of nodes was linked (+1) or unlinked (-1).
+
+         find :
+            rel_type (str)
+            start (int)
+            end (int)
+            delta (int)
+        '''
+        if rel_type == "CONTAINS_ROLE":
+            # A role counts while any workspace node contains it
+            contained = bool(self.backward["CONTAINS_ROLE"].get(end))
+            if contained == (end in self.counted_roles):
+                return
+            if contained:
+                self.counted_roles.add(end)
+            else:
+                self.counted_roles.discard(end)
+            for task_id in self.forward["HAS_TASK"].get(end, ()):
+                self._count_task(task_id, delta)
+            for person_id in self.backward["CAN_PERFORM"].get(end, ()):
+                self._count_ref(self.person_refs, person_id, delta)
+        elif rel_type == "HAS_TASK" and start in self.counted_roles:
+            self._count_task(end, delta)
+        elif rel_type == "CAN_PERFORM" and end in self.counted_roles:
+            self._count_ref(self.person_refs, start, delta)
+
+    def _count_ref(self, refs: Dict[int, int], node_id: int, delta: int) -> int:
+        '''
+         Change a reference count, dropping it at zero.
+
+         find :
+            refs (Dict[int, int])
+            node_id (int)
+            delta (int)
+
+         Return : int: The previous count
+        '''
+        before = refs.get(node_id, 0)
+        if before + delta > 0:
+            refs[node_id] = before + delta
+        else:
+            refs.pop(node_id, None)
+        return before
+
+    def _count_task(self, task_id: int, delta: int) -> None:
+        '''
+         Change how many counted roles reach a task, keeping the status counts in step.
+
+         find :
+            task_id (int)
+            delta (int)
+        '''
+        before = self._count_ref(self.task_refs, task_id, delta)
+        if (before == 0) != (task_id not in self.task_refs):
+            self._count_status(self.nodes.get(task_id, {}).get("status"), 1 if before == 0 else -1)
+
+    def _count_status(self, status: Any, delta: int) -> None:
+        '''
+         Change the number of counted tasks with a status.
+
+         find :
+            status (Any)
+            delta (int)
+        '''
+        count = self.status_counts.get(status, 0) + delta
+        if count > 0:
+            self.status_counts[status] = count
+        else:
+            self.status_counts.pop(status, None)
+
+    def apply_changes(self, changes: Dict[str, Any]) -> None:
+        '''
+         Apply a change feed read with since=self.seq and move the view to its version.
+
+         Items are replayed in change_seq order, deletes of a transaction
+         before its creates, because Neo4j may reuse the ID of a deleted node
+         or edge. Every step is idempotent, so items the view already holds
+         (written while it was streamed) are harmless.
+
+         find : changes (Dict[str, Any]): Result of GraphStore.get_graph_changes
+        '''
+        steps = [
+            (item["change_seq"], 0, "edge_deleted", item) for item in changes["edges"]["deleted"]
+        ] + [
+            (item["change_seq"], 1, "node_deleted", item) for item in changes["nodes"]["deleted"]
+        ] + [
+            (node["properties"].get("change_seq") or 0, 2, "node", node)
+            for node in changes["nodes"]["added"] + changes["nodes"]["updated"]
+        ] + [
+            (edge["properties"].get("change_seq") or 0, 3, "edge", edge) for edge in changes["edges"]["added"]
+        ]
+        for _, _, kind, item in sorted(steps, key=lambda step: step[:2]):
+            if kind == "edge_deleted":
+                self.remove_edge(item["id"])
+            elif kind == "node_deleted":
+                self.remove_node(item["id"])
+            elif kind == "node":
+                self.set_node(item["id"], item["properties"])
+            else:
+                self.add_edge(item["id"], item["type"], item["from"], item["to"])
+        self.seq = max(self.seq, changes["version"])
+
+    def statistics(self) -> Optional[Dict[str, Any]]:
+        '''
+         Return the counters shaped like get_graph_statistics.
+
+         Return : Optional[Dict[str, Any]]: None when the workspace node does not exist
+        '''
+        if not self.workspace_nodes:
+            return None
+
+        def names(ids) -> List[Any]:
+            values = (self.nodes.get(node_id, {}).get("name") for node_id in sorted(ids))
+            return list(dict.fromkeys(value for value in values if value is not None))
+
+        return {
+            "role_count": len(self.counted_roles),
+            "task_count": len(self.task_refs),
+            "person_count": len(self.person_refs),
+            "roles": names(self.counted_roles),
+            "team_members": names(self.person_refs),
+            "task_statuses": sorted((status for status in self.status_counts if status is not None), key=str),
+            "task_status_counts": {str(status): count for status, count in self.status_counts.items()}
+        }
+
+    def task_entry(self, task_id: int, role_id: Optional[int]) -> Dict[str, Any]:
+        '''
+         Shape a task like the rows of get_workspace_tasks in graph_manager.
+
+         find :
+            task_id (int)
+            role_id (Optional[int])
+
+         Return : Dict[str, Any]
+        '''
+        task = self.nodes.get(task_id, {})
+        return {
+            "task": task.get("name"),
+            "role": self.nodes.get(role_id, {}).get("name") if role_id is not None else None,
+            "node_id": task_id,
+            **{field: task.get(field) for field in TASK_FIELDS}
+        }
+
+    def eligible_tasks(self) -> Dict[str, List[Dict[str, Any]]]:
+        '''
+         Return the tasks of every workspace role each person can perform, by person name.
+
+         Return : Dict[str, List[Dict[str, Any]]]
+        '''
+        tasks_by_person: Dict[str, List[Dict[str, Any]]] = {}
+        for person_id, role_ids in self.forward["CAN_PERFORM"].items():
+            entries = [
+                self.task_entry(task_id, role_id)
+                for role_id in sorted(role_ids)
+                if role_id in self.counted_roles
+                for task_id in sorted(self.forward["HAS_TASK"].get(role_id, ()))
+            ]
+            if entries:
+                tasks_by_person.setdefault(self.nodes.get(person_id, {}).get("name"), []).extend(entries)
+        return dict(sorted(tasks_by_person.items(), key=lambda item: str(item[0])))
+
+    def assigned_tasks(self) -> Dict[str, List[Dict[str, Any]]]:
+        '''
+         Return the tasks assigned to each person, by person name.
+
+         Return : Dict[str, List[Dict[str, Any]]]
+        '''
+        tasks_by_person: Dict[str, List[Dict[str, Any]]] = {}
+        for person_id, task_ids in self.backward["ASSIGNED_TO"].items():
+            entries = []
+            for task_id in sorted(task_ids):
+                role_ids = self.backward["HAS_TASK"].get(task_id)
+                role_id = min(role_ids, key=lambda role: str(self.nodes.get(role, {}).get("name"))) if role_ids else None
+                entries.append(self.task_entry(task_id, role_id))
+            if entries:
+                tasks_by_person.setdefault(self.nodes.get(person_id, {}).get("name"), []).extend(entries)
+        return dict(sorted(tasks_by_person.items(), key=lambda item: str(item[0])))
+
+class WorkspaceViewIndex:
+    '''
+     Per-workspace views of this process, bounded in number and idle time.
+
+     At most max_entries views are kept; the least recently read is evicted
+     first, and a view nobody read for max_age seconds is dropped. Keeping
+     a view current is left to IndexedGraphStore.
+    '''
+    def __init__(self, max_age: float = 300.0, max_entries: int = 256):
+        '''
+         Initialize an empty index.
+
+         find :
+            max_age (float): Seconds a view may go unread before it is dropped
+            max_entries (int): Maximum workspaces whose view is kept in memory
+        '''
+        self.max_age = max_age
+        self.max_entries = max_entries
+        self.hits = 0
+        self.loads = 0
+        self.catch_ups = 0
+        self.invalidations = 0
+        self.evictions = 0
+        self.expirations = 0
+        # workspace key -> (last read at, view), least recently read first
+        self._views: "OrderedDict[str, Tuple[float, _WorkspaceView]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _expire(self, now: float) -> None:
+        '''
+         Drop views unread for longer than max_age; the caller holds the lock.
+
+         find : now (float): time.monotonic()
+        '''
+        expired = [key for key, (read_at, _) in self._views.items() if now - read_at > self.max_age]
+        for key in expired:
+            del self._views[key]
+        self.expirations += len(expired)
+
+    def get(self, workspace_id: str) -> Optional[_WorkspaceView]:
+        '''
+         Return the view of a workspace and mark it as read.
+
+         find : workspace_id (str)
+
+         Return : Optional[_WorkspaceView]: None when no view is kept
+        '''
+        key = workspace_key(workspace_id)
+        with self._lock:
+            now = time.monotonic()
+            entry = self._views.get(key)
+            if entry is None:
+                return None
+            if now - entry[0] > self.max_age:
+                del self._views[key]
+                self.expirations += 1
+                return None
+            self._views[key] = (now, entry[1])
+            self._views.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def store(self, workspace_id: str, view: _WorkspaceView) -> None:
+        '''
+         Keep a freshly loaded view, evicting the least recently read ones over max_entries.
+
+         find :
+            workspace_id (str)
+            view (_WorkspaceView)
+        '''
+        key = workspace_key(workspace_id)
+        with self._lock:
+            self.loads += 1
+            now = time.monotonic()
+            self._expire(now)
+            self._views[key] = (now, view)
+            self._views.move_to_end(key)
+            while len(self._views) > self.max_entries:
+                self._views.popitem(last=False)
+                self.evictions += 1
+
+    def record_catch_up(self) -> None:
+        '''
+         Count a view brought up to date from the change feed.
+        '''
+        with self._lock:
+            self.catch_ups += 1
+
+    def invalidate(self, workspace_id: str) -> None:
+        '''
+         Drop the view of a workspace so the next read rebuilds it.
+
+         find : workspace_id (str)
+        '''
+        with self._lock:
+            if self._views.pop(workspace_key(workspace_id), None) is not None:
+                self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        '''
+         Return hit/load counters and the number of loaded views.
+
+         Return : Dict[str, Any]
+        '''
+        with self._lock:
+            return {
+                "workspaces": len(self._views),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "loads": self.loads,
+                "catch_ups": self.catch_ups,
+                "invalidations": self.invalidations,
+                "evictions": self.evictions,
+                "expirations": self.expirations
+            }
+
+class IndexedGraphStore(GraphStore):
+    '''
+     Graph store wrapper answering /tasks and /statistics from maintained views.
+
+     A view is built from one full graph stream. Before every read, its
+     change version is compared with the store's. If the view is behind, it
+     applies the store's change feed since its version, so writes from any
+     worker and from batch or analysis writes show up without another scan.
+     A view is only rebuilt when the feed asks for a full resync or the
+     store's epoch changed. Reads cost O(result) instead of re-running the
+     Role -> Task <- Person expansion or the statistics scan. Writes are
+     delegated unchanged.
+    '''
+    def __init__(self, store: GraphStore, max_age: float = 300.0, max_entries: int = 256):
+        '''
+         Wrap a graph store.
+
+         find :
+            store (GraphStore)
+            max_age (float): Seconds a view may go unread before it is dropped
+            max_entries (int): Maximum workspaces whose view is kept in memory
+        '''
+        self.store = store
+        self.backend = store.backend
+        self.views = WorkspaceViewIndex(max_age=max_age, max_entries=max_entries)
+
+    async def _load_view(self, workspace_id: str, epoch: str, seq: int) -> _WorkspaceView:
+        '''
+         Build the view of a workspace from a full graph stream.
+
+         find :
+            workspace_id (str)
+            epoch (str)
+            seq (int): Change version read before the stream
+
+         Return : _WorkspaceView
+        '''
+        view = _WorkspaceView()
+        # Writes landing during the stream are replayed by the next catch-up
+        view.epoch, view.seq = epoch, seq
+        async for item in self.store.iter_workspace_graph(workspace_id):
+            if "node" in item:
+                view.set_node(item["node"]["id"], item["node"]["properties"])
+            elif "edge" in item:
+                edge = item["edge"]
+                view.add_edge(edge["id"], edge["type"], edge["from"], edge["to"])
+        self.views.store(workspace_id, view)
+        return view
+
+    async def _current_view(self, workspace_id: str) -> _WorkspaceView:
+        '''
+         Return the view of a workspace at the store's current change version.
+
+         find : workspace_id (str)
+
+         Return : _WorkspaceView
+        '''
+        epoch, seq = await self.store.change_version(workspace_id)
+        view = self.views.get(workspace_id)
+        if view is None or view.epoch != epoch:
+            return await self._load_view(workspace_id, epoch, seq)
+        if view.seq >= seq:
+            return view
+
+        since = view.seq
+        changes = await self.store.get_graph_changes(workspace_id, since)
+        if changes["full_resync"]:
+            return await self._load_view(workspace_id, epoch, seq)
+        # A concurrent read may have caught up meanwhile; replaying an older feed would undo its deletes
+        if view.seq == since:
+            view.apply_changes(changes)
+            self.views.record_catch_up()
+        return view
+
+    async def get_workspace_tasks(self, workspace_id: str, split: bool = False) -> Dict[str, Any]:
+        view = await self._current_view(workspace_id)
+        if not split:
+            return view.eligible_tasks()
+        return split_task_views(view.eligible_tasks(), view.assigned_tasks())
+
+    async def create_node(self, workspace_id: str, label: str, properties: Dict[str, Any]) -> int:
+        return await self.store.create_node(workspace_id, label, properties)
+
+    async def create_relationship(
+        self,
+        workspace_id: str,
+        label1: str,
+        name1: str,
+        label2: str,
+        name2: str,
+        rel_type: str,
+        rel_properties: Optional[Dict[str, Any]] = None
+    ) -> Optional[int]:
+        return await self.store.create_relationship(
+            workspace_id, label1, name1, label2, name2, rel_type, rel_properties
+        )
+
+    async def get_node(self, workspace_id: str, node_id: int) -> Optional[Dict[str, Any]]:
+        return await self.store.get_node(workspace_id, node_id)
+
+    async def update_node(self, workspace_id: str, node_id: int, new_properties: Dict[str, Any]) -> bool:
+        return await self.store.update_node(workspace_id, node_id, new_properties)
+
+    async def delete_node(self, workspace_id: str, node_id: int) -> bool:
+        return await self.store.delete_node(workspace_id, node_id)
+
+    async def delete_edge(self, workspace_id: str, edge_id: int) -> bool:
+        return await self.store.delete_edge(workspace_id, edge_id)
+
+    async def get_graph_statistics(self, workspace_id: str, recompute: bool = False) -> Dict[str, Any]:
+        if recompute:
+            # Rebuild from a full scan to reconcile counters with the stored graph
+            self.views.invalidate(workspace_id)
+
+        statistics = (await self._current_view(workspace_id)).statistics()
+        if statistics is None:
+            return {}
+        return {
+            **statistics,
+            "workspace_id": workspace_id,
+            "timestamp": datetime.now().isoformat()
+        }
+
+    async def get_workspace_members(self, workspace_id: str) -> List[Dict[str, Any]]:
+        return await self.store.get_workspace_members(workspace_id)
+
+    async def add_task_to_role(
+        self,
+        workspace_id: str,
+        role_name: str,
+        task_name: str,
+        task_properties: Dict[str, Any] = None
+    ) -> Optional[Dict[str, Any]]:
+        return await self.store.add_task_to_role(workspace_id, role_name, task_name, task_properties)
+
+    async def assign_task(self, workspace_id: str, task_id: int, assignee_name: str) -> bool:
+        return await self.store.assign_task(workspace_id, task_id, assignee_name)
+
+    async def write_analysis_graph(
+        self,
+        workspace_id: str,
+        document_analysis: Dict[str, Any],
+        team_analysis: Dict[str, List[str]],
+        team_details: Dict[str, Any],
+        document_count: int,
+        progress: Optional[Callable[[str, Dict[str, Any]], None]] = None
+    ) -> Dict[str, int]:
+        return await self.store.write_analysis_graph(
+            workspace_id, document_analysis, team_analysis, team_details, document_count, progress=progress
+        )
+
+    async def query_workspace_graph(self, workspace_id: str, filters: Optional[GraphFilter] = None) -> Dict[str, Any]:
+        return await self.store.query_workspace_graph(workspace_id, filters)
+
+    async def iter_workspace_graph(self, workspace_id: str) -> AsyncIterator[Dict[str, Any]]:
+        async for item in self.store.iter_workspace_graph(workspace_id):
+            yield item
+
+    async def change_version(self, workspace_id: str) -> Tuple[str, int]:
+        return await self.store.change_version(workspace_id)
+
+    async def get_graph_changes(self, workspace_id: str, since: Optional[int] = None) -> Dict[str, Any]:
+        return await self.store.get_graph_changes(workspace_id, since)
+
+    async def force_resync(self, workspace_id: str) -> bool:
+        resynced = await self.store.force_resync(workspace_id)
+        self.views.invalidate(workspace_id)
+        return resynced
+
+    async def verify_connectivity(self) -> None:
+        await self.store.verify_connectivity()
+
+    async def close(self) -> None:
+        await self.store.close()
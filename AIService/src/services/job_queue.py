@@ -0,0 +1,473 @@
+'''
+ Job Queue Service Module is module runs long requests such as /analyze as background jobs on a bounded pool of asyncio workers.
+
+ Author: Tanapat Chamted
+'''
+
+from typing import Dict, Any, Optional, List, Tuple, Callable, Awaitable, AsyncIterator
+from collections import deque
+from datetime import datetime
+import asyncio
+import threading
+import time
+import uuid
+
+JOB_STATUSES = ("queued", "running", "succeeded", "failed", "cancelled")
+FINISHED_STATUSES = ("succeeded", "failed", "cancelled")
+
+class Job:
+    '''
+     One background job and its progress.
+
+     Progress may be reported from worker threads (e.g. code run with
+     asyncio.to_thread), so every update goes through a lock. Besides the
+     current state the job keeps its latest events, numbered from 1, for
+     clients following it with stream_events().
+    '''
+    def __init__(
+        self,
+        kind: str,
+        workspace_id: Optional[str],
+        run: Callable[["Job"], Awaitable[Any]],
+        cleanup: Optional[Callable[[], None]] = None,
+        max_events: int = 1000
+    ):
+        '''
+         Initialize a queued job.
+
+         find :
+            kind (str): Job type, e.g. "analyze"
+            workspace_id (Optional[str])
+            run (Callable[[Job], Awaitable[Any]]): Coroutine function doing the work; its return value is the result
+            cleanup (Optional[Callable[[], None]]): Called once when the job finishes, even if it never ran
+            max_events (int): Events kept; older ones are dropped first
+        '''
+        self.job_id = uuid.uuid4().hex
+        self.kind = kind
+        self.workspace_id = workspace_id
+        self.run = run
+        self.cleanup = cleanup
+        self.status = "queued"
+        self.stage = "queued"
+        self.percent = 0.0
+        self.progress: Dict[str, Any] = {}
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created_at = datetime.now().isoformat()
+        self.started_at: Optional[str] = None
+        self.finished_at: Optional[str] = None
+        self.finished_monotonic: Optional[float] = None
+        self.cancel_requested = False
+        self.task: Optional[asyncio.Task] = None
+        self.events: deque = deque(maxlen=max(max_events, 1))
+        self.event_seq = 0
+        # Futures of stream_events() calls waiting for the next event, with their loop
+        self._waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+        self._lock = threading.Lock()
+
+    def update(self, stage: Optional[str] = None, percent: Optional[float] = None, **progress: Any) -> None:
+        '''
+         Record progress; raises CancelledError once cancellation was requested.
+
+         Raising from the progress hook stops code running in a thread, which
+         task cancellation cannot interrupt.
+
+         find :
+            stage (Optional[str])
+            percent (Optional[float]): 0 to 100
+            progress (Any): Values merged into the progress details
+
+         Error : asyncio.CancelledError
+        '''
+        if self.cancel_requested:
+            raise asyncio.CancelledError(f"Job {self.job_id} was cancelled")
+        with self._lock:
+            if stage is not None:
+                self.stage = stage
+            if percent is not None:
+                self.percent = round(min(max(percent, 0.0), 100.0), 1)
+            self.progress.update(progress)
+
+    def _append_event(self, event: str, data: Dict[str, Any]) -> List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]]:
+        '''
+         Append an event; the caller holds the lock and wakes the returned waiters.
+
+         find :
+            event (str)
+            data (Dict[str, Any])
+
+         Return : List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]]
+        '''
+        self.event_seq += 1
+        self.events.append({
+            "seq": self.event_seq,
+            "event": event,
+            "at": datetime.now().isoformat(),
+            "data": data
+        })
+        waiters, self._waiters = self._waiters, []
+        return waiters
+
+    @staticmethod
+    def _wake(waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]]) -> None:
+        '''
+         Resolve waiting futures from any thread.
+
+         find : waiters (List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]])
+        '''
+        def resolve(future: asyncio.Future) -> None:
+            if not future.done():
+                future.set_result(None)
+
+        for loop, future in waiters:
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(resolve, future)
+
+    def emit(self, event: str, data: Dict[str, Any]) -> None:
+        '''
+         Record an event for stream_events(); safe to call from worker threads.
+
+         find :
+            event (str)
+            data (Dict[str, Any]): JSON-serialisable details
+        '''
+        with self._lock:
+            waiters = self._append_event(event, data)
+        self._wake(waiters)
+
+    async def stream_events(self, after: int = 0, keepalive: float = 15.0) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        '''
+         Yield the events after a sequence number as they happen, ending with
+         the "finished" event.
+
+         Events dropped from the bounded history are skipped. None is yielded
+         after keepalive seconds without events so callers can keep the
+         connection open.
+
+         find :
+            after (int): Last sequence number the caller has seen
+            keepalive (float)
+
+         Return : AsyncIterator[Optional[Dict[str, Any]]]
+        '''
+        loop = asyncio.get_running_loop()
+        while True:
+            waiter = None
+            with self._lock:
+                pending = [event for event in self.events if event["seq"] > after]
+                finished = self.finished
+                if not pending and not finished:
+                    waiter = loop.create_future()
+                    self._waiters.append((loop, waiter))
+
+            if pending:
+                for event in pending:
+                    after = event["seq"]
+                    yield event
+                continue
+            if finished:
+                return
+
+            try:
+                await asyncio.wait({waiter}, timeout=keepalive)
+            finally:
+                with self._lock:
+                    if (loop, waiter) in self._waiters:
+                        self._waiters.remove((loop, waiter))
+            if not waiter.done():
+                yield None
+
+    def finish(self, status: str, result: Any = None, error: Optional[str] = None) -> None:
+        '''
+         Mark the job as finished.
+
+         find :
+            status (str): "succeeded", "failed" or "cancelled"
+            result (Any)
+            error (Optional[str])
+        '''
+        with self._lock:
+            if self.finished:
+                return
+            self.status = status
+            self.result = result
+            self.error = error
+            if status == "succeeded":
+                self.percent = 100.0
+            self.stage = status
+            self.finished_at = datetime.now().isoformat()
+            self.finished_monotonic = time.monotonic()
+            # Appended under the same lock, so a stream that sees the job finished has this event too
+            waiters = self._append_event("finished", {"status": status, "error": error, "result": result})
+            cleanup, self.cleanup = self.cleanup, None
+        self._wake(waiters)
+        if cleanup is not None:
+            try:
+                cleanup()
+            except Exception as e:
+                print(f"Cleanup of job {self.job_id} failed: {e}")
+
+    @property
+    def finished(self) -> bool:
+        '''
+         Whether the job succeeded, failed or was cancelled.
+
+         Return : bool
+        '''
+        return self.status in FINISHED_STATUSES
+
+    def to_dict(self) -> Dict[str, Any]:
+        '''
+         Return the job state for the API.
+
+         Return : Dict[str, Any]
+        '''
+        with self._lock:
+            return {
+                "job_id": self.job_id,
+                "kind": self.kind,
+                "workspace_id": self.workspace_id,
+                "status": self.status,
+                "stage": self.stage,
+                "percent": self.percent,
+                "progress": dict(self.progress),
+                "result": self.result,
+                "error": self.error,
+                "created_at": self.created_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+                "last_event_seq": self.event_seq
+            }
+
+class JobQueueFull(Exception):
+    '''
+     Raised when a job is submitted while the queue is at capacity.
+    '''
+
+class JobQueue:
+    '''
+     Bounded FIFO of jobs executed by a fixed number of asyncio workers.
+
+     Jobs run in their own tasks, detached from the request that submitted
+     them, so they keep running when the client disconnects. Finished jobs
+     are kept for retention seconds so their result can still be polled.
+    '''
+    def __init__(self, workers: int = 2, max_queued: int = 100, retention: float = 3600, max_events: int = 1000):
+        '''
+         Initialize an idle queue; call start() inside the event loop.
+
+         find :
+            workers (int): Jobs executed at the same time
+            max_queued (int): Jobs waiting to start before submit() is refused
+            retention (float): Seconds a finished job stays available
+            max_events (int): Events kept per job
+        '''
+        self.workers = max(workers, 1)
+        self.max_queued = max_queued
+        self.retention = retention
+        self.max_events = max_events
+        self.jobs: Dict[str, Job] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker_tasks: List[asyncio.Task] = []
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        '''
+         Start the worker tasks in the running event loop.
+        '''
+        if self._worker_tasks:
+            return
+        self._queue = asyncio.Queue()
+        self._worker_tasks = [
+            asyncio.ensure_future(self._worker(index))
+            for index in range(self.workers)
+        ]
+        print(f"Job queue started with {self.workers} workers")
+
+    async def _worker(self, index: int) -> None:
+        '''
+         Run queued jobs one at a time until cancelled.
+
+         find : index (int)
+        '''
+        while True:
+            job = await self._queue.get()
+            try:
+                if job.cancel_requested:
+                    continue
+                job.status = "running"
+                job.stage = "starting"
+                job.started_at = datetime.now().isoformat()
+                job.emit("started", {})
+                job.task = asyncio.ensure_future(job.run(job))
+                # wait() does not raise the job's own cancellation into the worker
+                await asyncio.wait({job.task})
+                if job.task.cancelled():
+                    job.finish("cancelled")
+                elif job.task.exception() is not None:
+                    error = job.task.exception()
+                    if isinstance(error, asyncio.CancelledError):
+                        job.finish("cancelled")
+                    else:
+                        print(f"Job {job.job_id} failed: {error}")
+                        job.finish("failed", error=str(error))
+                else:
+                    job.finish("succeeded", result=job.task.result())
+            except asyncio.CancelledError:
+                # Shutdown: stop the running job too
+                if job.task is not None and not job.task.done():
+                    job.task.cancel()
+                job.finish("cancelled", error="Service shutting down")
+                raise
+            finally:
+                self._queue.task_done()
+
+    def _prune(self) -> None:
+        '''
+         Forget finished jobs older than the retention period.
+        '''
+        cutoff = time.monotonic() - self.retention
+        expired = [
+            job_id for job_id, job in self.jobs.items()
+            if job.finished and job.finished_monotonic < cutoff
+        ]
+        for job_id in expired:
+            del self.jobs[job_id]
+
+    def queued(self) -> int:
+        '''
+         Return the number of jobs waiting to start.
+
+         Return : int
+        '''
+        return sum(1 for job in list(self.jobs.values()) if job.status == "queued" and not job.cancel_requested)
+
+    def submit(
+        self,
+        kind: str,
+        workspace_id: Optional[str],
+        run: Callable[[Job], Awaitable[Any]],
+        cleanup: Optional[Callable[[], None]] = None
+    ) -> Job:
+        '''
+         Queue a job.
+
+         find :
+            kind (str)
+            workspace_id (Optional[str])
+            run (Callable[[Job], Awaitable[Any]])
+            cleanup (Optional[Callable[[], None]]): Called once when the job finishes
+
+         Return : Job
+
+         Error : JobQueueFull, RuntimeError: The queue was not started
+        '''
+        if self._queue is None:
+            raise RuntimeError("Job queue has not been started")
+        with self._lock:
+            self._prune()
+            if self.queued() >= self.max_queued:
+                raise JobQueueFull(f"{self.max_queued} jobs are already waiting")
+            job = Job(kind, workspace_id, run, cleanup=cleanup, max_events=self.max_events)
+            self.jobs[job.job_id] = job
+        self._queue.put_nowait(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        '''
+         Return a job by ID.
+
+         find : job_id (str)
+
+         Return : Optional[Job]
+        '''
+        return self.jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        '''
+         Cancel a queued or running job; finished jobs are left as they are.
+
+         A queued job is skipped when it reaches a worker. A running job is
+         cancelled at its next await or progress update.
+
+         find : job_id (str)
+
+         Return : Optional[Job]: None when the job is unknown
+        '''
+        job = self.jobs.get(job_id)
+        if job is None or job.finished:
+            return job
+        job.cancel_requested = True
+        if job.status == "queued":
+            job.finish("cancelled")
+        elif job.task is not None:
+            job.task.cancel()
+        return job
+
+    def stats(self) -> Dict[str, Any]:
+        '''
+         Return the number of known jobs by status.
+
+         Return : Dict[str, Any]
+        '''
+        counts = {status: 0 for status in JOB_STATUSES}
+        for job in list(self.jobs.values()):
+            counts[job.status] += 1
+        return {"workers": self.workers, "max_queued": self.max_queued, "jobs": counts}
+
+    async def close(self) -> None:
+        '''
+         Stop the workers, cancelling running and queued jobs.
+        '''
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+        for job in list(self.jobs.values()):
+            if not job.finished:
+                job.cancel_requested = True
+                if job.task is not None and not job.task.done():
+                    job.task.cancel()
+                job.finish("cancelled", error="Service shutting down")
+
+# Process-wide job queue, created once in the application lifespan
+_shared_queue: Optional[JobQueue] = None
+
+def init_job_queue(workers: int = 2, max_queued: int = 100, retention: float = 3600, max_events: int = 1000) -> JobQueue:
+    '''
+     Create and start the process-wide job queue.
+
+     find :
+        workers (int)
+        max_queued (int)
+        retention (float)
+        max_events (int)
+
+     Return : JobQueue
+    '''
+    global _shared_queue
+    if _shared_queue is None:
+        _shared_queue = JobQueue(workers=workers, max_queued=max_queued, retention=retention, max_events=max_events)
+        _shared_queue.start()
+    return _shared_queue
+
+def get_job_queue() -> JobQueue:
+    '''
+     Return the process-wide job queue.
+
+     Return : JobQueue
+
+     Error : RuntimeError
+    '''
+    if _shared_queue is None:
+        raise RuntimeError("Job queue has not been initialized")
+    return _shared_queue
+
+async def close_job_queue() -> None:
+    '''
+     Stop and forget the process-wide job queue.
+    '''
+    global _shared_queue
+    if _shared_queue is not None:
+        await _shared_queue.close()
+        _shared_queue = None
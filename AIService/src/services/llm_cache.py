@@ -0,0 +1,230 @@
+'''
+ LLM Cache Service Module is module keeps LLM responses on disk, keyed by a hash of everything that decides the response.
+
+ Author: Tanapat Chamted
+'''
+
+from typing import Dict, Any, Optional
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+def llm_cache_key(
+    operation: str,
+    model_name: Optional[str],
+    temperature: Optional[float],
+    template: str,
+    inputs: Dict[str, Any]
+) -> str:
+    '''
+     Return the content address of an LLM call.
+
+     find :
+        operation (str): e.g. "extract_roles_tasks"
+        model_name (Optional[str])
+        temperature (Optional[float])
+        template (str): Prompt template text
+        inputs (Dict[str, Any]): Template variables
+
+     Return : str: SHA-256 hex digest
+    '''
+    payload = json.dumps(
+        [operation, model_name, temperature, template, inputs],
+        sort_keys=True,
+        default=str,
+        ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class LLMCache:
+    '''
+     SQLite cache of LLM responses with LRU eviction and a time to live.
+
+     One connection is shared by all threads and guarded by a lock. The
+     database runs in WAL mode, so several service processes can share the
+     file. Cache failures are logged and counted but never raised: a broken
+     cache only means the LLM is called again.
+    '''
+    def __init__(self, path: str, max_entries: int = 10000, ttl: float = 604800):
+        '''
+         Open (or create) the cache database.
+
+         find :
+            path (str): SQLite file; its directory is created when missing
+            max_entries (int): Responses kept; the least recently used go first
+            ttl (float): Seconds a response stays valid, 0 keeps it until evicted
+        '''
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection = sqlite3.connect(path, timeout=5.0, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                operation TEXT NOT NULL,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+            """
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS llm_cache_last_used ON llm_cache (last_used)")
+
+    def get(self, key: str) -> Optional[str]:
+        '''
+         Return a cached response and mark it as recently used.
+
+         find : key (str): From llm_cache_key
+
+         Return : Optional[str]: None on a miss or an expired entry
+        '''
+        now = time.time()
+        with self._lock:
+            try:
+                row = self._connection.execute(
+                    "SELECT response, created_at FROM llm_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and self.ttl > 0 and row[1] < now - self.ttl:
+                    self._connection.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                    self.expired += 1
+                    row = None
+                if row is None:
+                    self.misses += 1
+                    return None
+                self._connection.execute("UPDATE llm_cache SET last_used = ? WHERE key = ?", (now, key))
+                self.hits += 1
+                return row[0]
+            except sqlite3.Error as e:
+                print(f"LLM cache read failed: {e}")
+                self.errors += 1
+                self.misses += 1
+                return None
+
+    def put(self, key: str, operation: str, response: str) -> None:
+        '''
+         Store a response, evicting expired and least recently used entries
+         beyond max_entries.
+
+         find :
+            key (str)
+            operation (str)
+            response (str)
+        '''
+        now = time.time()
+        with self._lock:
+            try:
+                self._connection.execute("BEGIN IMMEDIATE")
+                try:
+                    self._connection.execute(
+                        "INSERT OR REPLACE INTO llm_cache (key, operation, response, created_at, last_used) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (key, operation, response, now, now)
+                    )
+                    if self.ttl > 0:
+                        self._connection.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl,))
+                    count = self._connection.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+                    if count > self.max_entries:
+                        self._connection.execute(
+                            "DELETE FROM llm_cache WHERE key IN "
+                            "(SELECT key FROM llm_cache ORDER BY last_used ASC LIMIT ?)",
+                            (count - self.max_entries,)
+                        )
+                        self.evictions += count - self.max_entries
+                    self._connection.execute("COMMIT")
+                except sqlite3.Error:
+                    self._connection.execute("ROLLBACK")
+                    raise
+            except sqlite3.Error as e:
+                print(f"LLM cache write failed: {e}")
+                self.errors += 1
+
+    def clear(self) -> None:
+        '''
+         Remove every cached response.
+        '''
+        with self._lock:
+            self._connection.execute("DELETE FROM llm_cache")
+
+    def stats(self) -> Dict[str, Any]:
+        '''
+         Return hit/miss counters and the current size.
+
+         Return : Dict[str, Any]
+        '''
+        with self._lock:
+            try:
+                entries = self._connection.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+            except sqlite3.Error:
+                entries = None
+            lookups = self.hits + self.misses
+            return {
+                "path": self.path,
+                "entries": entries,
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "evictions": self.evictions,
+                "errors": self.errors,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+    def close(self) -> None:
+        '''
+         Close the database connection.
+        '''
+        with self._lock:
+            self._connection.close()
+
+# Process-wide cache, created in the application lifespan; None while disabled
+_shared_cache: Optional[LLMCache] = None
+
+def init_llm_cache(path: str, max_entries: int = 10000, ttl: float = 604800) -> LLMCache:
+    '''
+     Open the process-wide LLM cache.
+
+     find :
+        path (str)
+        max_entries (int)
+        ttl (float)
+
+     Return : LLMCache
+    '''
+    global _shared_cache
+    if _shared_cache is None:
+        _shared_cache = LLMCache(path, max_entries=max_entries, ttl=ttl)
+        print(f"LLM cache opened at {path}")
+    return _shared_cache
+
+def get_llm_cache() -> Optional[LLMCache]:
+    '''
+     Return the process-wide LLM cache.
+
+     Return : Optional[LLMCache]: None when caching is disabled
+    '''
+    return _shared_cache
+
+def close_llm_cache() -> None:
+    '''
+     Close and forget the process-wide LLM cache.
+    '''
+    global _shared_cache
+    if _shared_cache is not None:
+        _shared_cache.close()
+        _shared_cache = None
@@ -6,7 +6,27 @@
 
 from langchain_groq import ChatGroq
 from langchain_community.embeddings import HuggingFaceBgeEmbeddings
-from typing import Tuple, Dict, Any
+from contextlib import contextmanager
+from typing import Tuple, Dict, Any, Iterator, Callable, TypeVar, Optional
+import asyncio
+import time
+
+from src.utils.metrics import REGISTRY
+from src.services.llm_cache import llm_cache_key, get_llm_cache
+from src.services.rate_limiter import LLMRateLimiter, get_rate_limiter, estimate_tokens, rate_limit_retry_after
+
+LLM_REQUEST_DURATION = REGISTRY.histogram(
+    "llm_request_duration_seconds",
+    "Latency of LLM chain calls by operation and outcome",
+    ["operation", "outcome"]
+)
+LLM_CACHE_LOOKUPS = REGISTRY.counter(
+    "llm_cache_lookups_total",
+    "LLM response cache lookups by operation and result",
+    ["operation", "result"]
+)
+
+T = TypeVar("T")
 
 def get_llm(model_name: str = "llama-3.1-70b-versatile", temp: float = 0.3) -> ChatGroq:
     '''
@@ -20,6 +40,196 @@ def get_llm(model_name: str = "llama-3.1-70b-versatile", temp: float = 0.3) -> C
     '''
     return ChatGroq(model=model_name, temperature=temp)
 
+@contextmanager
+def observe_llm_call(operation: str) -> Iterator[None]:
+    '''
+     Time an LLM call and record it under an operation name.
+
+     find : operation (str): e.g. "extract_roles_tasks"
+
+     Return : Iterator[None]
+    '''
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "success"
+    finally:
+        LLM_REQUEST_DURATION.observe(time.perf_counter() - started, operation=operation, outcome=outcome)
+
+def _cache_key(operation: str, llm: Any, template: str, inputs: Dict[str, Any]) -> str:
+    '''
+     Return the LLM cache key of a chain call.
+
+     find :
+        operation (str)
+        llm (Any)
+        template (str)
+        inputs (Dict[str, Any])
+
+     Return : str
+    '''
+    return llm_cache_key(
+        operation,
+        getattr(llm, "model_name", None),
+        getattr(llm, "temperature", None),
+        template,
+        inputs
+    )
+
+def _prompt_tokens(template: str, inputs: Dict[str, Any]) -> int:
+    '''
+     Estimate the prompt tokens of a chain call.
+
+     find :
+        template (str)
+        inputs (Dict[str, Any])
+
+     Return : int
+    '''
+    return estimate_tokens(template) + sum(estimate_tokens(str(value)) for value in inputs.values())
+
+def _finish_call(limiter: Optional[LLMRateLimiter], reserved: int, prompt_tokens: int, response: Optional[str], error: Optional[Exception]) -> None:
+    '''
+     Report the outcome of an LLM call to the rate limiter.
+
+     find :
+        limiter (Optional[LLMRateLimiter])
+        reserved (int): Tokens reserved before the call
+        prompt_tokens (int)
+        response (Optional[str]): None when the call failed
+        error (Optional[Exception])
+    '''
+    if limiter is None:
+        return
+    if error is not None:
+        retry_after = rate_limit_retry_after(error)
+        if retry_after is not None:
+            limiter.record_rate_limited(retry_after)
+        return
+    limiter.settle(reserved, prompt_tokens + estimate_tokens(response))
+    limiter.record_success()
+
+def invoke_cached(
+    operation: str,
+    chain: Any,
+    llm: Any,
+    template: str,
+    inputs: Dict[str, Any],
+    parse: Callable[[str], T],
+    request_delay: float = 0.0
+) -> T:
+    '''
+     Invoke a chain through the LLM cache and the shared rate limiter.
+
+     The cache key covers the operation, model name, temperature, prompt
+     template and inputs. A response is only cached once parse accepted it,
+     so malformed output is never replayed. Hits skip the rate limiter and
+     the request delay; the delay only applies when no rate limiter is set up.
+
+     find :
+        operation (str): e.g. "extract_roles_tasks"
+        chain (Any): Runnable producing the raw response string
+        llm (Any): Model of the chain, for its model name and temperature
+        template (str): Prompt template text of the chain
+        inputs (Dict[str, Any]): Chain input
+        parse (Callable[[str], T]): Turns the response into the result; raises on bad output
+        request_delay (float): Seconds slept before a real LLM call without a rate limiter
+
+     Return : T
+
+     Error : Whatever the chain or parse raises
+    '''
+    cache = get_llm_cache()
+    key = None
+    if cache is not None:
+        key = _cache_key(operation, llm, template, inputs)
+        cached = cache.get(key)
+        if cached is not None:
+            LLM_CACHE_LOOKUPS.inc(operation=operation, result="hit")
+            return parse(cached)
+        LLM_CACHE_LOOKUPS.inc(operation=operation, result="miss")
+
+    limiter = get_rate_limiter()
+    prompt_tokens = reserved = 0
+    if limiter is None:
+        time.sleep(request_delay)
+    else:
+        prompt_tokens = _prompt_tokens(template, inputs)
+        reserved = prompt_tokens + limiter.completion_tokens
+        limiter.acquire(reserved)
+    try:
+        with observe_llm_call(operation):
+            response = chain.invoke(inputs)
+    except Exception as e:
+        _finish_call(limiter, reserved, prompt_tokens, None, e)
+        raise
+    _finish_call(limiter, reserved, prompt_tokens, response, None)
+
+    result = parse(response)
+    if cache is not None:
+        cache.put(key, operation, response)
+    return result
+
+async def ainvoke_cached(
+    operation: str,
+    chain: Any,
+    llm: Any,
+    template: str,
+    inputs: Dict[str, Any],
+    parse: Callable[[str], T],
+    request_delay: float = 0.0
+) -> T:
+    '''
+     Asynchronous version of invoke_cached, calling the chain with ainvoke.
+
+     Cache reads and writes run in a worker thread so a busy SQLite file does
+     not stall the event loop.
+
+     find :
+        operation (str)
+        chain (Any)
+        llm (Any)
+        template (str)
+        inputs (Dict[str, Any])
+        parse (Callable[[str], T])
+        request_delay (float)
+
+     Return : T
+
+     Error : Whatever the chain or parse raises
+    '''
+    cache = get_llm_cache()
+    key = None
+    if cache is not None:
+        key = _cache_key(operation, llm, template, inputs)
+        cached = await asyncio.to_thread(cache.get, key)
+        if cached is not None:
+            LLM_CACHE_LOOKUPS.inc(operation=operation, result="hit")
+            return parse(cached)
+        LLM_CACHE_LOOKUPS.inc(operation=operation, result="miss")
+
+    limiter = get_rate_limiter()
+    prompt_tokens = reserved = 0
+    if limiter is None:
+        await asyncio.sleep(request_delay)
+    else:
+        prompt_tokens = _prompt_tokens(template, inputs)
+        reserved = prompt_tokens + limiter.completion_tokens
+        await limiter.acquire_async(reserved)
+    try:
+        with observe_llm_call(operation):
+            response = await chain.ainvoke(inputs)
+    except Exception as e:
+        _finish_call(limiter, reserved, prompt_tokens, None, e)
+        raise
+    _finish_call(limiter, reserved, prompt_tokens, response, None)
+
+    result = parse(response)
+    if cache is not None:
+        await asyncio.to_thread(cache.put, key, operation, response)
+    return result
+
 def get_embedding(
     model_name: str = "BAAI/bge-base-en-v1.5"
 ) -> Tuple[str, Dict[str, str], Dict[str, bool], HuggingFaceBgeEmbeddings]:
@@ -0,0 +1,834 @@
+'''
+ In-Memory Graph Store Service Module is keeps workspace graphs in indexed adjacency dicts for tests, benchmarks and single-node deployments.
+
+ Author: Tanapat Chamted
+'''
+
+from typing import Dict, Any, Optional, List, Set, Tuple, Iterable, AsyncIterator, Callable
+from datetime import datetime
+import itertools
+import json
+import threading
+import time
+import uuid
+
+from src.core.models import GraphFilter, RESERVED_NODE_PROPERTIES
+from src.services.graph_manager import serialize_property_value, workspace_key, TOMBSTONE_RETENTION
+from src.services.graph_store import GraphStore, split_task_views
+from src.services.analysis_diff import ANALYSIS_SOURCE, USER_SOURCE, empty_snapshot, diff_analysis, plan_summary
+
+class _WorkspaceGraph:
+    '''
+     Nodes and edges of one workspace with the indexes the graph operations need.
+
+     nodes and edges map IDs to records; outgoing/incoming map a node ID to
+     the IDs of its edges, and by_label/by_name find nodes without a scan.
+
+     Like the Neo4j store, nodes and edges carry the change_seq of the write
+     that last touched them (nodes also their created_seq) and deletes leave
+     tombstones, which is what get_graph_changes reads.
+    '''
+    def __init__(self):
+        '''
+         Initialize an empty graph.
+        '''
+        # node ID -> {"id", "label", "properties"}
+        self.nodes: Dict[int, Dict[str, Any]] = {}
+        # edge ID -> {"id", "type", "from", "to", "properties"}
+        self.edges: Dict[int, Dict[str, Any]] = {}
+        self.outgoing: Dict[int, Set[int]] = {}
+        self.incoming: Dict[int, Set[int]] = {}
+        self.by_label: Dict[str, Set[int]] = {}
+        self.by_name: Dict[Tuple[str, Any], Set[int]] = {}
+        # Change version, advanced once by every write like the Neo4j change clock
+        self.seq = 0
+        self.pruned_seq = 0
+        # {"entity", "id", "change_seq", "deleted_at"} in change_seq order
+        self.tombstones: List[Dict[str, Any]] = []
+
+    def add_node(self, node_id: int, label: str, properties: Dict[str, Any]) -> None:
+        '''
+         Insert a node and index it.
+
+         find :
+            node_id (int)
+            label (str)
+            properties (Dict[str, Any])
+        '''
+        properties.update(created_seq=self.seq, change_seq=self.seq)
+        self.nodes[node_id] = {"id": node_id, "label": label, "properties": properties}
+        self.outgoing[node_id] = set()
+        self.incoming[node_id] = set()
+        self.by_label.setdefault(label, set()).add(node_id)
+        self._index_name(node_id)
+
+    def set_properties(self, node_id: int, properties: Dict[str, Any]) -> None:
+        '''
+         Merge properties into a node, keeping the name index current.
+
+         find :
+            node_id (int)
+            properties (Dict[str, Any])
+        '''
+        self._unindex_name(node_id)
+        self.nodes[node_id]["properties"].update(properties, change_seq=self.seq)
+        self._index_name(node_id)
+
+    def remove_node(self, node_id: int) -> List[int]:
+        '''
+         Remove a node with all of its edges.
+
+         find : node_id (int)
+
+         Return : List[int]: IDs of the removed edges
+        '''
+        edge_ids = list(self.outgoing[node_id] | self.incoming[node_id])
+        for edge_id in edge_ids:
+            self.remove_edge(edge_id)
+        self._unindex_name(node_id)
+        node = self.nodes.pop(node_id)
+        self.by_label[node["label"]].discard(node_id)
+        del self.outgoing[node_id]
+        del self.incoming[node_id]
+        self._tombstone("node", node_id)
+        return edge_ids
+
+    def add_edge(self, edge_id: int, rel_type: str, start: int, end: int, properties: Dict[str, Any]) -> None:
+        '''
+         Insert an edge between two existing nodes.
+
+         find :
+            edge_id (int)
+            rel_type (str)
+            start (int)
+            end (int)
+            properties (Dict[str, Any])
+        '''
+        properties["change_seq"] = self.seq
+        self.edges[edge_id] = {"id": edge_id, "type": rel_type, "from": start, "to": end, "properties": properties}
+        self.outgoing[start].add(edge_id)
+        self.incoming[end].add(edge_id)
+
+    def remove_edge(self, edge_id: int) -> None:
+        '''
+         Remove an edge.
+
+         find : edge_id (int)
+        '''
+        edge = self.edges.pop(edge_id)
+        self.outgoing[edge["from"]].discard(edge_id)
+        self.incoming[edge["to"]].discard(edge_id)
+        self._tombstone("edge", edge_id)
+
+    def _tombstone(self, entity: str, ref_id: int) -> None:
+        '''
+         Record a delete for get_graph_changes and prune tombstones past TOMBSTONE_RETENTION.
+
+         find :
+            entity (str): "node" or "edge"
+            ref_id (int)
+        '''
+        now = datetime.now()
+        cutoff = (now - TOMBSTONE_RETENTION).isoformat()
+        expired = 0
+        while expired < len(self.tombstones) and self.tombstones[expired]["deleted_at"] < cutoff:
+            expired += 1
+        if expired:
+            self.pruned_seq = max(self.pruned_seq, self.tombstones[expired - 1]["change_seq"])
+            del self.tombstones[:expired]
+        self.tombstones.append({
+            "entity": entity,
+            "id": ref_id,
+            "change_seq": self.seq,
+            "deleted_at": now.isoformat()
+        })
+
+    def neighbours(self, node_id: int, rel_type: str, outgoing: bool = True) -> List[int]:
+        '''
+         Return the nodes reached over edges of one type.
+
+         find :
+            node_id (int)
+            rel_type (str)
+            outgoing (bool): Follow edges leaving the node, or entering it
+
+         Return : List[int]
+        '''
+        edge_ids = self.outgoing[node_id] if outgoing else self.incoming[node_id]
+        end = "to" if outgoing else "from"
+        return sorted(
+            self.edges[edge_id][end]
+            for edge_id in edge_ids
+            if self.edges[edge_id]["type"] == rel_type
+        )
+
+    def find(self, label: str, name: Any) -> List[int]:
+        '''
+         Return the IDs of nodes with a label and name.
+
+         find :
+            label (str)
+            name (Any)
+
+         Return : List[int]
+        '''
+        return sorted(self.by_name.get((label, name), ()))
+
+    def _index_name(self, node_id: int) -> None:
+        '''
+         Add a node to the (label, name) index.
+
+         find : node_id (int)
+        '''
+        node = self.nodes[node_id]
+        name = node["properties"].get("name")
+        if name is not None:
+            self.by_name.setdefault((node["label"], name), set()).add(node_id)
+
+    def _unindex_name(self, node_id: int) -> None:
+        '''
+         Remove a node from the (label, name) index.
+
+         find : node_id (int)
+        '''
+        node = self.nodes[node_id]
+        ids = self.by_name.get((node["label"], node["properties"].get("name")))
+        if ids is not None:
+            ids.discard(node_id)
+
+class InMemoryGraphStore(GraphStore):
+    '''
+     Graph store keeping every workspace in process memory.
+
+     IDs come from one counter shared by all workspaces, so an ID never
+     resolves in a workspace it was not created in. Each operation runs
+     under one lock without awaiting, which makes every write atomic.
+     Nothing is persisted: data is lost when the process exits.
+    '''
+    backend = "memory"
+
+    def __init__(self):
+        '''
+         Initialize an empty store.
+        '''
+        self._workspaces: Dict[str, _WorkspaceGraph] = {}
+        # Versions restart with the process, so their epoch does too
+        self.epoch = uuid.uuid4().hex[:8]
+        self._ids = itertools.count()
+        self._lock = threading.RLock()
+
+    def _graph(self, workspace_id: str, create: bool = False) -> _WorkspaceGraph:
+        '''
+         Return the graph of a workspace. An unknown workspace is only stored when
+         create is set; otherwise a detached empty graph is returned, so reads and
+         writes that find nothing to change never grow the store.
+
+         find :
+            workspace_id (str)
+            create (bool)
+
+         Return : _WorkspaceGraph
+        '''
+        key = workspace_key(workspace_id)
+        graph = self._workspaces.get(key)
+        if graph is None:
+            graph = _WorkspaceGraph()
+            if create:
+                self._workspaces[key] = graph
+        return graph
+
+    def _create_node(self, graph: _WorkspaceGraph, workspace_id: str, label: str, properties: Dict[str, Any]) -> int:
+        '''
+         Insert a node with serialized properties and return its ID.
+
+         find :
+            graph (_WorkspaceGraph)
+            workspace_id (str)
+            label (str)
+            properties (Dict[str, Any])
+
+         Return : int
+        '''
+        node_id = next(self._ids)
+        stored = {key: serialize_property_value(value) for key, value in properties.items()}
+        stored["workspace_id"] = workspace_key(workspace_id)
+        graph.add_node(node_id, label, stored)
+        return node_id
+
+    def _create_edge(
+        self,
+        graph: _WorkspaceGraph,
+        workspace_id: str,
+        rel_type: str,
+        start: int,
+        end: int,
+        properties: Dict[str, Any]
+    ) -> int:
+        '''
+         Insert an edge with serialized properties and return its ID.
+
+         find :
+            graph (_WorkspaceGraph)
+            workspace_id (str)
+            rel_type (str)
+            start (int)
+            end (int)
+            properties (Dict[str, Any])
+
+         Return : int
+        '''
+        edge_id = next(self._ids)
+        stored = {key: serialize_property_value(value) for key, value in properties.items()}
+        stored["workspace_id"] = workspace_key(workspace_id)
+        graph.add_edge(edge_id, rel_type, start, end, stored)
+        return edge_id
+
+    async def create_node(self, workspace_id: str, label: str, properties: Dict[str, Any]) -> int:
+        if 'created_at' not in properties:
+            properties['created_at'] = datetime.now().isoformat()
+        with self._lock:
+            graph = self._graph(workspace_id, create=True)
+            graph.seq += 1
+            return self._create_node(graph, workspace_id, label, properties)
+
+    async def create_relationship(
+        self,
+        workspace_id: str,
+        label1: str,
+        name1: str,
+        label2: str,
+        name2: str,
+        rel_type: str,
+        rel_properties: Optional[Dict[str, Any]] = None
+    ) -> Optional[int]:
+        props = rel_properties or {}
+        if 'created_at' not in props:
+            props['created_at'] = datetime.now().isoformat()
+        with self._lock:
+            graph = self._graph(workspace_id, create=True)
+            graph.seq += 1
+            # Like the Cypher MATCH ... CREATE, every matching pair is connected
+            edge_ids = [
+                self._create_edge(graph, workspace_id, rel_type, start, end, props)
+                for start in graph.find(label1, name1)
+                for end in graph.find(label2, name2)
+            ]
+        return edge_ids[0] if edge_ids else None
+
+    async def get_node(self, workspace_id: str, node_id: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            node = self._graph(workspace_id).nodes.get(node_id)
+            return dict(node["properties"]) if node is not None else None
+
+    async def update_node(self, workspace_id: str, node_id: int, new_properties: Dict[str, Any]) -> bool:
+        new_properties['updated_at'] = datetime.now().isoformat()
+        processed_properties = {
+            key: serialize_property_value(value)
+            for key, value in new_properties.items()
+            if key not in RESERVED_NODE_PROPERTIES
+        }
+        with self._lock:
+            graph = self._graph(workspace_id)
+            if node_id not in graph.nodes:
+                return False
+            graph.seq += 1
+            graph.set_properties(node_id, processed_properties)
+            return True
+
+    async def delete_node(self, workspace_id: str, node_id: int) -> bool:
+        with self._lock:
+            graph = self._graph(workspace_id)
+            if node_id not in graph.nodes:
+                return False
+            graph.seq += 1
+            graph.remove_node(node_id)
+            return True
+
+    async def delete_edge(self, workspace_id: str, edge_id: int) -> bool:
+        with self._lock:
+            graph = self._graph(workspace_id)
+            if edge_id not in graph.edges:
+                return False
+            graph.seq += 1
+            graph.remove_edge(edge_id)
+            return True
+
+    @staticmethod
+    def _task_entry(graph: _WorkspaceGraph, task_id: int, role_name: Any) -> Dict[str, Any]:
+        '''
+         Shape a task like the rows of get_workspace_tasks in graph_manager.
+
+         find :
+            graph (_WorkspaceGraph)
+            task_id (int)
+            role_name (Any)
+
+         Return : Dict[str, Any]
+        '''
+        task = graph.nodes[task_id]["properties"]
+        return {
+            "task": task.get("name"),
+            "role": role_name,
+            "node_id": task_id,
+            "status": task.get("status"),
+            "created_at": task.get("created_at"),
+            "priority": task.get("priority"),
+            "estimated_hours": task.get("estimated_hours")
+        }
+
+    async def get_workspace_tasks(self, workspace_id: str, split: bool = False) -> Dict[str, Any]:
+        with self._lock:
+            graph = self._graph(workspace_id)
+            eligible: Dict[str, List[Dict[str, Any]]] = {}
+            for workspace_node in graph.find("Workspace", workspace_id):
+                for role_id in graph.neighbours(workspace_node, "CONTAINS_ROLE"):
+                    role_name = graph.nodes[role_id]["properties"].get("name")
+                    people = graph.neighbours(role_id, "CAN_PERFORM", outgoing=False)
+                    for task_id in graph.neighbours(role_id, "HAS_TASK"):
+                        for person_id in people:
+                            person = graph.nodes[person_id]
+                            if person["label"] != "Person":
+                                continue
+                            eligible.setdefault(person["properties"].get("name"), []).append(
+                                self._task_entry(graph, task_id, role_name)
+                            )
+            eligible = dict(sorted(eligible.items(), key=lambda item: str(item[0])))
+            if not split:
+                return eligible
+
+            assigned: Dict[str, List[Dict[str, Any]]] = {}
+            for task_id in sorted(graph.by_label.get("Task", ())):
+                role_names = [
+                    graph.nodes[role_id]["properties"].get("name")
+                    for role_id in graph.neighbours(task_id, "HAS_TASK", outgoing=False)
+                ]
+                role_name = min((name for name in role_names if name is not None), default=None)
+                for person_id in graph.neighbours(task_id, "ASSIGNED_TO"):
+                    person = graph.nodes[person_id]
+                    if person["label"] == "Person":
+                        assigned.setdefault(person["properties"].get("name"), []).append(
+                            self._task_entry(graph, task_id, role_name)
+                        )
+        return split_task_views(eligible, assigned)
+
+    async def get_graph_statistics(self, workspace_id: str, recompute: bool = False) -> Dict[str, Any]:
+        with self._lock:
+            graph = self._graph(workspace_id)
+            workspace_nodes = graph.find("Workspace", workspace_id)
+            if not workspace_nodes:
+                return {}
+
+            role_ids = {
+                role_id
+                for workspace_node in workspace_nodes
+                for role_id in graph.neighbours(workspace_node, "CONTAINS_ROLE")
+            }
+            task_ids = {task_id for role_id in role_ids for task_id in graph.neighbours(role_id, "HAS_TASK")}
+            person_ids = {
+                person_id
+                for role_id in role_ids
+                for person_id in graph.neighbours(role_id, "CAN_PERFORM", outgoing=False)
+                if graph.nodes[person_id]["label"] == "Person"
+            }
+
+            status_counts: Dict[str, int] = {}
+            for task_id in task_ids:
+                status = str(graph.nodes[task_id]["properties"].get("status"))
+                status_counts[status] = status_counts.get(status, 0) + 1
+
+            def names(ids: Iterable[int], key: str) -> List[Any]:
+                values = (graph.nodes[node_id]["properties"].get(key) for node_id in sorted(ids))
+                return list(dict.fromkeys(value for value in values if value is not None))
+
+            return {
+                "role_count": len(role_ids),
+                "task_count": len(task_ids),
+                "person_count": len(person_ids),
+                "roles": names(role_ids, "name"),
+                "team_members": names(person_ids, "name"),
+                "task_statuses": sorted(names(task_ids, "status"), key=str),
+                "task_status_counts": status_counts,
+                "workspace_id": workspace_id,
+                "timestamp": datetime.now().isoformat()
+            }
+
+    async def get_workspace_members(self, workspace_id: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            graph = self._graph(workspace_id)
+            return [
+                {
+                    "name": graph.nodes[node_id]["properties"].get("name"),
+                    "type": graph.nodes[node_id]["properties"].get("type"),
+                    "details": graph.nodes[node_id]["properties"].get("details")
+                }
+                for node_id in sorted(graph.by_label.get("Person", ()))
+            ]
+
+    async def add_task_to_role(
+        self,
+        workspace_id: str,
+        role_name: str,
+        task_name: str,
+        task_properties: Dict[str, Any] = None
+    ) -> Optional[Dict[str, Any]]:
+        base_properties = {
+            "name": task_name,
+            "type": "task",
+            "status": "pending",
+            "source": USER_SOURCE,
+            "created_at": datetime.now().isoformat()
+        }
+        if task_properties:
+            base_properties.update(task_properties)
+
+        with self._lock:
+            graph = self._graph(workspace_id)
+            roles = graph.find("Role", role_name)
+            if not roles:
+                return None
+            graph.seq += 1
+            task_id = self._create_node(graph, workspace_id, "Task", base_properties)
+            self._create_edge(
+                graph, workspace_id, "HAS_TASK", roles[0], task_id,
+                {"created_at": base_properties["created_at"]}
+            )
+        return {"node_id": task_id, "role": role_name, "properties": base_properties}
+
+    async def assign_task(self, workspace_id: str, task_id: int, assignee_name: str) -> bool:
+        with self._lock:
+            graph = self._graph(workspace_id)
+            people = graph.find("Person", assignee_name)
+            if task_id not in graph.nodes or not people:
+                return False
+            graph.seq += 1
+            for edge_id in list(graph.outgoing[task_id]):
+                if graph.edges[edge_id]["type"] == "ASSIGNED_TO":
+                    graph.remove_edge(edge_id)
+            self._create_edge(
+                graph, workspace_id, "ASSIGNED_TO", task_id, people[0],
+                {"created_at": datetime.now().isoformat()}
+            )
+            return True
+
+    @staticmethod
+    def _analysis_snapshot(graph: _WorkspaceGraph) -> Dict[str, Any]:
+        '''
+         Read the analysis graph by natural key, like _read_analysis_snapshot in graph_manager.
+
+         find : graph (_WorkspaceGraph)
+
+         Return : Dict[str, Any]
+        '''
+        snapshot = empty_snapshot()
+        workspaces = sorted(graph.by_label.get("Workspace", ()))
+        snapshot["workspace"] = workspaces[0] if workspaces else None
+
+        def has_edge(node_id: int, rel_type: str, outgoing: bool) -> bool:
+            return bool(graph.neighbours(node_id, rel_type, outgoing=outgoing))
+
+        task_rows = []
+        for role_id in sorted(graph.by_label.get("Role", ())):
+            role = graph.nodes[role_id]["properties"]
+            snapshot["roles"].setdefault(role.get("name"), {"id": role_id, "task_count": role.get("task_count")})
+            for task_id in graph.neighbours(role_id, "HAS_TASK"):
+                if graph.nodes[task_id]["label"] == "Task":
+                    task_rows.append((task_id, role.get("name")))
+        for task_id, role_name in sorted(task_rows):
+            task = graph.nodes[task_id]["properties"]
+            snapshot["tasks"].setdefault((role_name, task.get("name")), {
+                "id": task_id,
+                "source": task.get("source"),
+                "touched": "updated_at" in task or has_edge(task_id, "ASSIGNED_TO", True)
+            })
+
+        for person_id in sorted(graph.by_label.get("Person", ())):
+            person = graph.nodes[person_id]["properties"]
+            snapshot["people"].setdefault(person.get("name"), {
+                "id": person_id,
+                "details": person.get("details"),
+                "role_count": person.get("role_count"),
+                "assigned": has_edge(person_id, "ASSIGNED_TO", False)
+            })
+
+        for edge_id in sorted(graph.edges):
+            edge = graph.edges[edge_id]
+            start, end = graph.nodes[edge["from"]], graph.nodes[edge["to"]]
+            if edge["type"] == "CAN_PERFORM" and start["label"] == "Person" and end["label"] == "Role":
+                key = (start["properties"].get("name"), end["properties"].get("name"))
+                snapshot["capabilities"].setdefault(key, edge_id)
+        return snapshot
+
+    async def write_analysis_graph(
+        self,
+        workspace_id: str,
+        document_analysis: Dict[str, Any],
+        team_analysis: Dict[str, List[str]],
+        team_details: Dict[str, Any],
+        document_count: int,
+        progress: Optional[Callable[[str, Dict[str, Any]], None]] = None
+    ) -> Dict[str, int]:
+        timestamp = datetime.now().isoformat()
+        edge_properties = {"created_at": timestamp}
+        workspace_properties = {"document_count": document_count, "team_size": len(team_details)}
+        # Steps named like the Neo4j statements; reported once the lock is released
+        batches: List[Dict[str, Any]] = []
+        step_started = time.perf_counter()
+
+        def step_done(step: str, rows: int) -> None:
+            nonlocal step_started
+            now = time.perf_counter()
+            if rows:
+                batches.append({"step": step, "rows": rows, "duration": round(now - step_started, 3)})
+            step_started = now
+
+        with self._lock:
+            graph = self._graph(workspace_id, create=True)
+            graph.seq += 1
+            snapshot = self._analysis_snapshot(graph)
+            plan = diff_analysis(snapshot, document_analysis, team_analysis, team_details)
+
+            workspace_node = snapshot["workspace"]
+            if workspace_node is None:
+                workspace_node = self._create_node(graph, workspace_id, "Workspace", {
+                    "name": workspace_id,
+                    "type": "workspace",
+                    "created_at": timestamp,
+                    **workspace_properties
+                })
+            else:
+                graph.set_properties(workspace_node, {**workspace_properties, "analyzed_at": timestamp})
+            step_started = time.perf_counter()
+
+            deleted_nodes = plan["tasks"]["delete"] + plan["roles"]["delete"] + plan["people"]["delete"]
+            for node_id in deleted_nodes:
+                graph.remove_node(node_id)
+            step_done("delete_nodes", len(deleted_nodes))
+            for edge_id in plan["capabilities"]["delete"]:
+                graph.remove_edge(edge_id)
+            step_done("delete_capabilities", len(plan["capabilities"]["delete"]))
+
+            for row in plan["roles"]["update"]:
+                graph.set_properties(row["id"], {"task_count": row["task_count"]})
+            step_done("update_roles", len(plan["roles"]["update"]))
+            role_ids = {name: role["id"] for name, role in snapshot["roles"].items()}
+            for row in plan["roles"]["create"]:
+                role_id = self._create_node(graph, workspace_id, "Role", {**row, "created_at": timestamp})
+                role_ids[row["name"]] = role_id
+                self._create_edge(graph, workspace_id, "CONTAINS_ROLE", workspace_node, role_id, edge_properties)
+            step_done("create_roles", len(plan["roles"]["create"]))
+
+            for task_id in plan["tasks"]["adopt"]:
+                graph.set_properties(task_id, {"source": ANALYSIS_SOURCE})
+            step_done("adopt_tasks", len(plan["tasks"]["adopt"]))
+            for task in plan["tasks"]["create"]:
+                task_id = self._create_node(graph, workspace_id, "Task", {
+                    "name": task["name"],
+                    "type": "task",
+                    "status": "pending",
+                    "priority": "medium",
+                    "estimated_hours": 0,
+                    "source": ANALYSIS_SOURCE,
+                    "created_at": timestamp
+                })
+                self._create_edge(graph, workspace_id, "HAS_TASK", role_ids[task["role"]], task_id, edge_properties)
+            step_done("create_tasks", len(plan["tasks"]["create"]))
+
+            for row in plan["people"]["update"]:
+                graph.set_properties(row["id"], {"details": row["details"], "role_count": row["role_count"]})
+            step_done("update_people", len(plan["people"]["update"]))
+            person_ids = {name: person["id"] for name, person in snapshot["people"].items()}
+            for row in plan["people"]["create"]:
+                person_id = self._create_node(graph, workspace_id, "Person", {**row, "created_at": timestamp})
+                person_ids[row["name"]] = person_id
+                self._create_edge(graph, workspace_id, "HAS_MEMBER", workspace_node, person_id, edge_properties)
+            step_done("create_people", len(plan["people"]["create"]))
+
+            for capability in plan["capabilities"]["create"]:
+                self._create_edge(
+                    graph, workspace_id, "CAN_PERFORM",
+                    person_ids[capability["person"]], role_ids[capability["role"]], edge_properties
+                )
+            step_done("create_capabilities", len(plan["capabilities"]["create"]))
+
+        if progress:
+            for batch in batches:
+                progress("graph_batch_written", batch)
+        return plan_summary(plan)
+
+    def _matches(self, graph: _WorkspaceGraph, node_id: int, filters: GraphFilter) -> bool:
+        '''
+         Check a node against graph filters, mirroring _node_filter_conditions.
+
+         find :
+            graph (_WorkspaceGraph)
+            node_id (int)
+            filters (GraphFilter)
+
+         Return : bool
+        '''
+        properties = graph.nodes[node_id]["properties"]
+        if filters.node_types and properties.get("type") not in filters.node_types:
+            return False
+        if filters.statuses and properties.get("status") not in filters.statuses:
+            return False
+        if filters.priorities and properties.get("priority") not in filters.priorities:
+            return False
+        if filters.assignee and properties.get("assignee") != filters.assignee:
+            return any(
+                graph.nodes[person_id]["label"] == "Person"
+                and graph.nodes[person_id]["properties"].get("name") == filters.assignee
+                for person_id in graph.neighbours(node_id, "ASSIGNED_TO")
+            )
+        return True
+
+    def _neighbourhood(self, graph: _WorkspaceGraph, center: int, hops: int) -> Set[int]:
+        '''
+         Return the nodes within a number of hops of a node, ignoring edge direction.
+
+         find :
+            graph (_WorkspaceGraph)
+            center (int)
+            hops (int)
+
+         Return : Set[int]
+        '''
+        seen = {center}
+        frontier = {center}
+        for _ in range(hops):
+            reached = set()
+            for node_id in frontier:
+                reached.update(graph.edges[edge_id]["to"] for edge_id in graph.outgoing[node_id])
+                reached.update(graph.edges[edge_id]["from"] for edge_id in graph.incoming[node_id])
+            frontier = reached - seen
+            seen |= frontier
+        return seen
+
+    @staticmethod
+    def _project_node(node: Dict[str, Any]) -> Dict[str, Any]:
+        '''
+         Shape a node like NODE_PROJECTION in graph_manager.
+
+         find : node (Dict[str, Any])
+
+         Return : Dict[str, Any]
+        '''
+        properties = node["properties"]
+        return {
+            "id": node["id"],
+            "label": properties.get("name"),
+            "type": properties.get("type"),
+            "status": properties.get("status"),
+            "priority": properties.get("priority"),
+            "assignee": properties.get("assignee"),
+            "created_at": properties.get("created_at"),
+            "properties": dict(properties)
+        }
+
+    @staticmethod
+    def _project_edge(edge: Dict[str, Any]) -> Dict[str, Any]:
+        '''
+         Shape an edge like EDGE_PROJECTION in graph_manager.
+
+         find : edge (Dict[str, Any])
+
+         Return : Dict[str, Any]
+        '''
+        return {
+            "id": edge["id"],
+            "from": edge["from"],
+            "to": edge["to"],
+            "type": edge["type"],
+            "properties": dict(edge["properties"])
+        }
+
+    async def query_workspace_graph(self, workspace_id: str, filters: Optional[GraphFilter] = None) -> Dict[str, Any]:
+        filters = filters or GraphFilter()
+        with self._lock:
+            graph = self._graph(workspace_id)
+            if filters.around is not None:
+                candidates = self._neighbourhood(graph, filters.around, filters.hops) if filters.around in graph.nodes else set()
+            else:
+                candidates = graph.nodes.keys()
+            matched = {node_id for node_id in candidates if self._matches(graph, node_id, filters)}
+
+            page = sorted(node_id for node_id in matched if filters.after is None or node_id > filters.after)
+            if filters.limit:
+                page = page[:filters.limit]
+
+            nodes = [self._project_node(graph.nodes[node_id]) for node_id in page]
+            edges = [
+                self._project_edge(graph.edges[edge_id])
+                for node_id in page
+                for edge_id in sorted(graph.outgoing[node_id])
+                if graph.edges[edge_id]["to"] in matched
+            ]
+
+        next_cursor = None
+        if filters.limit and len(nodes) == filters.limit:
+            next_cursor = nodes[-1]["id"]
+        return {
+            "nodes": nodes,
+            "edges": edges,
+            "next_cursor": next_cursor
+        }
+
+    async def change_version(self, workspace_id: str) -> Tuple[str, int]:
+        with self._lock:
+            return self.epoch, self._graph(workspace_id).seq
+
+    async def get_graph_changes(self, workspace_id: str, since: Optional[int] = None) -> Dict[str, Any]:
+        with self._lock:
+            graph = self._graph(workspace_id)
+            changes = {
+                "since": since,
+                "version": graph.seq,
+                "full_resync": False,
+                "nodes": {"added": [], "updated": [], "deleted": []},
+                "edges": {"added": [], "deleted": []}
+            }
+            if since is None:
+                return changes
+            if since < graph.pruned_seq or since > graph.seq:
+                changes["full_resync"] = True
+                return changes
+
+            def changed(records: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+                return sorted(
+                    (record for record in records if record["properties"]["change_seq"] > since),
+                    key=lambda record: (record["properties"]["change_seq"], record["id"])
+                )
+
+            for node in changed(graph.nodes.values()):
+                kind = "added" if node["properties"]["created_seq"] > since else "updated"
+                changes["nodes"][kind].append(self._project_node(node))
+            changes["edges"]["added"] = [self._project_edge(edge) for edge in changed(graph.edges.values())]
+            for tombstone in graph.tombstones:
+                if tombstone["change_seq"] > since:
+                    changes[f"{tombstone['entity']}s"]["deleted"].append({
+                        "id": tombstone["id"],
+                        "change_seq": tombstone["change_seq"],
+                        "deleted_at": tombstone["deleted_at"]
+                    })
+            return changes
+
+    async def force_resync(self, workspace_id: str) -> bool:
+        with self._lock:
+            graph = self._graph(workspace_id)
+            if not graph.seq:
+                return False
+            graph.seq += 1
+            graph.pruned_seq = graph.seq
+            return True
+
+    async def iter_workspace_graph(self, workspace_id: str) -> AsyncIterator[Dict[str, Any]]:
+        # Snapshot under the lock so a concurrent write cannot break iteration
+        with self._lock:
+            graph = self._graph(workspace_id)
+            nodes = [self._project_node(graph.nodes[node_id]) for node_id in sorted(graph.nodes)]
+            edges = [self._project_edge(graph.edges[edge_id]) for edge_id in sorted(graph.edges)]
+
+        for node in nodes:
+            yield {"node": node}
+        for edge in edges:
+            yield {"edge": edge}
+        yield {"end": {"nodes": len(nodes), "edges": len(edges)}}
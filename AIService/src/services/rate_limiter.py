@@ -0,0 +1,355 @@
+'''
+ Rate Limiter Service Module is module paces LLM calls of the whole process against the provider's request and token quotas.
+
+ Author: Tanapat Chamted
+'''
+
+from typing import Dict, Any, Optional
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+import asyncio
+import threading
+import time
+
+import tiktoken
+
+from src.utils.metrics import REGISTRY
+
+LLM_RATE_LIMIT_WAIT = REGISTRY.histogram(
+    "llm_rate_limit_wait_seconds",
+    "Time LLM calls waited for the shared rate limiter",
+    buckets=(0.01, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+)
+LLM_RATE_LIMITED = REGISTRY.counter(
+    "llm_rate_limited_total",
+    "LLM calls the provider rejected with 429"
+)
+
+# Encoding used to count tokens; None until load_token_encoding() succeeded
+_encoding = None
+
+def load_token_encoding(name: str = "cl100k_base") -> bool:
+    '''
+     Load the tiktoken encoding used by estimate_tokens.
+
+     tiktoken downloads the encoding on first use, so this is called once at
+     startup, off the event loop. If the download or the encoding fails,
+     tokens are estimated as four characters each.
+
+     find : name (str): tiktoken encoding name
+
+     Return : bool: Whether the encoding is available
+    '''
+    global _encoding
+    try:
+        _encoding = tiktoken.get_encoding(name)
+        return True
+    except Exception as e:
+        print(f"Could not load tiktoken encoding {name}, estimating LLM tokens from text length: {e}")
+        return False
+
+def estimate_tokens(text: str) -> int:
+    '''
+     Estimate the number of tokens in a text.
+
+     The provider's own tokenizer differs from tiktoken's, but the counts are
+     close enough to pace against a tokens-per-minute quota.
+
+     find : text (str)
+
+     Return : int
+    '''
+    if _encoding is not None:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return len(text) // 4 + 1
+
+def rate_limit_retry_after(error: Exception, default: float = 5.0) -> Optional[float]:
+    '''
+     Return how long the provider asked us to wait if an error is a 429.
+
+     Works with the Groq and OpenAI client errors, which carry the HTTP
+     response. Retry-After may be seconds or an HTTP date.
+
+     find :
+        error (Exception)
+        default (float): Seconds used when a 429 has no usable Retry-After header
+
+     Return : Optional[float]: None when the error is not a 429
+    '''
+    response = getattr(error, "response", None)
+    status = getattr(error, "status_code", None) or getattr(response, "status_code", None)
+    if status != 429:
+        return None
+    value = (getattr(response, "headers", None) or {}).get("retry-after")
+    if value is None:
+        return default
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max((parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds(), 0.0)
+    except (TypeError, ValueError):
+        return default
+
+class LLMRateLimiter:
+    '''
+     Token buckets for requests and tokens per minute, shared by every LLM call.
+
+     A call reserves one request and its estimated tokens up front. Balances
+     may go negative, and the call then waits until the debt is refilled, so
+     concurrent callers queue behind each other instead of polling. Buckets
+     hold at most burst_seconds of quota, which spreads calls evenly instead
+     of spending a minute's quota at once.
+
+     A 429 pauses every caller for the Retry-After period and lowers the
+     rate to 75% of its current value (to no less than 25% of the quota).
+     Each successful call then raises it by 2% of the quota until the full
+     quota is reached again.
+
+     State is guarded by a lock, so threads and event loops can share one
+     limiter.
+    '''
+    def __init__(
+        self,
+        requests_per_minute: float = 30,
+        tokens_per_minute: float = 6000,
+        burst_seconds: float = 10.0,
+        completion_tokens: int = 512
+    ):
+        '''
+         Initialize full buckets.
+
+         find :
+            requests_per_minute (float): 0 leaves requests unlimited
+            tokens_per_minute (float): 0 leaves tokens unlimited
+            burst_seconds (float): Seconds of quota that may be spent at once
+            completion_tokens (int): Tokens reserved for the response until its size is known
+        '''
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.burst_seconds = burst_seconds
+        self.completion_tokens = completion_tokens
+        self.scale = 1.0
+        self.min_scale = 0.25
+        self.blocked_until = 0.0
+        self.calls = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.rate_limited = 0
+        self.request_balance = self._capacity(requests_per_minute)
+        self.token_balance = self._capacity(tokens_per_minute)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _capacity(self, per_minute: float) -> float:
+        '''
+         Return the bucket size for a per-minute quota.
+
+         find : per_minute (float)
+
+         Return : float
+        '''
+        return max(per_minute * self.burst_seconds / 60.0, 1.0)
+
+    def _refill(self, now: float) -> None:
+        '''
+         Add the quota earned since the last update; the caller holds the lock.
+
+         find : now (float): time.monotonic()
+        '''
+        elapsed = now - max(self._updated, min(self.blocked_until, now))
+        self._updated = now
+        if elapsed <= 0:
+            return
+        if self.requests_per_minute > 0:
+            self.request_balance = min(
+                self._capacity(self.requests_per_minute),
+                self.request_balance + elapsed * self.requests_per_minute * self.scale / 60.0
+            )
+        if self.tokens_per_minute > 0:
+            self.token_balance = min(
+                self._capacity(self.tokens_per_minute),
+                self.token_balance + elapsed * self.tokens_per_minute * self.scale / 60.0
+            )
+
+    def _reserve(self, tokens: int) -> float:
+        '''
+         Take one request and some tokens, returning the seconds to wait first.
+
+         find : tokens (int)
+
+         Return : float
+        '''
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.calls += 1
+            wait = max(self.blocked_until - now, 0.0)
+            if self.requests_per_minute > 0:
+                self.request_balance -= 1
+                if self.request_balance < 0:
+                    wait = max(wait, -self.request_balance * 60.0 / (self.requests_per_minute * self.scale))
+            if self.tokens_per_minute > 0:
+                self.token_balance -= tokens
+                if self.token_balance < 0:
+                    wait = max(wait, -self.token_balance * 60.0 / (self.tokens_per_minute * self.scale))
+            return wait
+
+    def _blocked_for(self) -> float:
+        '''
+         Return the seconds left of a Retry-After pause.
+
+         Return : float
+        '''
+        with self._lock:
+            return max(self.blocked_until - time.monotonic(), 0.0)
+
+    def _record_wait(self, waited: float) -> None:
+        '''
+         Count the time a call waited.
+
+         find : waited (float)
+        '''
+        LLM_RATE_LIMIT_WAIT.observe(waited)
+        if waited > 0:
+            with self._lock:
+                self.waits += 1
+                self.wait_seconds += waited
+
+    def acquire(self, tokens: int) -> float:
+        '''
+         Block the calling thread until a call of this size may be sent.
+
+         find : tokens (int): Estimated prompt plus response tokens
+
+         Return : float: Seconds waited
+        '''
+        waited = 0.0
+        delay = self._reserve(tokens)
+        # A 429 seen while waiting extends the pause
+        while delay > 0:
+            time.sleep(delay)
+            waited += delay
+            delay = self._blocked_for()
+        self._record_wait(waited)
+        return waited
+
+    async def acquire_async(self, tokens: int) -> float:
+        '''
+         Wait without blocking the event loop until a call of this size may be sent.
+
+         find : tokens (int): Estimated prompt plus response tokens
+
+         Return : float: Seconds waited
+        '''
+        waited = 0.0
+        delay = self._reserve(tokens)
+        while delay > 0:
+            await asyncio.sleep(delay)
+            waited += delay
+            delay = self._blocked_for()
+        self._record_wait(waited)
+        return waited
+
+    def settle(self, reserved: int, used: int) -> None:
+        '''
+         Correct a reservation once the size of the response is known.
+
+         find :
+            reserved (int): Tokens passed to acquire
+            used (int): Estimated prompt plus response tokens
+        '''
+        if self.tokens_per_minute <= 0:
+            return
+        with self._lock:
+            self.token_balance = min(self._capacity(self.tokens_per_minute), self.token_balance + reserved - used)
+
+    def record_success(self) -> None:
+        '''
+         Move the rate back towards the full quota after a successful call.
+        '''
+        with self._lock:
+            self.scale = min(1.0, self.scale + 0.02)
+
+    def record_rate_limited(self, retry_after: float) -> None:
+        '''
+         Pause every caller for retry_after seconds and lower the rate.
+
+         find : retry_after (float): Seconds from the Retry-After header
+        '''
+        LLM_RATE_LIMITED.inc()
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.rate_limited += 1
+            self.blocked_until = max(self.blocked_until, now + retry_after)
+            self.scale = max(self.min_scale, self.scale * 0.75)
+            # Start from empty buckets after the pause instead of bursting
+            self.request_balance = min(self.request_balance, 0.0)
+            self.token_balance = min(self.token_balance, 0.0)
+        print(f"LLM provider rate limit hit; pausing calls for {retry_after:.1f}s at {self.scale:.0%} of the quota")
+
+    def stats(self) -> Dict[str, Any]:
+        '''
+         Return the quota, the current rate and wait counters.
+
+         Return : Dict[str, Any]
+        '''
+        with self._lock:
+            return {
+                "requests_per_minute": self.requests_per_minute,
+                "tokens_per_minute": self.tokens_per_minute,
+                "scale": round(self.scale, 3),
+                "blocked_for": round(max(self.blocked_until - time.monotonic(), 0.0), 3),
+                "token_counter": "tiktoken" if _encoding is not None else "characters",
+                "calls": self.calls,
+                "waits": self.waits,
+                "wait_seconds": round(self.wait_seconds, 3),
+                "rate_limited": self.rate_limited
+            }
+
+# Process-wide limiter, created in the application lifespan; None leaves calls unpaced
+_shared_limiter: Optional[LLMRateLimiter] = None
+
+def init_rate_limiter(
+    requests_per_minute: float = 30,
+    tokens_per_minute: float = 6000,
+    burst_seconds: float = 10.0,
+    completion_tokens: int = 512
+) -> LLMRateLimiter:
+    '''
+     Create the process-wide LLM rate limiter.
+
+     find :
+        requests_per_minute (float)
+        tokens_per_minute (float)
+        burst_seconds (float)
+        completion_tokens (int)
+
+     Return : LLMRateLimiter
+    '''
+    global _shared_limiter
+    if _shared_limiter is None:
+        _shared_limiter = LLMRateLimiter(
+            requests_per_minute=requests_per_minute,
+            tokens_per_minute=tokens_per_minute,
+            burst_seconds=burst_seconds,
+            completion_tokens=completion_tokens
+        )
+    return _shared_limiter
+
+def get_rate_limiter() -> Optional[LLMRateLimiter]:
+    '''
+     Return the process-wide LLM rate limiter.
+
+     Return : Optional[LLMRateLimiter]: None when rate limiting is disabled
+    '''
+    return _shared_limiter
+
+def close_rate_limiter() -> None:
+    '''
+     Forget the process-wide LLM rate limiter.
+    '''
+    global _shared_limiter
+    _shared_limiter = None
@@ -4,21 +4,17 @@
  Author: Thanapon Sukpiboon
 '''
 
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Callable
 from langchain.prompts import ChatPromptTemplate
 from langchain_core.output_parsers.string import StrOutputParser
 from langchain.schema.runnable import RunnablePassthrough
+import asyncio
 import json
+import time
 
-def create_role_analysis_chain(llm: Any):
-    '''
-     Create a chain for analyzing team member roles.
+from src.services.llm_service import invoke_cached, ainvoke_cached
 
-     find : llm (Any)
-        
-     Return : Chain
-    '''
-    template = """
+ROLE_ANALYSIS_TEMPLATE = """
     You are an AI assistant specializing in human resource management and team organization.
     
     Based on the provided team member details, identify all possible roles this person could perform effectively.
@@ -32,7 +28,15 @@ def create_role_analysis_chain(llm: Any):
     Only return the JSON string, without any additional explanation.
     """
 
-    prompt = ChatPromptTemplate.from_template(template)
+def create_role_analysis_chain(llm: Any):
+    '''
+     Create a chain for analyzing team member roles.
+
+     find : llm (Any)
+        
+     Return : Chain
+    '''
+    prompt = ChatPromptTemplate.from_template(ROLE_ANALYSIS_TEMPLATE)
     output_parser = StrOutputParser()
     
     chain = (
@@ -91,67 +95,157 @@ def validate_team_details(team_details: Dict[str, Any]) -> None:
 def analyze_team_roles(
     team_details: Dict[str, Any], 
     llm: Any,
-    max_retries: int = 3
+    max_retries: int = 3,
+    progress: Optional[Callable[[str, Dict[str, Any]], None]] = None
 ) -> Dict[str, List[str]]:
     '''
-     Analyze possible roles for each team member.
+     Analyze possible roles for each team member, one member at a time.
+
+     Members are validated on their own as in analyze_team_roles_async: a
+     member whose calls still fail after max_retries attempts is left out of
+     the result and the others are unaffected.
 
      find :
         team_details (Dict[str, Any])
         llm (Any)
-        max_retries (int)
+        max_retries (int): Attempts per member
+        progress (Optional[Callable[[str, Dict[str, Any]], None]]): Receives a member_analyzed event per member
         
-     Return : Dict[str, List[str]]
+     Return : Dict[str, List[str]]: Possible roles of the members that were analysed
     '''
     chain = create_role_analysis_chain(llm)
     roles_by_member: Dict[str, List[str]] = {}
     
-    for member_name, member_details in team_details.items():
+    for index, (member_name, member_details) in enumerate(team_details.items(), 1):
         print(f"Analyzing roles for team member: {member_name}")
+        started = time.perf_counter()
+        roles: Optional[List[str]] = None
+        error: Optional[Exception] = None
         
-        for _ in range(max_retries):
-            response = chain.invoke({
-                "member_name": member_name,
-                "member_details": str(member_details)
-            })
-            roles = parse_roles_response(response)
-            
+        for _ in range(max(max_retries, 1)):
+            try:
+                roles = invoke_cached(
+                    "analyze_member_roles",
+                    chain,
+                    llm,
+                    ROLE_ANALYSIS_TEMPLATE,
+                    {
+                        "member_name": member_name,
+                        "member_details": str(member_details)
+                    },
+                    parse=parse_roles_response
+                )
+                break
+            except Exception as e:
+                error = e
+        
+        member_event = {
+            "member": member_name,
+            "index": index,
+            "completed": index,
+            "total": len(team_details),
+            "ok": roles is not None,
+            "roles": len(roles or []),
+            "duration": round(time.perf_counter() - started, 3)
+        }
+        if roles is None:
+            print(f"Failed to analyze roles for {member_name} after {max_retries} attempts: {error}")
+            member_event["error"] = str(error)
+        else:
             roles_by_member[member_name] = roles
             print(f"Successfully analyzed roles for {member_name}")
-            break
+        if progress:
+            progress("member_analyzed", member_event)
 
     return roles_by_member
 
 async def analyze_team_roles_async(
     team_details: Dict[str, Any], 
     llm: Any,
-    max_retries: int = 3
+    max_retries: int = 3,
+    progress: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+    max_concurrency: int = 8
 ) -> Dict[str, List[str]]:
     '''
-     Asynchronous version of analyze_team_roles.
+     Analyze possible roles for all team members at once, up to max_concurrency calls at a time.
+
+     Every member is validated on its own: a member whose calls still fail
+     after max_retries attempts is left out of the result, so the graph keeps
+     what it knew about them, and the others are unaffected. Results keep the
+     order of team_details. member_analyzed
+     events are sent in completion order; their completed field counts
+     finished members.
 
      find :
         team_details (Dict[str, Any])
         llm (Any)
-        max_retries (int)
+        max_retries (int): Attempts per member
+        progress (Optional[Callable[[str, Dict[str, Any]], None]]): Receives a member_analyzed event per member
+        max_concurrency (int): Members analysed at the same time
         
-     Return : Dict[str, List[str]]
+     Return : Dict[str, List[str]]: Possible roles of the members that were analysed
     '''
     chain = create_role_analysis_chain(llm)
-    roles_by_member: Dict[str, List[str]] = {}
+    semaphore = asyncio.Semaphore(max(max_concurrency, 1))
+    completed = 0
     
-    for member_name, member_details in team_details.items():
-        print(f"Analyzing roles for team member: {member_name}")
+    async def analyze_member(index: int, member_name: str, member_details: Any) -> Optional[List[str]]:
+        nonlocal completed
+        roles: Optional[List[str]] = None
+        error: Optional[Exception] = None
+        async with semaphore:
+            print(f"Analyzing roles for team member: {member_name}")
+            started = time.perf_counter()
+            for _ in range(max(max_retries, 1)):
+                try:
+                    roles = await ainvoke_cached(
+                        "analyze_member_roles",
+                        chain,
+                        llm,
+                        ROLE_ANALYSIS_TEMPLATE,
+                        {
+                            "member_name": member_name,
+                            "member_details": str(member_details)
+                        },
+                        parse=parse_roles_response
+                    )
+                    break
+                except Exception as e:
+                    error = e
         
-        for _ in range(max_retries):
-            response = await chain.ainvoke({
-                "member_name": member_name,
-                "member_details": str(member_details)
-            })
-            roles = parse_roles_response(response)
-            
-            roles_by_member[member_name] = roles
+        completed += 1
+        member_event = {
+            "member": member_name,
+            "index": index,
+            "completed": completed,
+            "total": len(team_details),
+            "ok": roles is not None,
+            "roles": len(roles or []),
+            "duration": round(time.perf_counter() - started, 3)
+        }
+        if roles is None:
+            print(f"Failed to analyze roles for {member_name} after {max_retries} attempts: {error}")
+            member_event["error"] = str(error)
+        else:
             print(f"Successfully analyzed roles for {member_name}")
-            break
-
-    return roles_by_member
\ No newline at end of file
+        if progress:
+            progress("member_analyzed", member_event)
+        return roles
+    
+    tasks = [
+        asyncio.ensure_future(analyze_member(index, member_name, member_details))
+        for index, (member_name, member_details) in enumerate(team_details.items(), 1)
+    ]
+    try:
+        results = await asyncio.gather(*tasks)
+    except BaseException:
+        # Cancellation (or a progress hook stopping the job) ends the other members too
+        for task in tasks:
+            task.cancel()
+        raise
+    
+    return {
+        member_name: roles
+        for member_name, roles in zip(team_details.keys(), results)
+        if roles is not None
+    }
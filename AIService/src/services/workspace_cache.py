@@ -0,0 +1,128 @@
+'''
+ Workspace Read Cache Service Module is caches workspace read results keyed on a per-workspace version.
+
+ Author: Tanapat Chamted
+'''
+
+from collections import OrderedDict
+from typing import Dict, Any, Callable, Awaitable, Hashable, Optional, Tuple
+import hashlib
+import threading
+
+class WorkspaceReadCache:
+    '''
+     LRU cache of read results keyed on the stored version of a workspace.
+
+     Callers pass the workspace's change version, read from the graph store
+     (the persisted ChangeClock on Neo4j), with every lookup. Every write
+     advances that version in the store itself, so results and ETags made by
+     one worker are retired by writes handled in any other worker or replica.
+    '''
+    def __init__(self, max_entries: int = 1024):
+        '''
+         Initialize an empty cache.
+
+         find : max_entries (int): Maximum cached results kept across all workspaces
+        '''
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.not_modified = 0
+        self._entries: "OrderedDict[Tuple[str, str, Hashable], Tuple[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def etag(self, version: str, name: str, params: Hashable = None) -> str:
+        '''
+         Return a strong ETag for a read at a workspace version.
+
+         find :
+            version (str): Workspace change version from the graph store
+            name (str): Name of the read, e.g. "graph" or "tasks"
+            params (Hashable): Request parameters that change the result
+
+         Return : str: Quoted entity tag
+        '''
+        digest = hashlib.sha1(repr((name, params)).encode("utf-8")).hexdigest()[:12]
+        return f'"{version}-{digest}"'
+
+    def check_not_modified(self, etag: str, if_none_match: Optional[str]) -> bool:
+        '''
+         Return whether an If-None-Match header already names the current ETag.
+
+         find :
+            etag (str): Current ETag from etag()
+            if_none_match (Optional[str]): If-None-Match request header
+
+         Return : bool
+        '''
+        if not if_none_match:
+            return False
+        # If-None-Match uses weak comparison, so W/ prefixes added by proxies still match
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        if "*" in tags or etag in tags:
+            with self._lock:
+                self.not_modified += 1
+            return True
+        return False
+
+    async def get_or_load(
+        self,
+        workspace_id: str,
+        version: str,
+        name: str,
+        loader: Callable[[], Awaitable[Any]],
+        params: Hashable = None
+    ) -> Any:
+        '''
+         Return a cached result for a workspace version or load and cache it.
+
+         The version must be read before loading, so a write racing with the
+         load leaves the stored entry stale rather than mislabelled as fresh.
+
+         find :
+            workspace_id (str)
+            version (str): Workspace change version from the graph store
+            name (str): Name of the read, e.g. "graph" or "tasks"
+            loader (Callable[[], Awaitable[Any]]): Coroutine function producing the result
+            params (Hashable): Request parameters that change the result
+
+         Return : Any
+        '''
+        key = (workspace_id, name, params)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        value = await loader()
+
+        with self._lock:
+            self._entries[key] = (version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def stats(self) -> Dict[str, Any]:
+        '''
+         Return hit/miss counters and the current size.
+
+         Return : Dict[str, Any]
+        '''
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "not_modified": self.not_modified,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0
+            }
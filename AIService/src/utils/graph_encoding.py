@@ -0,0 +1,204 @@
+'''
+ Graph Encoding Utility Module is module encodes graph payloads as plain JSON, de-duplicated columnar JSON or MessagePack.
+
+ Author: Tanapat Chamted
+'''
+
+from typing import Dict, List, Any, Optional, Tuple
+import orjson
+import msgpack
+
+JSON_MEDIA_TYPE = "application/json"
+COLUMNAR_MEDIA_TYPE = "application/vnd.mindforge.columnar+json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+MSGPACK_MEDIA_TYPES = (MSGPACK_MEDIA_TYPE, "application/x-msgpack", "application/vnd.msgpack")
+
+# Node columns and the property each one is read from; these properties are
+# dropped from the per-node property maps in the columnar layout.
+NODE_COLUMNS: Tuple[Tuple[str, str], ...] = (
+    ("label", "name"),
+    ("type", "type"),
+    ("status", "status"),
+    ("priority", "priority"),
+    ("assignee", "assignee"),
+    ("created_at", "created_at")
+)
+EDGE_COLUMNS = ("from", "to", "type")
+
+# Property carried by every node and edge of a workspace; the columnar layout
+# sends it once at the top level
+WORKSPACE_PROPERTY = "workspace_id"
+
+def dumps_json(value: Any) -> bytes:
+    '''
+     Serialize a value to compact JSON with orjson.
+
+     Values JSON cannot represent (e.g. Neo4j temporal types) are written as strings.
+
+     find : value (Any)
+
+     Return : bytes
+    '''
+    return orjson.dumps(value, default=str)
+
+def dumps_msgpack(value: Any) -> bytes:
+    '''
+     Serialize a value to MessagePack.
+
+     find : value (Any)
+
+     Return : bytes
+    '''
+    return msgpack.packb(value, default=str, use_bin_type=True)
+
+def _shared_workspace(items: List[Dict[str, Any]]) -> Optional[str]:
+    '''
+     Return the workspace property when every item carries the same one.
+
+     find : items (List[Dict[str, Any]]): Nodes or edges with a properties map
+
+     Return : Optional[str]
+    '''
+    values = {item["properties"].get(WORKSPACE_PROPERTY) for item in items}
+    if len(values) == 1:
+        return values.pop()
+    return None
+
+def to_columnar(graph: Dict[str, Any]) -> Dict[str, Any]:
+    '''
+     Convert a {"nodes", "edges", "next_cursor"} graph to the columnar layout.
+
+     Nodes and edges become one list per field. Node properties that are already
+     a column, and the workspace property when it is shared, are removed from the
+     per-item property maps, so every value is sent once.
+
+     find : graph (Dict[str, Any])
+
+     Return : Dict[str, Any]
+    '''
+    nodes = graph.get("nodes", [])
+    edges = graph.get("edges", [])
+    workspace = _shared_workspace(nodes + edges)
+    dropped_node = {prop for _, prop in NODE_COLUMNS}
+    if workspace is not None:
+        dropped_node.add(WORKSPACE_PROPERTY)
+    dropped_edge = {WORKSPACE_PROPERTY} if workspace is not None else set()
+
+    node_columns: Dict[str, List[Any]] = {"id": [node["id"] for node in nodes]}
+    for column, prop in NODE_COLUMNS:
+        node_columns[column] = [node["properties"].get(prop) for node in nodes]
+    node_columns["properties"] = [
+        {key: value for key, value in node["properties"].items() if key not in dropped_node}
+        for node in nodes
+    ]
+
+    edge_columns: Dict[str, List[Any]] = {"id": [edge["id"] for edge in edges]}
+    for column in EDGE_COLUMNS:
+        edge_columns[column] = [edge[column] for edge in edges]
+    edge_columns["properties"] = [
+        {key: value for key, value in edge["properties"].items() if key not in dropped_edge}
+        for edge in edges
+    ]
+
+    return {
+        "format": "columnar",
+        "workspace_id": workspace,
+        "nodes": node_columns,
+        "edges": edge_columns,
+        "next_cursor": graph.get("next_cursor")
+    }
+
+def from_columnar(payload: Dict[str, Any]) -> Dict[str, Any]:
+    '''
+     Rebuild the row graph from the columnar layout.
+
+     Neo4j has no null properties, so None column values are left out of the
+     rebuilt property maps.
+
+     find : payload (Dict[str, Any])
+
+     Return : Dict[str, Any]
+    '''
+    workspace = payload.get("workspace_id")
+    node_columns = payload["nodes"]
+    edge_columns = payload["edges"]
+
+    nodes = []
+    for index, node_id in enumerate(node_columns["id"]):
+        properties = dict(node_columns["properties"][index])
+        node = {"id": node_id}
+        for column, prop in NODE_COLUMNS:
+            value = node_columns[column][index]
+            node[column] = value
+            if value is not None:
+                properties[prop] = value
+        if workspace is not None:
+            properties[WORKSPACE_PROPERTY] = workspace
+        node["properties"] = properties
+        nodes.append(node)
+
+    edges = []
+    for index, edge_id in enumerate(edge_columns["id"]):
+        properties = dict(edge_columns["properties"][index])
+        if workspace is not None:
+            properties[WORKSPACE_PROPERTY] = workspace
+        edge = {"id": edge_id}
+        for column in EDGE_COLUMNS:
+            edge[column] = edge_columns[column][index]
+        edge["properties"] = properties
+        edges.append(edge)
+
+    return {"nodes": nodes, "edges": edges, "next_cursor": payload.get("next_cursor")}
+
+def negotiate_graph_media_type(accept: Optional[str]) -> str:
+    '''
+     Pick the graph encoding for an Accept header.
+
+     The highest q-value among the supported types wins; ties keep the order
+     of the header. Plain JSON is used when nothing supported is accepted.
+
+     find : accept (Optional[str]): Accept request header
+
+     Return : str: JSON_MEDIA_TYPE, COLUMNAR_MEDIA_TYPE or MSGPACK_MEDIA_TYPE
+    '''
+    if not accept:
+        return JSON_MEDIA_TYPE
+
+    best, best_q = JSON_MEDIA_TYPE, 0.0
+    for part in accept.split(","):
+        media_type, *params = [piece.strip() for piece in part.split(";")]
+        media_type = media_type.lower()
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+
+        if media_type in MSGPACK_MEDIA_TYPES:
+            media_type = MSGPACK_MEDIA_TYPE
+        elif media_type not in (COLUMNAR_MEDIA_TYPE, JSON_MEDIA_TYPE):
+            continue
+        if q > best_q:
+            best, best_q = media_type, q
+    return best
+
+def encode_graph(graph: Dict[str, Any], media_type: str) -> bytes:
+    '''
+     Encode a graph for a media type returned by negotiate_graph_media_type.
+
+     MessagePack carries the columnar layout.
+
+     find :
+        graph (Dict[str, Any])
+        media_type (str)
+
+     Return : bytes
+    '''
+    if media_type == MSGPACK_MEDIA_TYPE:
+        return dumps_msgpack(to_columnar(graph))
+    if media_type == COLUMNAR_MEDIA_TYPE:
+        return dumps_json(to_columnar(graph))
+    return dumps_json(graph)
@@ -0,0 +1,259 @@
+'''
+ Metrics Utility Module is module keeps in-process counters and histograms and renders them in the Prometheus text format.
+
+ Author: Tanapat Chamted
+'''
+
+from typing import Dict, List, Tuple, Callable, Iterable, Sequence
+import threading
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# (metric name, labels, value) rows produced by collectors at scrape time
+Sample = Tuple[str, Dict[str, str], float]
+
+def _escape(value: str) -> str:
+    '''
+     Escape a label value for the text exposition format.
+
+     find : value (str)
+
+     Return : str
+    '''
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    '''
+     Format labels as {name="value",...}, or an empty string without labels.
+
+     find : labels (Dict[str, str])
+
+     Return : str
+    '''
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+def _format_value(value: float) -> str:
+    '''
+     Format a sample value, keeping integers free of a trailing .0.
+
+     find : value (float)
+
+     Return : str
+    '''
+    if value == float("inf"):
+        return "+Inf"
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+class Counter:
+    '''
+     Monotonic counter with a fixed set of label names.
+    '''
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        '''
+         Initialize an empty counter.
+
+         find :
+            name (str)
+            documentation (str)
+            label_names (Sequence[str])
+        '''
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        '''
+         Increase the counter for a label combination.
+
+         find :
+            amount (float)
+            labels (str): One value per label name
+        '''
+        key = tuple(str(labels[name]) for name in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        '''
+         Render the counter in the text exposition format.
+
+         Return : List[str]
+        '''
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                labels = dict(zip(self.label_names, key))
+                lines.append(f"{self.name}{_format_labels(labels)} {_format_value(value)}")
+        return lines
+
+class Histogram:
+    '''
+     Cumulative histogram with fixed buckets and a fixed set of label names.
+    '''
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        '''
+         Initialize an empty histogram.
+
+         find :
+            name (str)
+            documentation (str)
+            label_names (Sequence[str])
+            buckets (Sequence[float]): Upper bounds, +Inf is added automatically
+        '''
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # label values -> [per-bucket counts, sum, count]
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        '''
+         Record one observation.
+
+         find :
+            value (float)
+            labels (str): One value per label name
+        '''
+        key = tuple(str(labels[name]) for name in self.label_names)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = [[0] * len(self.buckets), 0.0, 0]
+                self._series[key] = series
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][index] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        '''
+         Render the histogram in the text exposition format.
+
+         Return : List[str]
+        '''
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._series.items()):
+                labels = dict(zip(self.label_names, key))
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    bucket_labels = {**labels, "le": _format_value(bound)}
+                    lines.append(f"{self.name}_bucket{_format_labels(bucket_labels)} {cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}")
+                lines.append(f"{self.name}_count{_format_labels(labels)} {count}")
+        return lines
+
+class MetricsRegistry:
+    '''
+     Collection of metrics rendered together on the /metrics endpoint.
+
+     Collectors are callables that read current values (pool usage, cache
+     size) at scrape time, so those values never need to be pushed.
+    '''
+    def __init__(self):
+        '''
+         Initialize an empty registry.
+        '''
+        self._metrics: Dict[str, object] = {}
+        self._collectors: List[Tuple[str, str, str, Callable[[], Iterable[Sample]]]] = []
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> Counter:
+        '''
+         Create a counter, or return the one already registered under the name.
+
+         find :
+            name (str)
+            documentation (str)
+            label_names (Sequence[str])
+
+         Return : Counter
+        '''
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = Counter(name, documentation, label_names)
+            return self._metrics[name]
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        '''
+         Create a histogram, or return the one already registered under the name.
+
+         find :
+            name (str)
+            documentation (str)
+            label_names (Sequence[str])
+            buckets (Sequence[float])
+
+         Return : Histogram
+        '''
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = Histogram(name, documentation, label_names, buckets)
+            return self._metrics[name]
+
+    def add_collector(
+        self,
+        name: str,
+        metric_type: str,
+        documentation: str,
+        collect: Callable[[], Iterable[Sample]]
+    ) -> None:
+        '''
+         Register a callable producing samples for one metric family at scrape time.
+
+         find :
+            name (str): Metric family name
+            metric_type (str): "gauge" or "counter"
+            documentation (str)
+            collect (Callable[[], Iterable[Sample]])
+        '''
+        with self._lock:
+            self._collectors.append((name, metric_type, documentation, collect))
+
+    def render(self) -> str:
+        '''
+         Render every metric in the text exposition format.
+
+         Return : str
+        '''
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        for name, metric_type, documentation, collect in collectors:
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            try:
+                for sample_name, labels, value in collect():
+                    lines.append(f"{sample_name}{_format_labels(labels)} {_format_value(value)}")
+            except Exception as e:
+                # A failing collector must not take the whole scrape down
+                print(f"Error collecting metric {name}: {str(e)}")
+        return "\n".join(lines) + "\n"
+
+# Process-wide registry shared by all modules
+REGISTRY = MetricsRegistry()
@@ -382,6 +382,242 @@ Phase 3: Deployment
         
         print("Workspace statistics:", json.dumps(stats, indent=2))
 
+    def test_10_stream_graph(self):
+        """Test streaming graph endpoint"""
+        print("\nTesting graph streaming...")
+        response = requests.get(
+            f"{self.base_url}/workspace/{self.workspace_id}/graph/stream",
+            stream=True
+        )
+        
+        self.assertEqual(response.status_code, 200)
+        items = [json.loads(line) for line in response.iter_lines() if line]
+        
+        # Nodes come first, then edges, then the totals
+        nodes = [item["node"] for item in items if "node" in item]
+        edges = [item["edge"] for item in items if "edge" in item]
+        self.assertIn("end", items[-1])
+        self.assertEqual(items[-1]["end"]["nodes"], len(nodes))
+        self.assertEqual(items[-1]["end"]["edges"], len(edges))
+        self.assertTrue(len(nodes) > 0)
+        
+        print(f"Streamed {len(nodes)} nodes and {len(edges)} edges")
+
+    def test_11_filtered_graph(self):
+        """Test graph filters and keyset pagination"""
+        print("\nTesting filtered graph pages...")
+        node_ids = []
+        cursor = None
+        
+        while True:
+            params = {"type": "task", "limit": 2}
+            if cursor is not None:
+                params["after"] = cursor
+            response = requests.get(
+                f"{self.base_url}/workspace/{self.workspace_id}/graph",
+                params=params
+            )
+            self.assertEqual(response.status_code, 200)
+            page = response.json()
+            
+            self.assertTrue(len(page["nodes"]) <= 2)
+            for node in page["nodes"]:
+                self.assertEqual(node["type"], "task")
+            node_ids.extend(node["id"] for node in page["nodes"])
+            
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+        
+        # Pages come back in ascending ID order without overlap
+        self.assertEqual(node_ids, sorted(set(node_ids)))
+        print(f"Paged through {len(node_ids)} task nodes")
+
+    def test_12_graph_changes(self):
+        """Test polling graph changes since a version"""
+        print("\nTesting graph change polling...")
+        changes_url = f"{self.base_url}/workspace/{self.workspace_id}/graph/changes"
+        
+        response = requests.get(changes_url)
+        self.assertEqual(response.status_code, 200)
+        version = response.json()["version"]
+        
+        graph = requests.get(
+            f"{self.base_url}/workspace/{self.workspace_id}/graph",
+            params={"type": "task", "limit": 1}
+        ).json()
+        if not graph["nodes"]:
+            self.skipTest("No tasks available for testing")
+        task_id = graph["nodes"][0]["id"]
+        
+        response = requests.put(
+            f"{self.base_url}/workspace/{self.workspace_id}/node/{task_id}",
+            json={"status": "in_progress"}
+        )
+        self.assertEqual(response.status_code, 200)
+        
+        response = requests.get(changes_url, params={"since": version})
+        self.assertEqual(response.status_code, 200)
+        changes = response.json()
+        
+        self.assertFalse(changes["full_resync"])
+        self.assertTrue(changes["version"] > version)
+        self.assertIn(task_id, [node["id"] for node in changes["nodes"]["updated"]])
+        print(f"Saw task {task_id} change between versions {version} and {changes['version']}")
+
+    def test_13_batch_update(self):
+        """Test applying many task updates in one batch"""
+        print("\nTesting batch updates...")
+        graph = requests.get(
+            f"{self.base_url}/workspace/{self.workspace_id}/graph",
+            params={"type": "task"}
+        ).json()
+        task_ids = [node["id"] for node in graph["nodes"]]
+        if not task_ids:
+            self.skipTest("No tasks available for testing")
+        
+        missing_id = max(task_ids) + 1000000
+        batch = {
+            "node_updates": [
+                {"node_id": node_id, "properties": {"status": "completed"}}
+                for node_id in task_ids + [missing_id]
+            ]
+        }
+        response = requests.post(
+            f"{self.base_url}/workspace/{self.workspace_id}/batch",
+            json=batch
+        )
+        self.assertEqual(response.status_code, 200)
+        result = response.json()
+        
+        # Every real task is updated; the missing one is reported, not fatal
+        self.assertEqual(result["status"], "partial")
+        updates = result["details"]["results"]["node_updates"]
+        self.assertEqual([item["applied"] for item in updates], [True] * len(task_ids) + [False])
+        print(f"Batch-updated {len(task_ids)} tasks")
+
+    def test_14_metrics(self):
+        """Test the metrics endpoint"""
+        print("\nTesting metrics...")
+        requests.get(f"{self.base_url}/workspace/{self.workspace_id}/statistics")
+        
+        response = requests.get(f"{self.base_url}/metrics")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers["content-type"].startswith("text/plain"))
+        
+        body = response.text
+        self.assertIn('route="/workspace/{workspace_id}/statistics"', body)
+        self.assertIn("neo4j_query_duration_seconds_bucket", body)
+        self.assertIn("neo4j_sessions_in_use", body)
+        print("Metrics exposed")
+
+    def test_15_conditional_get(self):
+        """Test ETag revalidation of workspace reads"""
+        print("\nTesting conditional GET...")
+        url = f"{self.base_url}/workspace/{self.workspace_id}/statistics"
+        response = requests.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response.headers["ETag"]
+
+        response = requests.get(url, headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+
+        # A write retires the ETag
+        requests.post(
+            f"{self.base_url}/workspace/{self.workspace_id}/task",
+            data={"role_name": "Developer", "task_name": "Revalidate caches"}
+        )
+        response = requests.get(url, headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers["ETag"], etag)
+        print("Conditional GET works")
+
+    def test_16_background_analysis_events(self):
+        """Test a background analysis reports its progress as server-sent events"""
+        print("\nTesting background analysis events...")
+        files = [
+            ('files', (os.path.basename(path), open(path, 'rb')))
+            for path in self.test_files
+        ]
+        data = {
+            'workspace_id': (None, self.workspace_id),
+            'team_details': (None, json.dumps(self.team_details))
+        }
+        response = requests.post(
+            f"{self.base_url}/analyze",
+            params={"background": "true"},
+            files=files + list(data.items())
+        )
+        self.assertEqual(response.status_code, 202)
+        job_id = response.json()["details"]["job_id"]
+
+        events = []
+        with requests.get(f"{self.base_url}/jobs/{job_id}/events", stream=True, timeout=300) as response:
+            self.assertTrue(response.headers["content-type"].startswith("text/event-stream"))
+            for line in response.iter_lines(decode_unicode=True):
+                if line and line.startswith("data: "):
+                    events.append(json.loads(line[len("data: "):]))
+
+        names = [event["event"] for event in events]
+        self.assertEqual(names[-1], "finished")
+        self.assertIn("page_processed", names)
+        self.assertIn("member_analyzed", names)
+        self.assertTrue(all("elapsed" in event["data"] for event in events if event["event"] == "page_processed"))
+
+        job = requests.get(f"{self.base_url}/jobs/{job_id}").json()
+        self.assertEqual(job["status"], "succeeded")
+        self.assertIn("stages", job["result"]["timings"])
+        print("Background analysis events:", len(events))
+
+    def test_17_batch_keeps_workspace_scope(self):
+        """Test a batch update cannot move a node into another workspace (GRAPH_TENANCY_MODE=shared)"""
+        print("\nTesting batch workspace scoping...")
+        graph = requests.get(
+            f"{self.base_url}/workspace/{self.workspace_id}/graph",
+            params={"type": "task"}
+        ).json()
+        if not graph["nodes"]:
+            self.skipTest("No tasks available for testing")
+        node = graph["nodes"][0]
+        other_workspace = f"other{str(uuid.uuid4())[:8]}"
+
+        batch = {
+            "node_updates": [{
+                "node_id": node["id"],
+                "properties": {"workspace_id": other_workspace, "created_seq": 0, "status": "in progress"}
+            }]
+        }
+        response = requests.post(f"{self.base_url}/workspace/{self.workspace_id}/batch", json=batch)
+        self.assertEqual(response.status_code, 200)
+
+        graph = requests.get(
+            f"{self.base_url}/workspace/{self.workspace_id}/graph",
+            params={"type": "task"}
+        ).json()
+        updated = next(item for item in graph["nodes"] if item["id"] == node["id"])
+        self.assertEqual(updated["status"], "in progress")
+        self.assertEqual(updated["properties"]["workspace_id"], node["properties"]["workspace_id"])
+        self.assertEqual(updated["properties"].get("created_seq"), node["properties"].get("created_seq"))
+
+        other = requests.get(f"{self.base_url}/workspace/{other_workspace}/graph").json()
+        self.assertNotIn(node["id"], [item["id"] for item in other.get("nodes", [])])
+        print("Batch updates stay in their workspace")
+
+    def test_18_missed_batch_keeps_etag(self):
+        """Test a batch that applies nothing does not retire cached reads"""
+        print("\nTesting batch without applied items...")
+        url = f"{self.base_url}/workspace/{self.workspace_id}/statistics"
+        etag = requests.get(url).headers["ETag"]
+
+        batch = {"node_updates": [{"node_id": 2 ** 40, "properties": {"status": "completed"}}], "edge_deletes": [2 ** 40]}
+        response = requests.post(f"{self.base_url}/workspace/{self.workspace_id}/batch", json=batch)
+        self.assertEqual(response.status_code, 200)
+
+        response = requests.get(url, headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        print("Missed batch kept the ETag")
+
     @classmethod
     def tearDownClass(cls):
         """Clean up test"""
@@ -0,0 +1,127 @@
+'''
+ Document Processor Testing is tests sequential and concurrent role extraction against a fake model.
+
+ Author: Tanapat Chamted
+'''
+
+import unittest
+import asyncio
+import json
+import os
+import random
+import re
+import shutil
+import tempfile
+from unittest import mock
+
+from langchain_core.runnables import RunnableLambda
+from tenacity import wait_none
+
+from src.services.document_processor import (
+    process_documents,
+    process_documents_async,
+    process_single_document,
+    process_single_document_async
+)
+
+def fake_response(prompt) -> str:
+    """Answer with the role and task written in the document"""
+    role, task = re.search(r"ROLE=(\w+) TASK=(\w+)", prompt.to_string()).groups()
+    return json.dumps({role: [task, "Shared task"]})
+
+class FakeModel:
+    """Fake chat model tracking how many calls run at once"""
+
+    def __init__(self):
+        self.running = 0
+        self.peak = 0
+
+    async def respond(self, prompt) -> str:
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            # Finish in random order
+            await asyncio.sleep(random.uniform(0, 0.02))
+            return fake_response(prompt)
+        finally:
+            self.running -= 1
+
+    def runnable(self) -> RunnableLambda:
+        return RunnableLambda(fake_response, afunc=self.respond)
+
+class DocumentProcessorTest(unittest.TestCase):
+    """Test process_documents and process_documents_async"""
+
+    def setUp(self):
+        """Write one text document per page"""
+        self.directory = tempfile.mkdtemp()
+        self.paths = []
+        for index in range(8):
+            path = os.path.join(self.directory, f"doc_{index}.txt")
+            with open(path, "w") as file:
+                file.write(f"ROLE=Role{index % 3} TASK=Task{index}")
+            self.paths.append(path)
+        self.model = FakeModel()
+        self.patcher = mock.patch("src.services.llm_service.get_llm", return_value=self.model.runnable())
+        self.patcher.start()
+
+    def tearDown(self):
+        """Remove the documents"""
+        self.patcher.stop()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_01_concurrent_matches_sequential(self):
+        """Test concurrent extraction merges pages in page order, like sequential extraction"""
+        sequential = process_documents(self.paths, ["Developer"], request_delay=0)
+        for _ in range(3):
+            concurrent = asyncio.run(process_documents_async(
+                self.paths, ["Developer"], request_delay=0, max_concurrency=3
+            ))
+            summary = concurrent.pop("_processing_summary")
+            self.assertEqual(concurrent, {
+                role: tasks for role, tasks in sequential.items() if role != "_processing_summary"
+            })
+            self.assertEqual(summary["successful_documents"], 8)
+            self.assertEqual(summary["failed_documents"], 0)
+        self.assertEqual(sequential["Role0"], ["Task0", "Shared task", "Task3", "Task6"])
+
+    def test_02_concurrency_limit_and_progress(self):
+        """Test no more than max_concurrency pages run at once and every page is reported"""
+        events = []
+        asyncio.run(process_documents_async(
+            self.paths,
+            ["Developer"],
+            request_delay=0,
+            max_concurrency=2,
+            progress=lambda event, data: events.append((event, data))
+        ))
+        self.assertEqual(self.model.peak, 2)
+        pages = [data for event, data in events if event == "page_processed"]
+        self.assertEqual(sorted(page["index"] for page in pages), list(range(1, 9)))
+        self.assertEqual([page["completed"] for page in pages], list(range(1, 9)))
+        self.assertTrue(all(page["ok"] for page in pages))
+        self.assertEqual(events[8], ("stage", {"stage": "extracting"}))
+
+    def test_03_failed_page_is_reported(self):
+        """Test a page whose retries give up counts as failed in both modes"""
+        with open(self.paths[5], "w") as file:
+            file.write("Nothing to extract")
+        events = []
+        with mock.patch.object(process_single_document.retry, "wait", wait_none()), \
+                mock.patch.object(process_single_document_async.retry, "wait", wait_none()):
+            sequential = process_documents(self.paths, ["Developer"], request_delay=0)
+            concurrent = asyncio.run(process_documents_async(
+                self.paths,
+                ["Developer"],
+                request_delay=0,
+                progress=lambda event, data: events.append((event, data))
+            ))
+        for result in (sequential, concurrent):
+            self.assertEqual(result["_processing_summary"]["failed_documents"], 1)
+            self.assertEqual(result["_processing_summary"]["successful_documents"], 7)
+            self.assertNotIn("Task5", result["Role2"])
+        failed = [data["index"] for event, data in events if event == "page_processed" and not data["ok"]]
+        self.assertEqual(failed, [6])
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,72 @@
+'''
+ Graph Encoding Testing is tests the columnar and MessagePack graph encodings and content negotiation.
+
+ Author: Tanapat Chamted
+'''
+
+import unittest
+import asyncio
+import json
+
+import msgpack
+
+from src.services.memory_graph_store import InMemoryGraphStore
+from src.utils.graph_encoding import (
+    JSON_MEDIA_TYPE,
+    COLUMNAR_MEDIA_TYPE,
+    MSGPACK_MEDIA_TYPE,
+    to_columnar,
+    from_columnar,
+    encode_graph,
+    negotiate_graph_media_type
+)
+
+class GraphEncodingTest(unittest.TestCase):
+    """Test graph encodings on a small analysis graph"""
+
+    def setUp(self):
+        """Write a small analysis graph and read it back"""
+        store = InMemoryGraphStore()
+        asyncio.run(store.write_analysis_graph(
+            "workspace-a",
+            {"Developer": ["Build API", "Write tests"], "Designer": ["Draw mockups"]},
+            {"John": ["Developer"], "Jane": ["Designer", "Developer"]},
+            {"John": {"skills": ["Python"]}, "Jane": {"skills": ["Figma"]}},
+            document_count=1
+        ))
+        self.graph = asyncio.run(store.query_workspace_graph("workspace-a"))
+
+    def test_01_columnar_round_trip(self):
+        """Test the columnar layout rebuilds the same graph"""
+        columnar = to_columnar(self.graph)
+        self.assertEqual(len(columnar["nodes"]["id"]), len(self.graph["nodes"]))
+        self.assertEqual(from_columnar(columnar), self.graph)
+
+    def test_02_columnar_deduplicates(self):
+        """Test column values and the workspace are not repeated in the property maps"""
+        columnar = to_columnar(self.graph)
+        self.assertIsNotNone(columnar["workspace_id"])
+        for properties in columnar["nodes"]["properties"]:
+            self.assertNotIn("name", properties)
+            self.assertNotIn("workspace_id", properties)
+        self.assertLess(len(encode_graph(self.graph, COLUMNAR_MEDIA_TYPE)), len(encode_graph(self.graph, JSON_MEDIA_TYPE)))
+
+    def test_03_encodings(self):
+        """Test every encoding decodes to the same graph"""
+        self.assertEqual(json.loads(encode_graph(self.graph, JSON_MEDIA_TYPE)), self.graph)
+        self.assertEqual(from_columnar(json.loads(encode_graph(self.graph, COLUMNAR_MEDIA_TYPE))), self.graph)
+        self.assertEqual(from_columnar(msgpack.unpackb(encode_graph(self.graph, MSGPACK_MEDIA_TYPE))), self.graph)
+
+    def test_04_negotiation(self):
+        """Test Accept header negotiation"""
+        self.assertEqual(negotiate_graph_media_type(None), JSON_MEDIA_TYPE)
+        self.assertEqual(negotiate_graph_media_type("*/*"), JSON_MEDIA_TYPE)
+        self.assertEqual(negotiate_graph_media_type("application/x-msgpack"), MSGPACK_MEDIA_TYPE)
+        self.assertEqual(
+            negotiate_graph_media_type(f"{MSGPACK_MEDIA_TYPE};q=0.5, {COLUMNAR_MEDIA_TYPE}"),
+            COLUMNAR_MEDIA_TYPE
+        )
+        self.assertEqual(negotiate_graph_media_type("text/html, application/json;q=0.9"), JSON_MEDIA_TYPE)
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
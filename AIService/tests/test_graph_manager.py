@@ -0,0 +1,75 @@
+'''
+ Graph Manager Testing is tests workspace database provisioning without a Neo4j server.
+
+ Author: Tanapat Chamted
+'''
+
+import unittest
+import asyncio
+
+from src.services.graph_manager import AsyncNeo4jManager, workspace_key
+
+class FakeManager(AsyncNeo4jManager):
+    """Manager whose server is a dict of node keys per database"""
+
+    def __init__(self, tenancy_mode, nodes):
+        super().__init__("bolt://localhost:7687", "neo4j", "password", tenancy_mode=tenancy_mode)
+        self.nodes = nodes
+        self.claims = []
+        self.fail_claims = 0
+
+    async def _get_database_status(self, safe_db_name):
+        return "online"
+
+    async def _ensure_schema(self, safe_db_name):
+        pass
+
+    async def _claim_legacy_key(self, safe_db_name, legacy_key, key):
+        await asyncio.sleep(0.01)
+        if self.fail_claims:
+            self.fail_claims -= 1
+            raise RuntimeError("claim failed")
+        self.claims.append((safe_db_name, legacy_key, key))
+        database = self.nodes[safe_db_name]
+        database[:] = [key if node == legacy_key else node for node in database]
+
+class WorkspaceDatabaseTest(unittest.TestCase):
+    """Test init_database"""
+
+    def run_async(self, coroutine):
+        """Run a coroutine to completion"""
+        return asyncio.run(coroutine)
+
+    def test_01_shared_mode_claims_every_workspace(self):
+        """Test each workspace of a shared database claims its legacy data on first use"""
+        manager = FakeManager("shared", {"neo4j": ["workspacea", "workspacea", "workspaceb"]})
+
+        async def main():
+            await manager.init_database("workspace-a")
+            # The shared database is online now; the next workspace must still be claimed
+            await asyncio.gather(*(manager.init_database("Workspace-B") for _ in range(3)))
+            await manager.init_database("workspace-a")
+            return await manager.init_database("workspace_b")
+
+        self.assertEqual(self.run_async(main()), "neo4j")
+        self.assertEqual(manager.claims, [
+            ("neo4j", "workspacea", workspace_key("workspace-a")),
+            ("neo4j", "workspaceb", workspace_key("Workspace-B")),
+            ("neo4j", "workspaceb", workspace_key("workspace_b"))
+        ])
+        # The first workspace used takes the data of IDs that collided under the legacy key
+        self.assertEqual(manager.nodes["neo4j"], [
+            workspace_key("workspace-a"), workspace_key("workspace-a"), workspace_key("Workspace-B")
+        ])
+
+    def test_02_failed_claim_is_retried(self):
+        """Test a workspace whose claim failed is claimed again on the next request"""
+        manager = FakeManager("database", {"workspacea": ["workspacea"]})
+        manager.fail_claims = 1
+        with self.assertRaises(RuntimeError):
+            self.run_async(manager.init_database("workspace-a"))
+        self.assertEqual(self.run_async(manager.init_database("workspace-a")), "workspacea")
+        self.assertEqual(manager.nodes["workspacea"], [workspace_key("workspace-a")])
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
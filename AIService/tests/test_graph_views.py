@@ -0,0 +1,184 @@
+'''
+ Graph Views Testing is tests that the maintained task index and statistics match a full recomputation.
+
+ Author: Tanapat Chamted
+'''
+
+import unittest
+import asyncio
+import time
+
+from src.services.memory_graph_store import InMemoryGraphStore
+from src.services.graph_views import IndexedGraphStore, WorkspaceViewIndex, _WorkspaceView
+from src.services.workspace_cache import WorkspaceReadCache
+
+class IndexedGraphStoreTest(unittest.TestCase):
+    """Test IndexedGraphStore on top of the in-memory store"""
+
+    def setUp(self):
+        """Write a small analysis graph and load the index"""
+        self.inner = InMemoryGraphStore()
+        self.store = IndexedGraphStore(self.inner)
+        self.workspace_id = "workspace-a"
+        self.run_async(self.store.write_analysis_graph(
+            self.workspace_id,
+            {"Developer": ["Build API", "Write tests"], "Designer": ["Draw mockups"]},
+            {"John": ["Developer"], "Jane": ["Designer", "Developer"]},
+            {"John": {}, "Jane": {}},
+            document_count=1
+        ))
+        self.run_async(self.store.get_workspace_tasks(self.workspace_id))
+
+    def run_async(self, coroutine):
+        """Run a coroutine to completion"""
+        return asyncio.run(coroutine)
+
+    def assertIndexMatchesStore(self):
+        """The index must answer exactly like a fresh query on the store"""
+        for split in (False, True):
+            indexed = self.run_async(self.store.get_workspace_tasks(self.workspace_id, split=split))
+            expected = self.run_async(self.inner.get_workspace_tasks(self.workspace_id, split=split))
+            self.assertEqual(indexed, expected)
+
+        indexed = self.run_async(self.store.get_graph_statistics(self.workspace_id))
+        expected = self.run_async(self.inner.get_graph_statistics(self.workspace_id))
+        indexed.pop("timestamp")
+        expected.pop("timestamp")
+        self.assertEqual(indexed, expected)
+
+    def test_01_loaded_view(self):
+        """Test the loaded view and that reads are served from it"""
+        self.assertIndexMatchesStore()
+        self.assertEqual(self.store.views.stats()["loads"], 1)
+
+    def test_02_add_and_update_task(self):
+        """Test new tasks and property updates are applied in place"""
+        task = self.run_async(self.store.add_task_to_role(self.workspace_id, "Designer", "Review copy"))
+        self.run_async(self.store.update_node(self.workspace_id, task["node_id"], {"status": "done"}))
+        self.assertIndexMatchesStore()
+        self.assertEqual(self.store.views.stats()["loads"], 1)
+
+    def test_03_assign_and_reassign(self):
+        """Test assignments replace each other"""
+        task_id = self.run_async(self.store.get_workspace_tasks(self.workspace_id))["John"][0]["node_id"]
+        self.run_async(self.store.assign_task(self.workspace_id, task_id, "John"))
+        self.run_async(self.store.assign_task(self.workspace_id, task_id, "Jane"))
+        split = self.run_async(self.store.get_workspace_tasks(self.workspace_id, split=True))
+        self.assertEqual([task["node_id"] for task in split["Jane"]["assigned"]], [task_id])
+        self.assertEqual(split["John"]["assigned"], [])
+        self.assertIndexMatchesStore()
+
+    def test_04_deletes(self):
+        """Test node and edge deletes"""
+        task_id = self.run_async(self.store.get_workspace_tasks(self.workspace_id))["Jane"][0]["node_id"]
+        self.run_async(self.store.assign_task(self.workspace_id, task_id, "Jane"))
+        self.run_async(self.store.delete_node(self.workspace_id, task_id))
+        self.assertIndexMatchesStore()
+
+        graph = self.run_async(self.inner.query_workspace_graph(self.workspace_id))
+        capability = next(edge for edge in graph["edges"] if edge["type"] == "CAN_PERFORM")
+        self.run_async(self.store.delete_edge(self.workspace_id, capability["id"]))
+        self.assertIndexMatchesStore()
+
+    def test_05_status_counts(self):
+        """Test status updates move tasks between status counters"""
+        task_id = self.run_async(self.store.get_workspace_tasks(self.workspace_id))["John"][0]["node_id"]
+        self.run_async(self.store.update_node(self.workspace_id, task_id, {"status": "done"}))
+        stats = self.run_async(self.store.get_graph_statistics(self.workspace_id))
+        self.assertEqual(stats["task_status_counts"], {"pending": 2, "done": 1})
+        self.assertIndexMatchesStore()
+
+    def test_06_recompute(self):
+        """Test recompute rebuilds counters that drifted from the stored graph"""
+        self.store.views.get(self.workspace_id).counted_roles.clear()
+        self.assertEqual(self.run_async(self.store.get_graph_statistics(self.workspace_id))["role_count"], 0)
+        stats = self.run_async(self.store.get_graph_statistics(self.workspace_id, recompute=True))
+        self.assertEqual(stats["role_count"], 2)
+        self.assertIndexMatchesStore()
+
+    def test_07_catch_up(self):
+        """Test changes made around the wrapper are applied from the change feed without a rebuild"""
+        task = self.run_async(self.inner.add_task_to_role(self.workspace_id, "Developer", "Hidden"))
+        self.run_async(self.inner.assign_task(self.workspace_id, task["node_id"], "John"))
+        self.assertIndexMatchesStore()
+        self.run_async(self.inner.assign_task(self.workspace_id, task["node_id"], "Jane"))
+        self.run_async(self.inner.update_node(self.workspace_id, task["node_id"], {"status": "done"}))
+        self.run_async(self.inner.write_analysis_graph(
+            self.workspace_id,
+            {"Developer": ["Build API"], "Tester": ["Run tests"]},
+            {"John": ["Developer", "Tester"], "Jane": ["Developer"]},
+            {"John": {}, "Jane": {}},
+            document_count=1
+        ))
+        self.assertIndexMatchesStore()
+        stats = self.store.views.stats()
+        self.assertEqual((stats["loads"], stats["catch_ups"]), (1, 2))
+
+    def test_08_view_eviction(self):
+        """Test the least recently read view is evicted and unread views are dropped"""
+        store = IndexedGraphStore(self.inner, max_entries=2)
+        for workspace_id in ("workspace-a", "workspace-b", "workspace-a", "workspace-c"):
+            self.run_async(store.get_workspace_tasks(workspace_id))
+        stats = store.views.stats()
+        self.assertEqual((stats["workspaces"], stats["loads"], stats["hits"], stats["evictions"]), (2, 3, 1, 1))
+        self.assertIsNotNone(store.views.get("workspace-a"))
+        self.assertIsNone(store.views.get("workspace-b"))
+
+        views = WorkspaceViewIndex(max_age=0.05, max_entries=2)
+        views.store("workspace-a", _WorkspaceView())
+        views.store("workspace-b", _WorkspaceView())
+        time.sleep(0.03)
+        self.assertIsNotNone(views.get("workspace-a"))
+        time.sleep(0.03)
+        # Reading a view keeps it; the unread one expires
+        views.store("workspace-c", _WorkspaceView())
+        self.assertEqual((views.stats()["workspaces"], views.stats()["expirations"]), (2, 1))
+        self.assertIsNone(views.get("workspace-b"))
+
+    def test_09_full_resync(self):
+        """Test a view is rebuilt when the change feed it needs was pruned"""
+        self.run_async(self.inner.add_task_to_role(self.workspace_id, "Designer", "Review copy"))
+        self.run_async(self.inner.force_resync(self.workspace_id))
+        self.assertIndexMatchesStore()
+        self.assertEqual(self.store.views.stats()["loads"], 2)
+
+    def test_10_writes_from_another_worker(self):
+        """Test a worker's view and read cache entries are retired by a write made through another worker"""
+        worker_a, worker_b = self.store, IndexedGraphStore(self.inner)
+        cache = WorkspaceReadCache()
+
+        async def read_tasks(store):
+            epoch, seq = await store.change_version(self.workspace_id)
+            version = f"{epoch}-{seq}"
+            tasks = await cache.get_or_load(
+                self.workspace_id, version, "tasks", lambda: store.get_workspace_tasks(self.workspace_id)
+            )
+            return cache.etag(version, "tasks"), tasks
+
+        etag, tasks = self.run_async(read_tasks(worker_b))
+        self.assertEqual(self.run_async(read_tasks(worker_b)), (etag, tasks))
+
+        self.run_async(worker_a.add_task_to_role(self.workspace_id, "Designer", "Review copy"))
+        new_etag, new_tasks = self.run_async(read_tasks(worker_b))
+        self.assertNotEqual(new_etag, etag)
+        self.assertIn("Review copy", [task["task"] for task in new_tasks["Jane"]])
+        self.assertEqual(new_tasks, self.run_async(self.inner.get_workspace_tasks(self.workspace_id)))
+
+        # Worker A caught up from the change feed instead of rebuilding
+        self.assertEqual(self.run_async(read_tasks(worker_a)), (new_etag, new_tasks))
+        self.assertEqual(worker_a.views.stats()["loads"], 1)
+
+    def test_11_force_resync(self):
+        """Test a forced resync retires the version and the views of every worker"""
+        other = IndexedGraphStore(self.inner)
+        self.run_async(other.get_graph_statistics(self.workspace_id))
+        before = self.run_async(self.store.change_version(self.workspace_id))
+
+        self.assertTrue(self.run_async(self.store.force_resync(self.workspace_id)))
+        self.assertEqual(self.run_async(other.change_version(self.workspace_id))[1], before[1] + 1)
+        self.run_async(other.get_graph_statistics(self.workspace_id))
+        self.assertEqual(other.views.stats()["loads"], 2)
+        self.assertFalse(self.run_async(self.store.force_resync("workspace-b")))
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
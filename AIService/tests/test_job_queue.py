@@ -0,0 +1,185 @@
+'''
+ Job Queue Testing is tests background jobs, their progress and cancellation.
+
+ Author: Tanapat Chamted
+'''
+
+import unittest
+import asyncio
+import time
+
+from src.services.job_queue import JobQueue, JobQueueFull
+from src.services.analysis_progress import AnalysisProgress
+
+async def wait_finished(job, timeout=5.0):
+    """Wait until a job has finished"""
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not job.finished:
+        if asyncio.get_running_loop().time() > deadline:
+            raise TimeoutError(f"Job {job.job_id} did not finish")
+        await asyncio.sleep(0.01)
+
+class JobQueueTest(unittest.TestCase):
+    """Test the job queue with small coroutine jobs"""
+
+    def run_with_queue(self, scenario, **options):
+        """Run a scenario against a started queue and close it afterwards"""
+        async def main():
+            queue = JobQueue(**options)
+            queue.start()
+            try:
+                return await scenario(queue)
+            finally:
+                await queue.close()
+        return asyncio.run(main())
+
+    def test_01_success_and_progress(self):
+        """Test a job reports progress, returns its result and runs cleanup once"""
+        cleaned = []
+
+        async def run(job):
+            progress = AnalysisProgress(job, document_count=1)
+            progress("document_loaded", {"document": "a.txt", "pages": 2})
+            progress("page_processed", {"document": "a.txt", "index": 1, "total": 2, "ok": True})
+            progress("page_processed", {"document": "a.txt", "index": 2, "total": 2, "ok": False})
+            return {"document_outcomes": progress.document_outcomes()}
+
+        async def scenario(queue):
+            job = queue.submit("analyze", "workspace-a", run, cleanup=lambda: cleaned.append(True))
+            await wait_finished(job)
+            return job.to_dict()
+
+        state = self.run_with_queue(scenario)
+        self.assertEqual(state["status"], "succeeded")
+        self.assertEqual(state["percent"], 100.0)
+        self.assertEqual(state["progress"]["documents"][0]["status"], "partial")
+        self.assertEqual(
+            state["result"]["document_outcomes"],
+            [{"document": "a.txt", "status": "partial", "pages": 2, "processed": 1, "failed": 1}]
+        )
+        self.assertEqual(cleaned, [True])
+
+    def test_02_failure(self):
+        """Test an exception marks the job as failed"""
+        async def run(job):
+            raise ValueError("bad input")
+
+        async def scenario(queue):
+            job = queue.submit("analyze", "workspace-a", run)
+            await wait_finished(job)
+            return job.to_dict()
+
+        state = self.run_with_queue(scenario)
+        self.assertEqual(state["status"], "failed")
+        self.assertEqual(state["error"], "bad input")
+
+    def test_03_cancel_queued(self):
+        """Test a queued job cancelled before it starts never runs"""
+        started = []
+        cleaned = []
+        release = None
+
+        async def blocker(job):
+            await release.wait()
+
+        async def run(job):
+            started.append(job.job_id)
+
+        async def scenario(queue):
+            nonlocal release
+            release = asyncio.Event()
+            first = queue.submit("analyze", "workspace-a", blocker)
+            second = queue.submit("analyze", "workspace-a", run, cleanup=lambda: cleaned.append(True))
+            await asyncio.sleep(0.01)
+            queue.cancel(second.job_id)
+            release.set()
+            await wait_finished(first)
+            await asyncio.sleep(0.01)
+            return second.to_dict()
+
+        state = self.run_with_queue(scenario, workers=1)
+        self.assertEqual(state["status"], "cancelled")
+        self.assertEqual(started, [])
+        self.assertEqual(cleaned, [True])
+
+    def test_04_cancel_running_thread(self):
+        """Test a job running in a thread stops at its next progress update"""
+        steps = []
+
+        def work(job):
+            for step in range(200):
+                job.update(stage="working", percent=step / 2)
+                steps.append(step)
+                time.sleep(0.01)
+
+        async def run(job):
+            return await asyncio.to_thread(work, job)
+
+        async def scenario(queue):
+            job = queue.submit("analyze", "workspace-a", run)
+            while job.status != "running" or not steps:
+                await asyncio.sleep(0.01)
+            queue.cancel(job.job_id)
+            await wait_finished(job)
+            # The thread keeps going until its next update raises
+            await asyncio.sleep(0.1)
+            return job.to_dict()
+
+        state = self.run_with_queue(scenario)
+        self.assertEqual(state["status"], "cancelled")
+        self.assertLess(len(steps), 200)
+
+    def test_05_queue_full(self):
+        """Test submit is refused once max_queued jobs are waiting"""
+        async def scenario(queue):
+            release = asyncio.Event()
+
+            async def blocker(job):
+                await release.wait()
+
+            queue.submit("analyze", "workspace-a", blocker)
+            await asyncio.sleep(0.01)
+            queue.submit("analyze", "workspace-a", blocker)
+            with self.assertRaises(JobQueueFull):
+                queue.submit("analyze", "workspace-a", blocker)
+            release.set()
+            return queue.stats()
+
+        stats = self.run_with_queue(scenario, workers=1, max_queued=1)
+        self.assertEqual(stats["jobs"]["running"], 1)
+        self.assertEqual(stats["jobs"]["queued"], 1)
+
+    def test_06_stream_events(self):
+        """Test events are replayed, streamed live with timings and end with the finished event"""
+        async def run(job):
+            progress = AnalysisProgress(job, document_count=1)
+            progress("stage", {"stage": "loading"})
+            progress("document_loaded", {"document": "a.txt", "pages": 1, "duration": 0.1})
+            await asyncio.sleep(0.05)
+            progress("page_processed", {"document": "a.txt", "index": 1, "total": 1, "ok": True, "duration": 0.2})
+            progress("stage", {"stage": "team"})
+            return {"timings": progress.timings()}
+
+        async def scenario(queue):
+            job = queue.submit("analyze", "workspace-a", run)
+            live = [event async for event in job.stream_events(keepalive=1.0) if event is not None]
+            replayed = [event async for event in job.stream_events(after=3)]
+            return live, replayed, job.to_dict()
+
+        live, replayed, state = self.run_with_queue(scenario)
+        names = [event["event"] for event in live]
+        self.assertEqual(names, [
+            "started", "stage", "document_loaded", "stage_finished", "page_processed",
+            "stage_finished", "stage", "finished"
+        ])
+        self.assertEqual([event["seq"] for event in live], list(range(1, 9)))
+        self.assertEqual(state["last_event_seq"], 8)
+        self.assertEqual(replayed, live[3:])
+        self.assertEqual(live[2]["data"]["duration"], 0.1)
+        self.assertEqual(live[3]["data"]["stage"], "loading")
+        self.assertGreaterEqual(live[4]["data"]["elapsed"], 0.05)
+        self.assertEqual(live[-1]["data"]["status"], "succeeded")
+        self.assertEqual(set(live[-1]["data"]["result"]["timings"]["stages"]), {"loading", "extracting"})
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
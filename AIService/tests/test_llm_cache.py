@@ -0,0 +1,112 @@
+'''
+ LLM Cache Testing is tests the on-disk LLM response cache and cached chain calls.
+
+ Author: Tanapat Chamted
+'''
+
+import unittest
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from src.services import llm_cache
+from src.services.llm_cache import LLMCache, llm_cache_key, init_llm_cache, close_llm_cache
+from src.services.llm_service import invoke_cached
+
+class FakeLLM:
+    """Stands in for ChatGroq in cache keys"""
+    model_name = "llama-3.1-70b-versatile"
+    temperature = 0.3
+
+class FakeChain:
+    """Chain returning canned responses and counting calls"""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = 0
+
+    def invoke(self, inputs):
+        self.calls += 1
+        return self.responses.pop(0)
+
+class LLMCacheTest(unittest.TestCase):
+    """Test LLMCache and invoke_cached"""
+
+    def setUp(self):
+        """Create a scratch directory for cache files"""
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "cache", "llm.sqlite3")
+
+    def tearDown(self):
+        """Close the shared cache and remove the scratch directory"""
+        close_llm_cache()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_01_key(self):
+        """Test the key changes with every part of the call"""
+        base = ("extract", "model-a", 0.3, "template", {"text": "hello"})
+        key = llm_cache_key(*base)
+        self.assertEqual(key, llm_cache_key("extract", "model-a", 0.3, "template", {"text": "hello"}))
+        for index, value in enumerate(("analyze", "model-b", 0.7, "other template", {"text": "bye"})):
+            changed = list(base)
+            changed[index] = value
+            self.assertNotEqual(key, llm_cache_key(*changed))
+
+    def test_02_get_put_persist(self):
+        """Test responses survive reopening the database"""
+        cache = LLMCache(self.path)
+        self.assertIsNone(cache.get("a"))
+        cache.put("a", "extract", "response")
+        self.assertEqual(cache.get("a"), "response")
+        cache.close()
+
+        cache = LLMCache(self.path)
+        self.assertEqual(cache.get("a"), "response")
+        stats = cache.stats()
+        self.assertEqual((stats["entries"], stats["hits"], stats["misses"]), (1, 1, 0))
+        cache.close()
+
+    def test_03_lru_eviction(self):
+        """Test the least recently used response is evicted first"""
+        cache = LLMCache(self.path, max_entries=2)
+        cache.put("a", "extract", "1")
+        time.sleep(0.01)
+        cache.put("b", "extract", "2")
+        time.sleep(0.01)
+        cache.get("a")
+        time.sleep(0.01)
+        cache.put("c", "extract", "3")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), "1")
+        self.assertEqual(cache.get("c"), "3")
+        self.assertEqual(cache.stats()["evictions"], 1)
+        cache.close()
+
+    def test_04_ttl(self):
+        """Test expired responses are misses"""
+        cache = LLMCache(self.path, ttl=0.05)
+        cache.put("a", "extract", "1")
+        time.sleep(0.1)
+        self.assertIsNone(cache.get("a"))
+        stats = cache.stats()
+        self.assertEqual((stats["entries"], stats["expired"], stats["misses"]), (0, 1, 1))
+        cache.close()
+
+    def test_05_invoke_cached(self):
+        """Test identical calls reach the LLM once and bad output is not cached"""
+        init_llm_cache(self.path)
+        chain = FakeChain("not json", '{"Developer": ["Build API"]}')
+        inputs = {"document_content": "We need an API"}
+
+        with self.assertRaises(json.JSONDecodeError):
+            invoke_cached("extract_roles_tasks", chain, FakeLLM(), "template", inputs, parse=json.loads)
+        for _ in range(3):
+            result = invoke_cached("extract_roles_tasks", chain, FakeLLM(), "template", inputs, parse=json.loads)
+            self.assertEqual(result, {"Developer": ["Build API"]})
+        self.assertEqual(chain.calls, 2)
+        self.assertEqual(llm_cache.get_llm_cache().stats()["hits"], 2)
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,244 @@
+'''
+ In-Memory Graph Store Testing is tests the graph store without a running Neo4j.
+
+ Author: Tanapat Chamted
+'''
+
+import unittest
+import asyncio
+
+from src.core.models import GraphFilter
+from src.services.memory_graph_store import InMemoryGraphStore
+from src.services.graph_manager import workspace_key, workspace_database_name
+
+class InMemoryGraphStoreTest(unittest.TestCase):
+    """Test InMemoryGraphStore"""
+
+    def setUp(self):
+        """Write a small analysis graph"""
+        self.store = InMemoryGraphStore()
+        self.workspace_id = "workspace-a"
+        self.summary = self.run_async(self.store.write_analysis_graph(
+            self.workspace_id,
+            {"Developer": ["Build API", "Write tests"], "Designer": ["Draw mockups"], "_processing_summary": {}},
+            {"John": ["Developer"], "Jane": ["Designer", "Developer"]},
+            {"John": {"skills": ["Python"]}, "Jane": {"skills": ["Figma"]}},
+            document_count=1
+        ))
+
+    def run_async(self, coroutine):
+        """Run a coroutine to completion"""
+        return asyncio.run(coroutine)
+
+    def test_01_write_analysis_graph(self):
+        """Test analysis summary and statistics"""
+        self.assertEqual(self.summary, {
+            "roles": 2, "tasks": 3, "people": 2, "capabilities": 3, "created": 10, "updated": 0, "deleted": 0,
+            "deletes_skipped": False
+        })
+        stats = self.run_async(self.store.get_graph_statistics(self.workspace_id))
+        self.assertEqual(stats["role_count"], 2)
+        self.assertEqual(stats["task_count"], 3)
+        self.assertEqual(stats["person_count"], 2)
+        self.assertEqual(stats["task_statuses"], ["pending"])
+
+    def test_02_workspace_tasks(self):
+        """Test tasks are grouped by the people who can perform their role"""
+        tasks = self.run_async(self.store.get_workspace_tasks(self.workspace_id))
+        self.assertEqual(list(tasks), ["Jane", "John"])
+        self.assertEqual(len(tasks["Jane"]), 3)
+        self.assertEqual({task["task"] for task in tasks["John"]}, {"Build API", "Write tests"})
+
+    def test_03_assign_and_filter(self):
+        """Test assignment replaces the previous one and is visible to the assignee filter"""
+        task_id = self.run_async(self.store.get_workspace_tasks(self.workspace_id))["John"][0]["node_id"]
+        self.assertTrue(self.run_async(self.store.assign_task(self.workspace_id, task_id, "John")))
+        self.assertTrue(self.run_async(self.store.assign_task(self.workspace_id, task_id, "Jane")))
+        self.assertFalse(self.run_async(self.store.assign_task(self.workspace_id, task_id, "Nobody")))
+
+        graph = self.run_async(self.store.query_workspace_graph(self.workspace_id, GraphFilter(assignee="Jane")))
+        self.assertEqual([node["id"] for node in graph["nodes"]], [task_id])
+        graph = self.run_async(self.store.query_workspace_graph(self.workspace_id, GraphFilter(assignee="John")))
+        self.assertEqual(graph["nodes"], [])
+
+    def test_04_pagination(self):
+        """Test keyset pagination walks every node exactly once"""
+        seen, after = [], None
+        while True:
+            page = self.run_async(self.store.query_workspace_graph(
+                self.workspace_id, GraphFilter(after=after, limit=3)
+            ))
+            seen.extend(node["id"] for node in page["nodes"])
+            after = page["next_cursor"]
+            if after is None:
+                break
+        full = self.run_async(self.store.query_workspace_graph(self.workspace_id))
+        self.assertEqual(seen, [node["id"] for node in full["nodes"]])
+        self.assertEqual(len(seen), 8)
+
+    def test_05_update_and_delete(self):
+        """Test update, node delete with its edges, and edge delete"""
+        task = self.run_async(self.store.add_task_to_role(self.workspace_id, "Designer", "Review copy"))
+        self.assertIsNotNone(task)
+        self.assertIsNone(self.run_async(self.store.add_task_to_role(self.workspace_id, "Missing", "Task")))
+
+        node_id = task["node_id"]
+        self.assertTrue(self.run_async(self.store.update_node(self.workspace_id, node_id, {"status": "done"})))
+        self.assertEqual(self.run_async(self.store.get_node(self.workspace_id, node_id))["status"], "done")
+
+        edges_before = len(self.run_async(self.store.query_workspace_graph(self.workspace_id))["edges"])
+        self.assertTrue(self.run_async(self.store.delete_node(self.workspace_id, node_id)))
+        self.assertIsNone(self.run_async(self.store.get_node(self.workspace_id, node_id)))
+        graph = self.run_async(self.store.query_workspace_graph(self.workspace_id))
+        self.assertEqual(len(graph["edges"]), edges_before - 1)
+
+        edge_id = graph["edges"][0]["id"]
+        self.assertTrue(self.run_async(self.store.delete_edge(self.workspace_id, edge_id)))
+        self.assertFalse(self.run_async(self.store.delete_edge(self.workspace_id, edge_id)))
+
+    def test_06_workspace_isolation(self):
+        """Test IDs from one workspace do not resolve in another"""
+        node_id = self.run_async(self.store.get_workspace_tasks(self.workspace_id))["John"][0]["node_id"]
+        self.assertIsNone(self.run_async(self.store.get_node("workspace-b", node_id)))
+        self.assertFalse(self.run_async(self.store.delete_node("workspace-b", node_id)))
+        self.assertEqual(self.run_async(self.store.get_graph_statistics("workspace-b")), {})
+
+        # IDs sharing a database name are still separate workspaces
+        for colliding in ("Workspace-A", "workspace_a", "workspacea"):
+            self.assertEqual(workspace_database_name(colliding), workspace_database_name(self.workspace_id))
+            self.assertNotEqual(workspace_key(colliding), workspace_key(self.workspace_id))
+            self.assertIsNone(self.run_async(self.store.get_node(colliding, node_id)))
+            self.assertEqual(self.run_async(self.store.get_graph_statistics(colliding)), {})
+
+    def test_07_stream(self):
+        """Test the stream ends with the node and edge counts"""
+        async def collect():
+            return [item async for item in self.store.iter_workspace_graph(self.workspace_id)]
+        items = self.run_async(collect())
+        self.assertEqual(items[-1], {"end": {"nodes": 8, "edges": 10}})
+        self.assertEqual(sum(1 for item in items if "node" in item), 8)
+
+    def test_08_reanalysis_is_idempotent(self):
+        """Test analysing the same result again writes nothing new"""
+        before = self.run_async(self.store.query_workspace_graph(self.workspace_id))
+        summary = self.run_async(self.store.write_analysis_graph(
+            self.workspace_id,
+            {"Developer": ["Build API", "Write tests"], "Designer": ["Draw mockups"]},
+            {"John": ["Developer"], "Jane": ["Designer", "Developer"]},
+            {"John": {"skills": ["Python"]}, "Jane": {"skills": ["Figma"]}},
+            document_count=2
+        ))
+        self.assertEqual((summary["created"], summary["updated"], summary["deleted"]), (0, 0, 0))
+
+        after = self.run_async(self.store.query_workspace_graph(self.workspace_id))
+        self.assertEqual([node["id"] for node in after["nodes"]], [node["id"] for node in before["nodes"]])
+        self.assertEqual(len(after["edges"]), len(before["edges"]))
+        workspace = next(node for node in after["nodes"] if node["type"] == "workspace")
+        self.assertEqual(workspace["properties"]["document_count"], 2)
+
+    def test_09_reanalysis_keeps_user_work(self):
+        """Test re-analysis applies the diff without dropping user edits"""
+        tasks = {task["task"]: task["node_id"] for task in self.run_async(self.store.get_workspace_tasks(self.workspace_id))["Jane"]}
+        self.run_async(self.store.update_node(self.workspace_id, tasks["Build API"], {"status": "done"}))
+        self.run_async(self.store.assign_task(self.workspace_id, tasks["Draw mockups"], "Jane"))
+        manual = self.run_async(self.store.add_task_to_role(self.workspace_id, "Developer", "Fix login"))
+
+        summary = self.run_async(self.store.write_analysis_graph(
+            self.workspace_id,
+            {"Developer": ["Deploy"]},
+            {"John": ["Developer"]},
+            {"John": {"skills": ["Python"]}},
+            document_count=1
+        ))
+        self.assertEqual(summary["created"], 1)
+
+        graph = self.run_async(self.store.query_workspace_graph(self.workspace_id))
+        names = {node["label"]: node for node in graph["nodes"]}
+        # Untouched analysis task dropped; edited, assigned and manual tasks kept
+        self.assertNotIn("Write tests", names)
+        self.assertEqual(names["Build API"]["status"], "done")
+        self.assertIn("Draw mockups", names)
+        self.assertIn("Fix login", names)
+        self.assertIn("Deploy", names)
+        self.assertEqual(names["Fix login"]["id"], manual["node_id"])
+        # Jane keeps her node while a task is assigned to her, but loses her capabilities
+        self.assertIn("Jane", names)
+        self.assertEqual(list(self.run_async(self.store.get_workspace_tasks(self.workspace_id))), ["John"])
+
+    def test_10_write_progress(self):
+        """Test every non-empty write step is reported with its row count"""
+        events = []
+        self.run_async(self.store.write_analysis_graph(
+            self.workspace_id,
+            {"Developer": ["Build API", "Deploy"]},
+            {"John": ["Developer"]},
+            {"John": {"skills": ["Python", "Go"]}},
+            document_count=1,
+            progress=lambda event, data: events.append((event, data))
+        ))
+        self.assertEqual({event for event, _ in events}, {"graph_batch_written"})
+        rows = {data["step"]: data["rows"] for _, data in events}
+        # Designer, its task and Jane go; Developer swaps a task but keeps its count
+        self.assertEqual(rows, {"delete_nodes": 4, "create_tasks": 1, "update_people": 1})
+        self.assertTrue(all(data["duration"] >= 0 for _, data in events))
+
+    def test_11_incomplete_extraction_keeps_roles_and_tasks(self):
+        """Test re-analysis with failed pages deletes no roles or tasks"""
+        before = self.run_async(self.store.query_workspace_graph(self.workspace_id))
+        summary = self.run_async(self.store.write_analysis_graph(
+            self.workspace_id,
+            {"Developer": ["Build API", "Deploy"], "_processing_summary": {"failed_documents": 1}},
+            {"John": ["Developer"], "Jane": ["Designer", "Developer"]},
+            {"John": {"skills": ["Python"]}, "Jane": {"skills": ["Figma"]}},
+            document_count=1
+        ))
+        self.assertTrue(summary["deletes_skipped"])
+        self.assertEqual((summary["created"], summary["deleted"]), (1, 0))
+
+        graph = self.run_async(self.store.query_workspace_graph(self.workspace_id))
+        names = {node["label"] for node in graph["nodes"]}
+        self.assertTrue({"Designer", "Draw mockups", "Write tests", "Deploy"} <= names)
+        self.assertEqual(len(graph["edges"]), len(before["edges"]) + 1)
+
+    def test_12_graph_changes(self):
+        """Test the change feed reports writes after a version like the Neo4j store"""
+        _, since = self.run_async(self.store.change_version(self.workspace_id))
+        self.assertEqual(self.run_async(self.store.get_graph_changes(self.workspace_id))["version"], since)
+
+        task = self.run_async(self.store.add_task_to_role(self.workspace_id, "Designer", "Review copy"))
+        john_task = self.run_async(self.store.get_workspace_tasks(self.workspace_id))["John"][0]["node_id"]
+        self.run_async(self.store.update_node(self.workspace_id, john_task, {"status": "done"}))
+        self.run_async(self.store.delete_node(self.workspace_id, task["node_id"]))
+
+        changes = self.run_async(self.store.get_graph_changes(self.workspace_id, since))
+        self.assertEqual((changes["version"], changes["full_resync"]), (since + 3, False))
+        self.assertEqual([node["id"] for node in changes["nodes"]["updated"]], [john_task])
+        self.assertEqual(changes["nodes"]["added"], [])
+        self.assertEqual([item["id"] for item in changes["nodes"]["deleted"]], [task["node_id"]])
+        self.assertEqual(len(changes["edges"]["deleted"]), 1)
+
+        self.assertTrue(self.run_async(self.store.force_resync(self.workspace_id)))
+        self.assertTrue(self.run_async(self.store.get_graph_changes(self.workspace_id, since))["full_resync"])
+
+    def test_13_unknown_workspace_reads_do_not_store(self):
+        """Test reads and no-op writes on an unknown workspace leave the store unchanged"""
+        workspace_id = "workspace-unknown"
+
+        async def main():
+            await self.store.change_version(workspace_id)
+            await self.store.get_node(workspace_id, 1)
+            await self.store.get_graph_statistics(workspace_id)
+            await self.store.query_workspace_graph(workspace_id, GraphFilter(around=1))
+            await self.store.get_graph_changes(workspace_id, 0)
+            return [
+                await self.store.update_node(workspace_id, 1, {"status": "done"}),
+                await self.store.delete_edge(workspace_id, 1),
+                await self.store.assign_task(workspace_id, 1, "John"),
+                await self.store.force_resync(workspace_id)
+            ]
+
+        self.assertEqual(self.run_async(main()), [False, False, False, False])
+        self.assertEqual(list(self.store._workspaces), [workspace_key(self.workspace_id)])
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,99 @@
+'''
+ Rate Limiter Testing is tests request and token pacing and the reaction to 429 responses.
+
+ Author: Tanapat Chamted
+'''
+
+import unittest
+import asyncio
+import time
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+
+from src.services import rate_limiter
+from src.services.rate_limiter import LLMRateLimiter, rate_limit_retry_after, init_rate_limiter, close_rate_limiter
+from src.services.llm_service import invoke_cached
+
+class FakeResponse:
+    """HTTP response carried by provider client errors"""
+
+    def __init__(self, status_code, headers):
+        self.status_code = status_code
+        self.headers = headers
+
+class FakeRateLimitError(Exception):
+    """Provider error for a 429 response"""
+
+    def __init__(self, headers):
+        super().__init__("Rate limit reached")
+        self.response = FakeResponse(429, headers)
+        self.status_code = 429
+
+class FailingChain:
+    """Chain whose call is rejected by the provider"""
+
+    def invoke(self, inputs):
+        raise FakeRateLimitError({"retry-after": "0.2"})
+
+class RateLimiterTest(unittest.TestCase):
+    """Test LLMRateLimiter"""
+
+    def tearDown(self):
+        """Drop the shared limiter"""
+        close_rate_limiter()
+
+    def test_01_request_pacing(self):
+        """Test requests beyond the burst are spaced at the quota rate"""
+        limiter = LLMRateLimiter(requests_per_minute=600, tokens_per_minute=0, burst_seconds=0.1)
+        started = time.monotonic()
+        waits = [limiter.acquire(1) for _ in range(4)]
+        self.assertEqual(waits[0], 0.0)
+        self.assertGreaterEqual(time.monotonic() - started, 0.25)
+        self.assertEqual(limiter.stats()["waits"], 3)
+
+    def test_02_token_debt(self):
+        """Test a call larger than the bucket waits for the missing tokens"""
+        limiter = LLMRateLimiter(requests_per_minute=0, tokens_per_minute=60000, burst_seconds=0.1)
+        self.assertAlmostEqual(limiter.acquire(300), 0.2, delta=0.05)
+        # Unused reserved tokens are given back
+        limiter.settle(reserved=300, used=100)
+        self.assertEqual(limiter.acquire(100), 0.0)
+
+    def test_03_retry_after(self):
+        """Test Retry-After is read as seconds or as an HTTP date"""
+        self.assertEqual(rate_limit_retry_after(FakeRateLimitError({"retry-after": "1.5"})), 1.5)
+        self.assertEqual(rate_limit_retry_after(FakeRateLimitError({})), 5.0)
+        date = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=30), usegmt=True)
+        self.assertAlmostEqual(rate_limit_retry_after(FakeRateLimitError({"retry-after": date})), 30, delta=2)
+        self.assertIsNone(rate_limit_retry_after(ValueError("bad JSON")))
+
+    def test_04_rate_limited_pauses_and_slows(self):
+        """Test a 429 pauses every caller and lowers the rate until calls succeed again"""
+        limiter = LLMRateLimiter(requests_per_minute=6000, tokens_per_minute=0)
+        limiter.record_rate_limited(0.2)
+        self.assertEqual(limiter.stats()["scale"], 0.75)
+
+        async def call():
+            return await limiter.acquire_async(1)
+
+        async def main():
+            return await asyncio.gather(call(), call())
+
+        waits = asyncio.run(main())
+        self.assertTrue(all(wait >= 0.19 for wait in waits))
+        for _ in range(20):
+            limiter.record_success()
+        self.assertEqual(limiter.stats()["scale"], 1.0)
+
+    def test_05_invoke_cached_reports_429(self):
+        """Test LLM calls report provider throttling to the shared limiter"""
+        limiter = init_rate_limiter(requests_per_minute=6000, tokens_per_minute=600000)
+        with self.assertRaises(FakeRateLimitError):
+            invoke_cached("extract_roles_tasks", FailingChain(), None, "template {text}", {"text": "hi"}, parse=str)
+        self.assertIs(rate_limiter.get_rate_limiter(), limiter)
+        stats = limiter.stats()
+        self.assertEqual(stats["rate_limited"], 1)
+        self.assertGreater(stats["blocked_for"], 0.1)
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
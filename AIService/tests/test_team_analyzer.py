@@ -0,0 +1,128 @@
+'''
+ Team Analyzer Testing is tests concurrent team role analysis against a fake model.
+
+ Author: Tanapat Chamted
+'''
+
+import unittest
+import asyncio
+import json
+import random
+import re
+
+from langchain_core.runnables import RunnableLambda
+
+from src.services.team_analyzer import analyze_team_roles, analyze_team_roles_async
+from src.services.memory_graph_store import InMemoryGraphStore
+
+class FakeModel:
+    """Fake chat model answering with the member's current role"""
+
+    def __init__(self, flaky=(), broken=()):
+        self.running = 0
+        self.peak = 0
+        self.calls = {}
+        self.flaky = set(flaky)
+        self.broken = set(broken)
+
+    def respond(self, prompt) -> str:
+        text = prompt.to_string()
+        member = re.search(r"'member_name': '(\w+)'", text).group(1)
+        self.calls[member] = self.calls.get(member, 0) + 1
+        if member in self.broken or (member in self.flaky and self.calls[member] == 1):
+            return "I think they could be a developer"
+        role = re.search(r"current_role\W+(\w+)", text).group(1)
+        return json.dumps([role, "Reviewer"])
+
+    async def arespond(self, prompt) -> str:
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            # Finish in random order
+            await asyncio.sleep(random.uniform(0, 0.02))
+            return self.respond(prompt)
+        finally:
+            self.running -= 1
+
+    def runnable(self) -> RunnableLambda:
+        return RunnableLambda(self.respond, afunc=self.arespond)
+
+class TeamAnalyzerTest(unittest.TestCase):
+    """Test analyze_team_roles and analyze_team_roles_async"""
+
+    def setUp(self):
+        """Build a team of twelve"""
+        self.team = {
+            f"Member{index}": {"current_role": f"Role{index % 4}", "skills": ["Python"], "experience": "1 year"}
+            for index in range(12)
+        }
+
+    def test_01_matches_sequential(self):
+        """Test the concurrent analysis returns the sequential result in team order"""
+        sequential = analyze_team_roles(self.team, FakeModel().runnable())
+        model = FakeModel()
+        concurrent = asyncio.run(analyze_team_roles_async(self.team, model.runnable(), max_concurrency=5))
+        self.assertEqual(concurrent, sequential)
+        self.assertEqual(list(concurrent), list(self.team))
+        self.assertEqual(concurrent["Member5"], ["Role1", "Reviewer"])
+        self.assertEqual(model.peak, 5)
+
+    def test_02_members_validated_independently(self):
+        """Test a bad response is retried for its member only and a broken member keeps its stored roles"""
+        store = InMemoryGraphStore()
+        document_analysis = {f"Role{index}": [f"Task{index}"] for index in range(4)}
+        document_analysis["Reviewer"] = ["Review code"]
+        analysed = asyncio.run(analyze_team_roles_async(self.team, FakeModel().runnable()))
+        asyncio.run(store.write_analysis_graph("workspace-a", document_analysis, analysed, self.team, document_count=1))
+
+        model = FakeModel(flaky=["Member3"], broken=["Member7"])
+        events = []
+        result = asyncio.run(analyze_team_roles_async(
+            self.team,
+            model.runnable(),
+            max_retries=3,
+            progress=lambda event, data: events.append(data),
+            max_concurrency=4
+        ))
+        self.assertEqual(result["Member3"], ["Role3", "Reviewer"])
+        self.assertNotIn("Member7", result)
+        self.assertEqual(len(result), 11)
+        self.assertEqual((model.calls["Member3"], model.calls["Member7"], model.calls["Member0"]), (2, 3, 1))
+
+        self.assertEqual([event["completed"] for event in events], list(range(1, 13)))
+        failed = [event["member"] for event in events if not event["ok"]]
+        self.assertEqual(failed, ["Member7"])
+
+        # Re-analysis leaves the failed member's stored capabilities alone
+        summary = asyncio.run(store.write_analysis_graph(
+            "workspace-a", document_analysis, result, self.team, document_count=1
+        ))
+        self.assertEqual((summary["created"], summary["updated"], summary["deleted"]), (0, 0, 0))
+        graph = asyncio.run(store.query_workspace_graph("workspace-a"))
+        names = {node["id"]: node["label"] for node in graph["nodes"]}
+        member7_roles = sorted(
+            names[edge["to"]] for edge in graph["edges"]
+            if edge["type"] == "CAN_PERFORM" and names[edge["from"]] == "Member7"
+        )
+        self.assertEqual(member7_roles, ["Reviewer", "Role3"])
+        member7 = next(node for node in graph["nodes"] if node["label"] == "Member7")
+        self.assertEqual(member7["properties"]["role_count"], 2)
+
+    def test_03_sequential_skips_failed_members(self):
+        """Test the sequential analysis retries and leaves out a broken member like the concurrent one"""
+        model = FakeModel(flaky=["Member3"], broken=["Member7"])
+        events = []
+        result = analyze_team_roles(
+            self.team, model.runnable(), max_retries=3, progress=lambda event, data: events.append(data)
+        )
+        expected = asyncio.run(analyze_team_roles_async(
+            self.team, FakeModel(flaky=["Member3"], broken=["Member7"]).runnable(), max_retries=3
+        ))
+        self.assertEqual(result, expected)
+        self.assertNotIn("Member7", result)
+        self.assertEqual((model.calls["Member3"], model.calls["Member7"]), (2, 3))
+        self.assertEqual([event["completed"] for event in events], list(range(1, 13)))
+        self.assertEqual([event["member"] for event in events if not event["ok"]], ["Member7"])
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -1,6 +1,6 @@
 "use server";
 
-import aiService from "@/lib/aiService";
+import { getWithEtag } from "@/lib/aiService";
 import prisma from "@/lib/prisma";
 
 export default async function getGraph({
@@ -8,9 +8,8 @@ export default async function getGraph({
 }: {
     aiServiceId: string;
 }) {
-    const graph = await aiService
-        .get(`/workspace/${aiServiceId}/graph`)
-        .then((r) => ({ success: true, data: r.data }))
+    const graph = await getWithEtag(`/workspace/${aiServiceId}/graph`)
+        .then((data) => ({ success: true, data }))
         .catch((e) => ({ success: false, data: e.response?.data }));
 
     if (!graph.success) {
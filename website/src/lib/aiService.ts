@@ -4,4 +4,35 @@ const aiService = axios.create({
     baseURL: process.env.AI_SERVICE_URL
 });
 
-export default aiService;
\ No newline at end of file
+const ETAG_CACHE_MAX_ENTRIES = 256;
+const etagCache = new Map<string, { etag: string; data: any }>();
+
+/**
+ * GET a workspace read, revalidating the last response with If-None-Match.
+ * A 304 reuses the cached body, so unchanged graphs are not re-downloaded.
+ * Callers get a copy they are free to modify.
+ */
+export async function getWithEtag<T = any>(url: string): Promise<T> {
+    const cached = etagCache.get(url);
+    const response = await aiService.get(url, {
+        headers: cached ? { "If-None-Match": cached.etag } : undefined,
+        validateStatus: (status) =>
+            (status >= 200 && status < 300) || status === 304,
+    });
+
+    if (response.status === 304 && cached) {
+        return structuredClone(cached.data);
+    }
+
+    etagCache.delete(url);
+    const etag = response.headers["etag"];
+    if (etag) {
+        etagCache.set(url, { etag, data: response.data });
+        if (etagCache.size > ETAG_CACHE_MAX_ENTRIES) {
+            etagCache.delete(etagCache.keys().next().value as string);
+        }
+    }
+    return structuredClone(response.data);
+}
+
+export default aiService;